@@ -0,0 +1,40 @@
+import time
+import argparse
+import bench_common  # noqa: F401  (sim_engine 경로 설정)
+import sim_analysis
+
+# 고정 REPEAT_RUNS 반복실험 vs 신뢰구간 기반 적응형 반복실험
+# AGV 수별로 실행 횟수, 달성한 상대 반폭, wall time을 비교한다.
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--agvs", type=int, nargs="+", default=[3, 5, 10])
+    parser.add_argument("--duration", type=int, default=1800)
+    parser.add_argument("--target", type=float, default=sim_analysis.CI_TARGET)
+    parser.add_argument("--metrics", nargs="+", default=["throughput_per_hour"])
+    parser.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args()
+
+    print(f"duration={args.duration} target={args.target} metrics={args.metrics} workers={args.workers}")
+    print(f"{'agvs':>5} {'mode':<10}{'runs':>6}{'thr/h':>9}{'rel ci':>9}{'wall(s)':>9}{'saved(s)':>10}")
+    for agv_count in args.agvs:
+        t0 = time.perf_counter()
+        fixed = sim_analysis.ReplicationAggregate(agv_count)
+        sim_analysis.run_multiple_sim_analysis(agv_count, args.duration, workers=args.workers,
+                                               on_result=lambda i, seed, result, agg: fixed.add(result))
+        fixed_wall = time.perf_counter() - t0
+        fixed_ci = fixed.stats["throughput_per_hour"].relative_half_width()
+        print(f"{agv_count:>5} {'fixed':<10}{fixed.runs:>6}{fixed.stats['throughput_per_hour'].mean:>9.1f}"
+              f"{fixed_ci:>9.3f}{fixed_wall:>9.2f}{'':>10}")
+
+        t0 = time.perf_counter()
+        res = sim_analysis.run_adaptive_sim_analysis(agv_count, args.duration, target=args.target,
+                                                     metrics=tuple(args.metrics), workers=args.workers)
+        wall = time.perf_counter() - t0
+        rel = res["ci"]["throughput_per_hour"]["relative"]
+        mode = "adaptive" if res["converged"] else "adapt(max)"
+        print(f"{agv_count:>5} {mode:<10}{res['repeat_runs']:>6}{res['throughput_per_hour']:>9.1f}"
+              f"{rel:>9.3f}{wall:>9.2f}{fixed_wall - wall:>10.2f}")
+
+if __name__ == "__main__":
+    main()
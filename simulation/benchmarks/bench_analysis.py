@@ -0,0 +1,40 @@
+import os
+import time
+import argparse
+import bench_common  # noqa: F401  (sim_engine 경로 설정)
+import sim_analysis
+
+# deep 분석 (REPEAT_RUNS회 반복실험) wall time: 직렬 실행 vs 프로세스 풀
+# 이상적인 병렬 시간은 ceil(runs / cores) * (1회 실행 시간)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--agvs", type=int, default=5)
+    parser.add_argument("--duration", type=int, default=1800)
+    parser.add_argument("--runs", type=int, default=15)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    workers = args.workers or sim_analysis.default_workers(args.runs)
+    print(f"agvs={args.agvs} duration={args.duration} runs={args.runs} cores={os.cpu_count()} workers={workers}")
+
+    t0 = time.perf_counter()
+    serial = sim_analysis.run_multiple_sim_analysis(args.agvs, args.duration, repeat_runs=args.runs, workers=1)
+    serial_wall = time.perf_counter() - t0
+
+    first = []
+    t0 = time.perf_counter()
+    parallel = sim_analysis.run_multiple_sim_analysis(
+        args.agvs, args.duration, repeat_runs=args.runs, workers=workers,
+        on_result=lambda i, seed, result, agg: first.append(time.perf_counter() - t0))
+    parallel_wall = time.perf_counter() - t0
+
+    single = serial_wall / args.runs
+    ideal = -(-args.runs // workers) * single
+    print(f"serial:   {serial_wall:.2f}s (single run ~{single:.2f}s)")
+    print(f"parallel: {parallel_wall:.2f}s (ideal {ideal:.2f}s, first result after {first[0]:.2f}s)")
+    print(f"speedup:  {serial_wall / parallel_wall:.2f}x")
+    assert abs(serial["throughput_per_hour"] - parallel["throughput_per_hour"]) < 1e-6, "seeded runs must match"
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+import time
+import argparse
+import bench_common  # noqa: F401  (sim_engine 경로 설정)
+import sim_analysis
+
+# 정상상태 throughput 추정: 반복실험 (REPEAT_RUNS회 x duration) vs 배치 평균법 (1회 x duration*BATCH_RUN_FACTOR)
+# CPU 시간과 95% 신뢰구간 반폭, MSER-5가 고른 워밍업 길이를 출력한다.
+# reactive 플래너는 긴 실행에서 교착이 생기기 쉬워 기본값은 reservation 플래너로 비교한다.
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--agvs", type=int, nargs="+", default=[3, 5, 10])
+    parser.add_argument("--duration", type=int, default=1800)
+    parser.add_argument("--planner", default="reservation")
+    parser.add_argument("--factor", type=int, default=sim_analysis.BATCH_RUN_FACTOR)
+    args = parser.parse_args()
+
+    print(f"duration={args.duration} planner={args.planner} replications={sim_analysis.REPEAT_RUNS} "
+          f"batch run length={args.duration * args.factor}")
+    print(f"{'agvs':>5} {'method':<12}{'thr/h':>9}{'ci half':>9}{'cycle ci%':>10}{'warmup':>8}{'cpu(s)':>9}")
+    for agv_count in args.agvs:
+        rep = sim_analysis.ReplicationAggregate(agv_count, args.planner)
+        t0 = time.perf_counter()
+        sim_analysis.run_multiple_sim_analysis(agv_count, args.duration, planner=args.planner, workers=1,
+                                               on_result=lambda i, seed, result, agg: rep.add(result))
+        rep_cpu = time.perf_counter() - t0
+        thr = rep.stats["throughput_per_hour"]
+        print(f"{agv_count:>5} {'replication':<12}{thr.mean:>9.1f}{thr.half_width():>9.1f}"
+              f"{100 * rep.stats['avg_cycle'].relative_half_width():>10.2f}{sim_analysis.WARMUP_PERIOD:>8}{rep_cpu:>9.2f}")
+
+        t0 = time.perf_counter()
+        res = sim_analysis.run_batch_means_analysis(agv_count, args.duration * args.factor, planner=args.planner)
+        bm_cpu = time.perf_counter() - t0
+        ci = res["ci"]["throughput_per_hour"]
+        cycle = res["ci"]["avg_cycle"]
+        print(f"{agv_count:>5} {'batch_means':<12}{ci['mean']:>9.1f}{ci['half_width']:>9.1f}"
+              f"{100 * cycle['relative'] if cycle else float('nan'):>10.2f}{res['warmup']:>8}{bm_cpu:>9.2f}"
+              f"  ({rep_cpu / bm_cpu:.1f}x less cpu, {ci['batches']} batches, lag1={ci['lag1']:.2f})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+import json
+import time
+import random
+import argparse
+import bench_common  # noqa: F401  (sim_engine 경로 설정)
+from sim_broadcast import FleetFrameEncoder, FleetFrameDecoder, quantize
+
+# 함대 상태 방송 비용: 기존 JSON 'message' (매 tick 전체) vs 바이너리 델타 프레임 ('fleet_frame')
+# AGV 500대, tick마다 --moving 비율만 움직인다고 보고 초당 바이트 / tick당 인코딩 CPU를 출력한다.
+# socketio는 클라이언트마다 같은 payload를 보내므로 전송량은 클라이언트 수에 비례한다.
+
+def make_fleet(count, width, height, rng):
+    return {i: [float(rng.randrange(width)), float(rng.randrange(height)), 0] for i in range(count)}
+
+def step_fleet(fleet, moving, rng, width, height):
+    for agv_id in rng.sample(list(fleet), int(len(fleet) * moving)):
+        a = fleet[agv_id]
+        dx, dy = rng.choice(((0.1, 0), (-0.1, 0), (0, 0.1), (0, -0.1)))
+        a[0] = min(max(a[0] + dx, 0), width - 1)
+        a[1] = min(max(a[1] + dy, 0), height - 1)
+        a[2] = 2 | (a[2] & 1)
+    if rng.random() < 0.05:
+        a = fleet[rng.randrange(len(fleet))]
+        a[2] ^= 1
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--agvs", type=int, default=500)
+    parser.add_argument("--fps", type=float, default=10)
+    parser.add_argument("--seconds", type=float, default=60)
+    parser.add_argument("--moving", type=float, default=0.3)
+    parser.add_argument("--clients", type=int, default=10)
+    parser.add_argument("--size", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    fleet = make_fleet(args.agvs, args.size, args.size, rng)
+    encoder = FleetFrameEncoder()
+    decoder = FleetFrameDecoder()
+    ticks = int(args.seconds * args.fps)
+    json_bytes = bin_bytes = frames = 0
+    json_cpu = bin_cpu = 0.0
+    for tick in range(ticks):
+        step_fleet(fleet, args.moving, rng, args.size, args.size)
+        sim_time = tick / args.fps
+
+        t0 = time.process_time()
+        state = [{'agv_id': i, 'location_x': a[0], 'location_y': a[1]} for i, a in fleet.items()]
+        payload = json.dumps({'agv_count': len(fleet), 'agvs': state})
+        json_cpu += time.process_time() - t0
+        json_bytes += len(payload)
+
+        t0 = time.process_time()
+        frame = encoder.encode({i: (quantize(a[0]), quantize(a[1]), a[2]) for i, a in fleet.items()}, sim_time)
+        bin_cpu += time.process_time() - t0
+        if frame is not None:
+            frames += 1
+            bin_bytes += len(frame)
+            assert decoder.apply(frame)
+
+    for i, a in fleet.items():
+        x, y, flags = decoder.fleet[i]
+        assert abs(x - a[0]) <= 0.005 and abs(y - a[1]) <= 0.005 and flags == a[2], "decoded fleet must match"
+
+    seconds = ticks / args.fps
+    print(f"agvs={args.agvs} fps={args.fps} moving={args.moving:.0%} clients={args.clients} ticks={ticks}")
+    print(f"{'format':<8}{'bytes/s/client':>16}{'bytes/s total':>15}{'cpu/tick(ms)':>14}{'cpu%':>7}")
+    for name, size, cpu in (("json", json_bytes, json_cpu), ("binary", bin_bytes, bin_cpu)):
+        print(f"{name:<8}{size / seconds:>16.0f}{size / seconds * args.clients:>15.0f}"
+              f"{cpu / ticks * 1000:>14.3f}{cpu / seconds * 100:>7.1f}")
+    print(f"binary frames sent: {frames}/{ticks}, size ratio {bin_bytes / json_bytes:.3f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+import os
+import time
+import argparse
+import tempfile
+import bench_common  # noqa: F401  (sim_engine 경로 설정)
+import sim_analysis
+from sim_cache import ResultCache, scenario_key
+
+# 결과 캐시: 같은 시나리오를 다시 요청했을 때 (키 계산 + 조회) 시간 vs 다시 계산하는 시간,
+# 그리고 크기 상한을 넘겼을 때 LRU 정리
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--agvs", type=int, default=5)
+    parser.add_argument("--duration", type=int, default=1800)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--lookups", type=int, default=1000)
+    parser.add_argument("--max-kb", type=int, default=16)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "results.sqlite3")
+    cache = ResultCache(path, max_bytes=args.max_kb * 1024).open()
+    kwargs = {"agv_count": args.agvs, "sim_duration": args.duration, "repeat_runs": args.runs,
+              "planner": sim_analysis.PLANNER, "adaptive": None, "method": "replication"}
+
+    t0 = time.perf_counter()
+    result = sim_analysis.run_multiple_sim_analysis(args.agvs, args.duration, repeat_runs=args.runs, workers=1)
+    compute = time.perf_counter() - t0
+    cache.put(scenario_key("analysis", kwargs), "analysis", result)
+
+    t0 = time.perf_counter()
+    for _ in range(args.lookups):
+        hit = cache.get(scenario_key("analysis", kwargs))
+    lookup = (time.perf_counter() - t0) / args.lookups
+    assert hit["throughput_per_hour"] == result["throughput_per_hour"]
+    print(f"agvs={args.agvs} duration={args.duration} runs={args.runs}")
+    print(f"compute: {compute * 1000:.1f} ms   cached: {lookup * 1000:.3f} ms ({compute / lookup:.0f}x)")
+
+    # 다른 시드 상수 = 다른 시나리오
+    seed = sim_analysis.ANALYSIS_SEED
+    sim_analysis.ANALYSIS_SEED = seed + 1
+    assert cache.get(scenario_key("analysis", kwargs)) is None, "seed must be part of the key"
+    sim_analysis.ANALYSIS_SEED = seed
+
+    # 대수만 다른 결과를 계속 넣으면 오래 안 쓴 것부터 지워진다 (처음 넣은 결과는 계속 조회해서 남는다)
+    first = scenario_key("analysis", kwargs)
+    for n in range(1, 201):
+        cache.put(scenario_key("analysis", dict(kwargs, agv_count=args.agvs + n)), "analysis", result)
+        cache.get(first)
+    info = cache.describe()
+    print(f"after 200 stores: entries={info['entries']} bytes={info['bytes']} max={info['max_bytes']} "
+          f"evictions={info['evictions']} hit_rate={info['hit_rate']:.2f}")
+    assert info["bytes"] <= info["max_bytes"] and cache.get(first) is not None
+    cache.close()
+
+if __name__ == "__main__":
+    main()
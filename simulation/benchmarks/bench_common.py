@@ -0,0 +1,15 @@
+import os
+import sys
+from simpy import Environment
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+class CountingEnvironment(Environment):
+    # 처리한 SimPy 이벤트 수를 센다
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.events_processed = 0
+
+    def step(self):
+        self.events_processed += 1
+        super().step()
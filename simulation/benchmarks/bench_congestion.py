@@ -0,0 +1,62 @@
+import time
+import random
+import argparse
+import statistics
+from simpy import Environment
+import bench_common  # noqa: F401  (sim_engine 경로 설정)
+import sim_engine
+
+# 공유 혼잡장 켬/끔 비교 (AGV가 많은 혼잡한 실행)
+#  - 배송 수, 구간당 평균 대기 시간 (leg_wait), 대기 p90, 계획 실패 수, wall time
+#  - --searches 별로 (모두 같은 비용 모델: 혼잡한 셀 진입 비용 1 + min(cap, weight x 값))
+# 같은 시드에서 켬/끔 각각 --runs번 돌려 평균을 낸다 (배송 수는 시드마다 크게 달라서 표준편차도 낸다).
+# --enter/--exit/--weight/--cap으로 비용 모델 상수를 바꿔 볼 수 있다
+
+def run_once(agv_count, duration, search, planner, congestion, seed):
+    random.seed(seed)
+    t0 = time.perf_counter()
+    sim = sim_engine.create_simulation(Environment(), agv_count, duration, planner=planner, search=search,
+                                       congestion=congestion)
+    sim.env.run(until=duration)
+    stats = sim.stats
+    legs = sum(data.wait_times.n for data in stats.agv_stats.values())
+    waited = sum(data.wait_times.total for data in stats.agv_stats.values())
+    return {"delivered": stats.delivered_count, "wait": waited / legs if legs else 0.0,
+            "wait_p90": stats.histograms["wait"].quantile(0.9), "failed": stats.plan_counters["failed"],
+            "wall": time.perf_counter() - t0}
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--agvs", type=int, nargs="+", default=[8, 12, 16])
+    parser.add_argument("--duration", type=int, default=1800)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--searches", nargs="+", default=["flat"], choices=sim_engine.PATH_SEARCHES)
+    parser.add_argument("--planner", default="reactive", choices=sim_engine.PLANNERS)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--enter", type=float, default=sim_engine.CONGESTION_AVOID)
+    parser.add_argument("--exit", type=float, default=sim_engine.CONGESTION_AVOID_EXIT)
+    parser.add_argument("--weight", type=float, default=sim_engine.CONGESTION_WEIGHT)
+    parser.add_argument("--cap", type=float, default=sim_engine.CONGESTION_PENALTY_CAP)
+    args = parser.parse_args()
+    sim_engine.CONGESTION_AVOID = args.enter
+    sim_engine.CONGESTION_AVOID_EXIT = args.exit
+    sim_engine.CONGESTION_WEIGHT = args.weight
+    sim_engine.CONGESTION_PENALTY_CAP = args.cap
+
+    print(f"duration={args.duration} runs={args.runs} planner={args.planner} "
+          f"half_life={sim_engine.CONGESTION_HALF_LIFE}s enter>={args.enter} exit<{args.exit} "
+          f"penalty=min({args.cap}, {args.weight} x value)")
+    print(f"{'agvs':>5} {'search':<7}{'field':<6}{'delivered':>10}{'sd':>7}{'wait(s)':>9}{'wait p90':>10}{'failed':>8}"
+          f"{'wall(s)':>9}")
+    for agv_count in args.agvs:
+        for search in args.searches:
+            for congestion in (False, True):
+                runs = [run_once(agv_count, args.duration, search, args.planner, congestion, args.seed + i)
+                        for i in range(args.runs)]
+                mean = {key: statistics.mean(r[key] for r in runs) for key in runs[0]}
+                sd = statistics.stdev(r["delivered"] for r in runs) if len(runs) > 1 else 0.0
+                print(f"{agv_count:>5} {search:<7}{'on' if congestion else 'off':<6}{mean['delivered']:>10.1f}{sd:>7.1f}"
+                      f"{mean['wait']:>9.2f}{mean['wait_p90']:>10.1f}{mean['failed']:>8.0f}{mean['wall']:>9.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+import json
+import time
+import random
+import argparse
+from collections import defaultdict
+import bench_common  # noqa: F401  (sim_engine 경로 설정)
+import sim_engine
+import sim_map
+from bench_map import make_layout
+
+# 큰 맵 경로 질의 지연: 셀 격자 A* (flat) vs 클러스터 계층 그래프 (hpa)
+#  - 먼 질의 (맨해튼 거리 --min-distance 이상) 각각의 p50 / p90 / p99 / 최대 지연
+#  - 막힌 셀 없음 / --blocked개 막힘
+#  - 경로 길이 비 (hpa / flat), 계층 그래프 만들기 시간, 셀 하나 바뀌었을 때 부분 갱신 시간
+#  - 최적성 검사: 거리 제한 없는 질의 --check-queries개에서 flat은 찾았는데 hpa가 못 찾은 수 (0이어야 한다)와
+#    경로 길이 비의 평균 / p99 / 최대 (hpa는 최단 경로가 아니다)
+
+def percentiles(samples):
+    samples = sorted(samples)
+    pick = lambda q: samples[min(len(samples) - 1, int(q * len(samples)))]  # noqa: E731
+    return pick(0.5), pick(0.9), pick(0.99), samples[-1]
+
+def make_queries(cells, count, min_distance, blocked_cells, rng):
+    queries = []
+    while len(queries) < count:
+        start, goal = rng.choice(cells), rng.choice(cells)
+        if sim_engine.manhattan(start, goal) < min_distance:
+            continue
+        blocked = {c: 1e9 for c in rng.sample(cells, blocked_cells) if c not in (start, goal)}
+        queries.append((start, goal, blocked))
+    return queries
+
+def run(search, queries):
+    times, lengths = [], []
+    for start, goal, blocked in queries:
+        t0 = time.perf_counter()
+        path = search(start, goal, 0, blocked, defaultdict(int))
+        times.append((time.perf_counter() - t0) * 1e3)
+        lengths.append(None if path is None else len(path) - 1)
+    return times, lengths
+
+def optimality(queries):
+    _, flat_lengths = run(sim_engine.a_star_search, queries)
+    _, hpa_lengths = run(sim_engine.hpa_path, queries)
+    missed = sum(1 for f, h in zip(flat_lengths, hpa_lengths) if f is not None and h is None)
+    ratios = sorted(h / f for f, h in zip(flat_lengths, hpa_lengths) if f and h is not None)
+    return missed, ratios
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=300)
+    parser.add_argument("--cols", type=int, default=500)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--min-distance", type=int, default=200)
+    parser.add_argument("--blocked", type=int, default=500)
+    parser.add_argument("--check-queries", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    layout = sim_map.parse_json(json.dumps(make_layout(args.rows, args.cols)))
+    sim_engine.set_map(layout)
+    t0 = time.perf_counter()
+    graph = sim_engine.get_cluster_graph()
+    build = time.perf_counter() - t0
+    info = graph.describe()
+    print(f"map {args.rows}x{args.cols}: {info['clusters']} clusters of {info['size']}x{info['size']}, "
+          f"{info['nodes']} entrance nodes, {info['edges']} edges, build {build * 1e3:.0f} ms")
+
+    rng = random.Random(args.seed)
+    cells = list(sim_engine.get_adjacency())
+    print(f"{'scenario':<12}{'search':<6}{'p50(ms)':>9}{'p90(ms)':>9}{'p99(ms)':>9}{'max(ms)':>9}{'len ratio':>11}")
+    for name, blocked_cells in (("open", 0), (f"{args.blocked} blocked", args.blocked)):
+        queries = make_queries(cells, args.queries, args.min_distance, blocked_cells, rng)
+        flat_times, flat_lengths = run(sim_engine.a_star_search, queries)
+        hpa_times, hpa_lengths = run(sim_engine.hpa_path, queries)
+        assert [n is None for n in flat_lengths] == [n is None for n in hpa_lengths]
+        ratios = [h / f for f, h in zip(flat_lengths, hpa_lengths) if f]
+        for search, times, ratio in (("flat", flat_times, ""), ("hpa", hpa_times, f"{sum(ratios) / len(ratios):.3f}")):
+            p50, p90, p99, worst = percentiles(times)
+            print(f"{name:<12}{search:<6}{p50:>9.2f}{p90:>9.2f}{p99:>9.2f}{worst:>9.2f}{ratio:>11}")
+
+    print(f"{'optimality':<12}{'missed':>8}{'mean':>8}{'p99':>8}{'max':>8}")
+    for name, blocked_cells in (("open", 0), (f"{args.blocked} blocked", args.blocked)):
+        missed, ratios = optimality(make_queries(cells, args.check_queries, 0, blocked_cells, rng))
+        p99 = ratios[min(len(ratios) - 1, int(0.99 * len(ratios)))]
+        print(f"{name:<12}{missed:>8}{sum(ratios) / len(ratios):>8.3f}{p99:>8.3f}{ratios[-1]:>8.3f}")
+        assert missed == 0, f"hpa missed {missed} paths that flat A* found"
+
+    # 셀 하나가 벽이 됐다가 다시 통로가 되는 경우: 부분 갱신 vs 전체 다시 만들기
+    samples = []
+    for cell in rng.sample(cells, 20):
+        for value in (1, 0):
+            t0 = time.perf_counter()
+            sim_engine.update_map_cell(cell, value)
+            sim_engine.get_cluster_graph()
+            samples.append((time.perf_counter() - t0) * 1e3)
+    print(f"incremental update: {sum(samples) / len(samples):.2f} ms/cell (full build {build * 1e3:.0f} ms)")
+
+if __name__ == "__main__":
+    main()
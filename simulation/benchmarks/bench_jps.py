@@ -0,0 +1,58 @@
+import json
+import time
+import random
+import argparse
+from collections import defaultdict
+import bench_common  # noqa: F401  (sim_engine 경로 설정)
+import sim_engine
+import sim_map
+from bench_map import make_layout
+
+# 셀 격자 A* (맨해튼 휴리스틱) vs Jump Point Search
+#  - 같은 질의에서 두 경로 길이가 항상 같은지 (최단 경로 교차 검증)
+#  - 질의당 펼친 노드 수 (A*: 꺼낸 셀, JPS: 꺼낸 점프 포인트 + 훑은 셀)와 시간
+# 기본 맵과 합성 큰 맵(--rows x --cols) 각각, 막힌 셀 없음 / --blocked 비율만큼 막힘
+
+def run(search, queries):
+    counters = {}
+    lengths = []
+    t0 = time.perf_counter()
+    for start, goal, blocked in queries:
+        path = search(start, goal, 0, blocked, defaultdict(int), counters=counters)
+        lengths.append(None if path is None else len(path))
+    return lengths, counters, (time.perf_counter() - t0) / len(queries)
+
+def bench(name, count, blocked_ratio, rng):
+    cells = list(sim_engine.get_adjacency())
+    queries = []
+    for _ in range(count):
+        start, goal = rng.choice(cells), rng.choice(cells)
+        blocked = {c: 1e9 for c in rng.sample(cells, int(len(cells) * blocked_ratio)) if c not in (start, goal)}
+        queries.append((start, goal, blocked))
+    a_lengths, a_counters, a_time = run(sim_engine.a_star_search, queries)
+    j_lengths, j_counters, j_time = run(sim_engine.jps_path, queries)
+    mismatches = sum(1 for a, j in zip(a_lengths, j_lengths) if a != j)
+    assert mismatches == 0, f"{mismatches} path lengths differ from A*"
+    print(f"{name:<22}{a_counters['expansions'] / count:>10.0f}{j_counters['expansions'] / count:>10.0f}"
+          f"{j_counters['scanned'] / count:>10.0f}{a_time * 1e3:>10.2f}{j_time * 1e3:>10.2f}{a_time / j_time:>8.1f}x")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--large-queries", type=int, default=100)
+    parser.add_argument("--rows", type=int, default=300)
+    parser.add_argument("--cols", type=int, default=500)
+    parser.add_argument("--blocked", type=float, default=0.02, help="막힌 셀 비율")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    print(f"{'scenario':<22}{'A* exp':>10}{'JPS exp':>10}{'scanned':>10}{'A*(ms)':>10}{'JPS(ms)':>10}{'speedup':>9}")
+    for blocked in (0.0, args.blocked):
+        bench(f"default {blocked:.0%} blocked", args.queries, blocked, rng)
+    sim_engine.set_map(sim_map.parse_json(json.dumps(make_layout(args.rows, args.cols))))
+    for blocked in (0.0, args.blocked):
+        bench(f"{args.rows}x{args.cols} {blocked:.0%} blocked", args.large_queries, blocked, rng)
+
+if __name__ == "__main__":
+    main()
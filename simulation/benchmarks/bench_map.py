@@ -0,0 +1,104 @@
+import os
+import json
+import time
+import argparse
+import tempfile
+from collections import deque
+import bench_common  # noqa: F401  (sim_engine 경로 설정)
+import sim_engine
+import sim_map
+
+# 큰 창고 맵 (기본 300 x 500): 합성 레이아웃을 JSON으로 저장한 뒤
+#  - 처음 읽기 (파싱 + 연결성 검사 + 인접 리스트 + .npz 저장) / 같은 프로세스 재사용 / 다른 프로세스처럼 .npz에서 읽기
+#  - 맵 전체 BFS: 리스트 격자 검사 (경계 + MAP[r][c] == 1) vs 미리 계산한 인접 리스트
+#  - 목표 하나의 거리장 계산 시간과 전부 미리 계산했을 때의 메모리
+#  - 그 맵에서 짧은 시뮬레이션 한 번
+# --save로 만든 파일은 bench_planning.py --map / 서버 --map 에 그대로 쓸 수 있다
+
+def make_layout(rows, cols):
+    # 위쪽 줄 출구, 6행마다 2행짜리 랙(벽) 블록 (20열마다 교차 통로), 랙 양쪽 5열마다 선반, 아래쪽 줄 시작 셀
+    grid = [["."] * cols for _ in range(rows)]
+    for c in range(2, cols - 2, 10):
+        grid[0][c] = "E"
+    for r in range(4, rows - 6, 6):
+        for c in range(2, cols - 2):
+            if c % 20 in (0, 1):
+                continue
+            grid[r][c] = grid[r + 1][c] = "#"
+            if c % 5 == 3:
+                grid[r - 1][c] = grid[r + 2][c] = "S"
+    for c in range(0, cols, 5):
+        grid[rows - 1][c] = "A"
+    return {"name": f"synthetic_{rows}x{cols}", "grid": ["".join(row) for row in grid]}
+
+def legacy_bfs(grid, source):
+    rows, cols = len(grid), len(grid[0])
+    seen = {source}
+    queue = deque([source])
+    while queue:
+        cell = queue.popleft()
+        for dr, dc in [(-1,0), (1,0), (0,-1), (0,1)]:
+            neighbor = (cell[0]+dr, cell[1]+dc)
+            if not (0 <= neighbor[0] < rows and 0 <= neighbor[1] < cols):
+                continue
+            if grid[neighbor[0]][neighbor[1]] == 1 or neighbor in seen:
+                continue
+            seen.add(neighbor)
+            queue.append(neighbor)
+    return len(seen)
+
+def timed(fn, *args):
+    t0 = time.perf_counter()
+    result = fn(*args)
+    return result, (time.perf_counter() - t0) * 1e3
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=300)
+    parser.add_argument("--cols", type=int, default=500)
+    parser.add_argument("--save", help="만든 맵을 이 경로(.json)에 저장")
+    parser.add_argument("--agvs", type=int, default=50)
+    parser.add_argument("--duration", type=int, default=300)
+    parser.add_argument("--planner", default=sim_engine.PLANNER, choices=sim_engine.PLANNERS)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    sim_map.MAP_CACHE_DIR = os.path.join(workdir, "maps")
+    path = args.save or os.path.join(workdir, "warehouse.json")
+    with open(path, "w") as f:
+        json.dump(make_layout(args.rows, args.cols), f)
+
+    layout, cold = timed(sim_map.load_map, path)
+    _, warm = timed(sim_map.load_map, path)
+    sim_map._maps.clear()
+    _, disk = timed(sim_map.load_map, path)
+    info = layout.describe()
+    print(f"map {info['rows']}x{info['cols']}: {info['cells']} free cells, {info['shelves']} shelves, "
+          f"{info['exits']} exits, {info['starts']} starts ({os.path.getsize(path) / 1024:.0f} KiB json)")
+    print(f"load: cold {cold:.1f} ms   in-process cache {warm:.3f} ms   .npz cache {disk:.1f} ms")
+
+    _, checked = timed(sim_map.WarehouseMap(layout.grid, layout.shelves, layout.exits, layout.starts).check)
+    _, applied = timed(sim_engine.set_map, layout)
+    print(f"check (incl. adjacency): {checked:.1f} ms   set_map: {applied:.1f} ms")
+
+    grid = layout.grid.tolist()
+    adjacency = sim_engine.get_adjacency()
+    legacy_count, legacy_ms = timed(legacy_bfs, grid, layout.exits[0])
+    new_count, new_ms = timed(lambda: len(sim_map.reachable(adjacency, layout.exits[:1])))
+    assert legacy_count == new_count
+    print(f"full-map BFS: list checks {legacy_ms:.1f} ms   adjacency {new_ms:.1f} ms ({legacy_ms / new_ms:.1f}x)")
+
+    fields = sim_engine.get_distance_fields()
+    goal = layout.shelves[len(layout.shelves) // 2]
+    _, field_ms = timed(fields.build, goal)
+    cells = args.rows * args.cols
+    print(f"distance field: {field_ms:.1f} ms/goal, {cells * 8 / 1024:.0f} KiB/goal; "
+          f"kept {len(fields.fields)} of {len(fields.goals)} goals "
+          f"(all eager would be {cells * 8 * len(fields.goals) / 2**20:.0f} MiB)")
+
+    result, sim_ms = timed(lambda: sim_engine.run_one_sim_analysis(args.agvs, args.duration, planner=args.planner, seed=1))
+    print(f"simulation agvs={args.agvs} duration={args.duration} planner={args.planner}: "
+          f"{sim_ms / 1e3:.2f} s, delivered={result['delivered_count']}")
+
+if __name__ == "__main__":
+    main()
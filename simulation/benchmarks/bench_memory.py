@@ -0,0 +1,58 @@
+import time
+import random
+import argparse
+import tracemalloc
+import bench_common  # noqa: F401  (sim_engine 경로 설정)
+from simpy import Environment
+import sim_engine
+
+# AGV 대수가 많을 때 메모리와 이벤트당 처리 시간
+#  - AGV 객체만 만든 크기 (대당 바이트)
+#  - duration초 실행 후 남아 있는 시뮬레이션 전체 (AGV + 경로 + 점유/예약 + 통계)
+#  - 같은 시드로 tracemalloc 없이 다시 돌린 이벤트 1개당 시간
+# 긴 실행 (예: --agvs 3 --duration 172800)에서 통계가 보관 한도를 넘으면 실행 길이와 무관하게 일정해야 한다
+
+def run(agvs, duration, planner, seed):
+    random.seed(seed)
+    env = Environment()
+    sim = sim_engine.create_simulation(env, agvs, duration, planner=planner)
+    events = 0
+    t0 = time.perf_counter()
+    while env.peek() < duration:
+        env.step()
+        events += 1
+    return sim, events, time.perf_counter() - t0
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--agvs", type=int, default=1000)
+    parser.add_argument("--duration", type=int, default=600)
+    parser.add_argument("--planner", default=sim_engine.PLANNER, choices=sim_engine.PLANNERS)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--series-capacity", type=int, default=sim_engine.SERIES_CAPACITY)
+    parser.add_argument("--log-capacity", type=int, default=sim_engine.DELIVERY_LOG_CAPACITY)
+    args = parser.parse_args()
+    sim_engine.SERIES_CAPACITY = args.series_capacity
+    sim_engine.DELIVERY_LOG_CAPACITY = args.log_capacity
+    sim_engine.get_distance_fields()
+
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    agvs = [sim_engine.AGV(i, sim_engine.get_start_position(i)) for i in range(args.agvs)]
+    fleet = tracemalloc.get_traced_memory()[0] - base
+    del agvs
+    base = tracemalloc.get_traced_memory()[0]
+    sim, _, _ = run(args.agvs, args.duration, args.planner, args.seed)
+    retained = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+    delivered = sim.stats.delivered_count
+    del sim
+
+    _, events, wall = run(args.agvs, args.duration, args.planner, args.seed)
+    print(f"agvs={args.agvs} duration={args.duration} planner={args.planner} delivered={delivered}")
+    print(f"AGV objects:      {fleet / args.agvs:.0f} B/agv")
+    print(f"after {args.duration}s run: {retained / args.agvs:.0f} B/agv ({retained / 2**20:.1f} MiB)")
+    print(f"events:           {events} in {wall:.2f}s ({wall / max(events, 1) * 1e6:.2f} us/event)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+import time
+import random
+import argparse
+from bench_common import CountingEnvironment
+import sim_engine
+
+# "step" (셀당 약 100개 timeout) 와 "edge" (셀당 이벤트 1개) 이동 모드 비교
+# 처리한 SimPy 이벤트 수 (이동 / 그 외), 초당 이벤트 수, wall time을 출력한다.
+# 같은 시드면 두 모드의 배송 수가 같아야 한다 (edge는 step의 도착 시각/처리 순서를 그대로 따른다).
+# 이동 이벤트는 셀당 약 100분의 1로 줄지만, 대기 polling/작업 timeout 같은 이동 외 이벤트는 그대로라서
+# 전체 감소 배율과 wall time 이득은 이동 외 이벤트의 비중에 묶인다 (마지막 줄에 따로 출력)
+
+class MoveCountingEnvironment(CountingEnvironment):
+    # 셀 도착(Arrival) 이벤트 수도 센다 = 이동한 셀 수
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.arrivals = 0
+
+    def step(self):
+        if self._queue and self._queue[0][1] == sim_engine.ARRIVAL_PRIORITY:
+            self.arrivals += 1
+        super().step()
+
+def run_mode(move_mode, wait_mode, agv_count, sim_duration, runs, seed):
+    total_events = 0
+    total_arrivals = 0
+    total_wall = 0.0
+    total_delivered = 0
+    for i in range(runs):
+        random.seed(seed + i)
+        env = MoveCountingEnvironment()
+        sim = sim_engine.create_simulation(env, agv_count, sim_duration, move_mode=move_mode, wait_mode=wait_mode)
+        t0 = time.perf_counter()
+        env.run(until=sim_duration)
+        total_wall += time.perf_counter() - t0
+        total_events += env.events_processed
+        total_arrivals += env.arrivals
+        total_delivered += sim.stats.delivered_count
+    return {"events": total_events, "arrivals": total_arrivals, "wall": total_wall, "delivered": total_delivered}
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--agvs", type=int, default=5)
+    parser.add_argument("--duration", type=int, default=1000)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--wait-mode", default=sim_engine.WAIT_MODE, choices=sim_engine.WAIT_MODES)
+    args = parser.parse_args()
+
+    print(f"agvs={args.agvs} duration={args.duration} runs={args.runs} wait_mode={args.wait_mode}")
+    print(f"{'mode':<6}{'events':>12}{'move':>10}{'other':>10}{'wall(s)':>10}{'events/s':>12}{'delivered':>11}")
+    results = {mode: run_mode(mode, args.wait_mode, args.agvs, args.duration, args.runs, args.seed)
+               for mode in ("step", "edge")}
+    # 두 모드의 이동 외 이벤트는 같다: edge의 이동 이벤트 = 도착 수, 나머지가 이동 외
+    other = results["edge"]["events"] - results["edge"]["arrivals"]
+    for mode in ("step", "edge"):
+        r = results[mode]
+        print(f"{mode:<6}{r['events']:>12}{r['events'] - other:>10}{other:>10}{r['wall']:>10.2f}"
+              f"{r['events'] / r['wall']:>12.0f}{r['delivered']:>11}")
+    step, edge = results["step"], results["edge"]
+    cells = max(edge["arrivals"], 1)
+    print(f"move events per cell: step {(step['events'] - other) / cells:.1f}, edge {(edge['events'] - other) / cells:.1f}")
+    print(f"event reduction: {step['events'] / max(edge['events'], 1):.1f}x, "
+          f"wall time speedup: {step['wall'] / max(edge['wall'], 1e-9):.2f}x, "
+          f"same deliveries: {'yes' if step['delivered'] == edge['delivered'] else 'NO'}")
+    print(f"non-move events (waits, pick/drop, stats): {other} = {other / max(edge['events'], 1):.0%} of edge events "
+          f"- the total reduction cannot exceed {step['events'] / max(other, 1):.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+import time
+import random
+import argparse
+from bench_common import CountingEnvironment
+import sim_engine
+from sim_engine import AGV, OccupancyIndex, to_cell
+
+# 점유 조회 비용: SIM_AGVS 전체를 훑는 기존 방식 vs OccupancyIndex
+# 확대한 빈 격자 맵에 AGV를 흩어 놓고, 한 tick 동안 모든 AGV가 agv_process 한 스텝에서 하던 조회
+# (목적지 후보 is_cell_busy, 다음 셀 점유 여부, 선반 셀 busy 검사)를 수행하는 시간을 잰다.
+# 기존 방식은 tick당 O(N^2), 인덱스는 O(N) 이므로 AGV당 비용이 N과 무관해야 한다.
+
+GOAL_COUNT = 20  # shelf_coords + exit_coords 규모
+
+def legacy_is_cell_busy(agvs, cell, required_cargo):
+    for agv in agvs:
+        if to_cell(agv.pos) == cell and agv.cargo == required_cargo:
+            return True
+    return False
+
+def legacy_tick(agvs, goals):
+    hits = 0
+    for agv in agvs:
+        for goal in goals:
+            hits += legacy_is_cell_busy(agvs, goal, agv.cargo)
+        cell = to_cell(agv.pos)
+        next_cell = (cell[0] + 1, cell[1])
+        occupied_cells = {to_cell(other.pos) for other in agvs if other.id != agv.id}
+        hits += next_cell in occupied_cells
+        hits += any(other.id != agv.id and to_cell(other.pos) == cell and other.cargo == 0 for other in agvs)
+    return hits
+
+def index_tick(agvs, goals, occupancy):
+    hits = 0
+    for agv in agvs:
+        for goal in goals:
+            hits += occupancy.has_cargo(goal, agv.cargo)
+        cell = to_cell(agv.pos)
+        next_cell = (cell[0] + 1, cell[1])
+        hits += occupancy.is_occupied(next_cell, exclude=agv)
+        hits += occupancy.has_cargo(cell, 0, exclude=agv)
+    return hits
+
+def build_fleet(agv_count, seed):
+    rng = random.Random(seed)
+    side = max(20, int((agv_count * 8) ** 0.5))
+    cells = rng.sample([(r, c) for r in range(side) for c in range(side)], agv_count)
+    env = CountingEnvironment()
+    agvs = []
+    occupancy = OccupancyIndex()
+    for i, cell in enumerate(cells):
+        agv = AGV(i, cell, env)
+        agv.cargo = rng.randint(0, 1)
+        agv.occupancy = occupancy
+        occupancy.enter(agv, cell)
+        agvs.append(agv)
+    goals = rng.sample(cells, min(GOAL_COUNT, len(cells)))
+    return side, agvs, goals, occupancy
+
+def time_ticks(fn, ticks):
+    t0 = time.perf_counter()
+    for _ in range(ticks):
+        fn()
+    return (time.perf_counter() - t0) / ticks
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--agvs", type=int, nargs="+", default=[5, 20, 50, 100, 200, 500])
+    parser.add_argument("--ticks", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    print(f"{'agvs':>6}{'map':>10}{'scan tick(ms)':>15}{'index tick(ms)':>16}{'scan/agv(us)':>14}{'index/agv(us)':>15}")
+    for agv_count in args.agvs:
+        side, agvs, goals, occupancy = build_fleet(agv_count, args.seed)
+        assert legacy_tick(agvs, goals) == index_tick(agvs, goals, occupancy)
+        scan = time_ticks(lambda: legacy_tick(agvs, goals), args.ticks)
+        index = time_ticks(lambda: index_tick(agvs, goals, occupancy), args.ticks)
+        print(f"{agv_count:>6}{f'{side}x{side}':>10}{scan * 1e3:>15.2f}{index * 1e3:>16.3f}"
+              f"{scan / agv_count * 1e6:>14.1f}{index / agv_count * 1e6:>15.2f}")
+
+    # 실제 맵에서 짧은 시뮬레이션으로 인덱스가 기존 결과와 같은 규칙으로 동작하는지 확인용 수치
+    random.seed(args.seed)
+    env = CountingEnvironment()
+    sim = sim_engine.create_simulation(env, 10, 300)
+    t0 = time.perf_counter()
+    env.run(until=300)
+    print(f"ver4 map, 10 AGVs, 300s: {time.perf_counter() - t0:.2f}s wall, "
+          f"{env.events_processed} events, delivered={sim.stats.delivered_count}")
+
+if __name__ == "__main__":
+    main()
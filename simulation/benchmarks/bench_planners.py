@@ -0,0 +1,48 @@
+import time
+import random
+import argparse
+import statistics
+from bench_common import CountingEnvironment
+import sim_engine
+
+# 충돌 회피 플래너 비교: "reactive" (기존) vs "reservation" (SIPP 시공간 예약)
+# AGV 수별로 throughput_per_hour, 평균 대기 시간(구간당), 재계획 횟수(/sim초, /wall초)를 출력한다.
+
+def run_once(agv_count, sim_duration, planner, seed):
+    random.seed(seed)
+    env = CountingEnvironment()
+    sim = sim_engine.create_simulation(env, agv_count, sim_duration, planner=planner)
+    t0 = time.perf_counter()
+    env.run(until=sim_duration)
+    wall = time.perf_counter() - t0
+    result = sim_engine.compute_simulation_result(sim.stats, sim_duration, agv_count)
+    return result, wall
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--agvs", type=int, nargs="+", default=[3, 5, 10, 20])
+    parser.add_argument("--duration", type=int, default=1800)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    print(f"duration={args.duration} runs={args.runs}")
+    print(f"{'agvs':>5} {'planner':<12}{'thr/h':>8}{'wait(s)':>9}{'plans/sim-s':>13}{'plans/wall-s':>14}"
+          f"{'failed%':>9}{'wall(s)':>9}")
+    for agv_count in args.agvs:
+        for planner in sim_engine.PLANNERS:
+            thr, wait, plans, failed, walls = [], [], [], [], []
+            for i in range(args.runs):
+                result, wall = run_once(agv_count, args.duration, planner, args.seed + i)
+                thr.append(result["throughput_per_hour"])
+                wait.append(result["avg_wait"])
+                plans.append(result["plan_counters"]["plans"])
+                failed.append(result["plan_counters"]["failed"])
+                walls.append(wall)
+            total_plans = sum(plans)
+            print(f"{agv_count:>5} {planner:<12}{statistics.mean(thr):>8.1f}{statistics.mean(wait):>9.2f}"
+                  f"{total_plans / (args.duration * args.runs):>13.2f}{total_plans / sum(walls):>14.0f}"
+                  f"{100 * sum(failed) / max(total_plans, 1):>9.1f}{statistics.mean(walls):>9.2f}")
+
+if __name__ == "__main__":
+    main()
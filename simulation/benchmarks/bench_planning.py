@@ -0,0 +1,59 @@
+import time
+import random
+import argparse
+from collections import defaultdict
+import bench_common  # noqa: F401  (sim_engine 경로 설정)
+import sim_engine
+from sim_map import load_map
+
+# 선반/출구 목표 경로 탐색: A* (맨해튼 휴리스틱) vs 경로 캐시 (cached_a_star_path: 막힌 셀 없는 경로를
+# (출발, 목표)마다 기억해 두고, 지금 막힌 셀이 그 경로에 없으면 탐색 없이 돌려준다)
+# 막힌 셀이 없는 경우와 일부 셀이 막힌 경우 각각의 쿼리당 시간을 비교한다. 두 쪽이 돌려준 경로는 같아야 한다.
+# 캐시는 첫 시나리오에서 채워지고 (빌드 시간 별도 출력) 그 뒤로는 재사용된다 - 막힌 셀이 많을수록 캐시 경로가
+# 막혀서 결국 A*를 돌리므로 이득이 줄어든다.
+
+def make_queries(count, blocked_cells, seed):
+    rng = random.Random(seed)
+    cells = [(r, c) for r in range(sim_engine.ROWS) for c in range(sim_engine.COLS) if sim_engine.MAP[r][c] != 1]
+    goals = sim_engine.shelf_coords + sim_engine.exit_coords
+    queries = []
+    for _ in range(count):
+        start = rng.choice(cells)
+        goal = rng.choice(goals)
+        blocked = {c: 1e9 for c in rng.sample(cells, blocked_cells) if c not in (start, goal)}
+        queries.append((start, goal, blocked))
+    return queries
+
+def time_planner(planner, queries):
+    t0 = time.perf_counter()
+    paths = [planner(start, goal, 0, blocked, defaultdict(int)) for start, goal, blocked in queries]
+    return (time.perf_counter() - t0) / len(queries), paths
+
+def legacy(start, goal, current_time, cell_blocked, congestion_count):
+    return sim_engine.a_star_search(start, goal, current_time, cell_blocked, congestion_count)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--queries", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--map", help="맵 파일 (bench_map.py --save로 만든 큰 창고 등). 없으면 기본 맵")
+    args = parser.parse_args()
+    if args.map:
+        sim_engine.set_map(load_map(args.map))
+
+    queries = make_queries(args.queries, 0, args.seed)
+    t0 = time.perf_counter()
+    cache = sim_engine.get_path_cache()
+    for start, goal, _ in queries:
+        cache.free_path(start, goal)
+    print(f"path cache fill: {(time.perf_counter() - t0) * 1e3:.2f} ms ({len(cache.paths)} (start, goal) pairs)")
+    print(f"{'scenario':<14}{'a_star(us)':>12}{'cached(us)':>12}{'speedup':>9}")
+    for name, blocked_cells in (("uncongested", 0), ("5 blocked", 5), ("20 blocked", 20)):
+        queries = make_queries(args.queries, blocked_cells, args.seed)
+        old, old_paths = time_planner(legacy, queries)
+        new, new_paths = time_planner(sim_engine.cached_a_star_path, queries)
+        assert old_paths == new_paths
+        print(f"{name:<14}{old * 1e6:>12.1f}{new * 1e6:>12.1f}{old / new:>8.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+import json
+import time
+import random
+import argparse
+from collections import defaultdict
+from simpy import Environment
+import bench_common  # noqa: F401  (sim_engine 경로 설정)
+import sim_engine
+import sim_map
+from bench_map import make_layout
+
+# 같은 (AGV, 목표)를 계속 다시 탐색할 때: 매번 처음부터 A* vs D* Lite (이전 탐색 상태를 고쳐 씀)
+#  - 재탐색 1회당 touched (꺼낸 셀 + 다시 계산/비용을 매긴 셀)와 시간. 두 경로 길이는 항상 같아야 한다
+#  - 시나리오: AGV들이 긴 경로를 한 칸씩 가고, --obstacles개의 장애물(다른 차량)이 맵 위를 무작위로 움직인다.
+#    매 틱 AGV마다 재탐색 (경로는 A* 결과를 따라간다)
+#  - 혼잡한 기본 맵 시뮬레이션에서 flat vs dstar (배송 수, 질의당 touched, 시간)
+
+def replay(agv_count, ticks, obstacle_count, min_distance, rng):
+    cells = list(sim_engine.get_adjacency())
+    adjacency = sim_engine.get_adjacency()
+    obstacles = rng.sample(cells, obstacle_count)
+    agvs = []
+    while len(agvs) < agv_count:
+        start, goal = rng.choice(cells), rng.choice(cells)
+        if sim_engine.manhattan(start, goal) >= min_distance:
+            agvs.append([start, goal])
+    planners = {}
+    a_counters, d_counters = {}, {}
+    a_time = d_time = 0.0
+    replans = 0
+    for _ in range(ticks):
+        obstacles = [rng.choice(adjacency[cell]) if adjacency[cell] else cell for cell in obstacles]
+        for agv_id, agv in enumerate(agvs):
+            start, goal = agv
+            if start == goal:
+                continue
+            blocked = {cell: 1e9 for cell in obstacles if cell not in (start, goal)}
+            t0 = time.perf_counter()
+            a_path = sim_engine.a_star_search(start, goal, 0, blocked, defaultdict(int), counters=a_counters)
+            t1 = time.perf_counter()
+            d_path = sim_engine.dstar_path(start, goal, 0, blocked, defaultdict(int), agv_id,
+                                           planners=planners, counters=d_counters)
+            t2 = time.perf_counter()
+            a_time += t1 - t0
+            d_time += t2 - t1
+            replans += 1
+            assert (a_path is None) == (d_path is None) and (a_path is None or len(a_path) == len(d_path))
+            if a_path and len(a_path) > 1:
+                agv[0] = a_path[1]
+    return replans, a_counters["touched"] / replans, d_counters["touched"] / replans, a_time / replans, d_time / replans
+
+def congested_run(agvs, duration, search, seed):
+    random.seed(seed)
+    t0 = time.perf_counter()
+    sim = sim_engine.create_simulation(Environment(), agvs, duration, search=search)
+    sim.env.run(until=duration)
+    return sim.stats.delivered_count, dict(sim.plan_counters), time.perf_counter() - t0
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--agvs", type=int, default=10)
+    parser.add_argument("--ticks", type=int, default=60)
+    parser.add_argument("--obstacles", type=int, default=40)
+    parser.add_argument("--rows", type=int, default=300)
+    parser.add_argument("--cols", type=int, default=500)
+    parser.add_argument("--sim-agvs", type=int, default=8)
+    parser.add_argument("--sim-duration", type=int, default=1800)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    print(f"congested default-map run: {args.sim_agvs} agvs, {args.sim_duration}s")
+    for search in ("flat", "dstar"):
+        delivered, counters, wall = congested_run(args.sim_agvs, args.sim_duration, search, args.seed)
+        touched = counters.get("touched")
+        per_plan = f"{touched / counters['plans']:.1f}" if touched is not None else "-"
+        print(f"  {search:<6} delivered={delivered:<5} plans={counters['plans']:<6} "
+              f"replans={counters.get('replans', '-')!s:<6} touched/plan={per_plan:<6} {wall:.2f}s")
+
+    rng = random.Random(args.seed)
+    print(f"{'map':<10}{'replans':>9}{'A* touched':>12}{'D* touched':>12}{'A*(ms)':>9}{'D*(ms)':>9}")
+    for name in ("default", f"{args.rows}x{args.cols}"):
+        if name != "default":
+            sim_engine.set_map(sim_map.parse_json(json.dumps(make_layout(args.rows, args.cols))))
+        min_distance = 8 if name == "default" else 150
+        obstacles = min(args.obstacles, 6) if name == "default" else args.obstacles
+        replans, a_touched, d_touched, a_time, d_time = replay(args.agvs, args.ticks, obstacles, min_distance, rng)
+        print(f"{name:<10}{replans:>9}{a_touched:>12.0f}{d_touched:>12.0f}{a_time * 1e3:>9.2f}{d_time * 1e3:>9.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+import time
+import random
+import argparse
+import statistics
+from simpy import Environment
+import bench_common  # noqa: F401  (sim_engine 경로 설정)
+import sim_engine
+
+# 경로 탐색 방식별 군집 결과 (기본 맵, reactive 플래너)
+#  - 배송 수 (평균 / 표준편차), 계획 실패 수, wall time
+# 네 탐색 모두 최단 경로를 찾지만 (hpa는 가까운 목표만), 길이가 같은 경로 중 어느 것을 고르는지가 서로 달라서
+# AGV들이 겹치는 정도와 교착 빈도, 그래서 배송 수가 다르다. 같은 시드들로 탐색마다 --runs번 돌린다
+
+def run_once(agv_count, duration, search, seed):
+    random.seed(seed)
+    t0 = time.perf_counter()
+    sim = sim_engine.create_simulation(Environment(), agv_count, duration, search=search, congestion=False)
+    sim.env.run(until=duration)
+    return {"delivered": sim.stats.delivered_count, "failed": sim.stats.plan_counters["failed"],
+            "wall": time.perf_counter() - t0}
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--agvs", type=int, nargs="+", default=[5, 10, 20])
+    parser.add_argument("--duration", type=int, default=1500)
+    parser.add_argument("--runs", type=int, default=4)
+    parser.add_argument("--searches", nargs="+", default=list(sim_engine.PATH_SEARCHES),
+                        choices=sim_engine.PATH_SEARCHES)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    print(f"duration={args.duration} runs={args.runs} wait_mode={sim_engine.WAIT_MODE}")
+    print(f"{'agvs':>5} {'search':<7}{'delivered':>10}{'sd':>7}{'failed':>9}{'wall(s)':>9}")
+    for agv_count in args.agvs:
+        for search in args.searches:
+            runs = [run_once(agv_count, args.duration, search, args.seed + i) for i in range(args.runs)]
+            delivered = [r["delivered"] for r in runs]
+            sd = statistics.stdev(delivered) if len(delivered) > 1 else 0
+            print(f"{agv_count:>5} {search:<7}{statistics.mean(delivered):>10.1f}{sd:>7.1f}"
+                  f"{statistics.mean(r['failed'] for r in runs):>9.0f}{statistics.mean(r['wall'] for r in runs):>9.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+import time
+import queue
+import argparse
+import bench_common  # noqa: F401  (sim_engine 경로 설정)
+from sim_sessions import SESSION_WORKERS, SessionManager
+
+# 세션 호스트 수용량: 워커 W개에 실시간(speed배) 세션 N개를 동시에 띄우고
+# --seconds 동안 각 세션이 wall 시계를 얼마나 따라가는지 (sim 시각 / 기대 sim 시각) 본다.
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, nargs="+", default=[4, 16, 32])
+    parser.add_argument("--agvs", type=int, default=5)
+    parser.add_argument("--speed", type=float, default=5.0)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--workers", type=int, default=SESSION_WORKERS)
+    parser.add_argument("--planner", default="reactive")
+    args = parser.parse_args()
+
+    print(f"workers={args.workers} agvs={args.agvs} speed={args.speed} seconds={args.seconds} planner={args.planner}")
+    print(f"{'sessions':>9}{'min pace%':>11}{'mean pace%':>12}{'frames/s':>10}")
+    for count in args.sessions:
+        manager = SessionManager(workers=args.workers, max_per_worker=count).start()
+        ids = [manager.create({"agv_count": args.agvs, "duration": 100000, "speed": args.speed,
+                               "planner": args.planner, "seed": i}) for i in range(count)]
+        frames = 0
+        t0 = time.perf_counter()
+        while time.perf_counter() - t0 < args.seconds:
+            for worker in manager.workers:
+                try:
+                    while True:
+                        kind, session_id, payload = worker["output"].get_nowait()
+                        manager.handle(kind, session_id, payload)
+                        frames += kind == "frame"
+                except queue.Empty:
+                    pass
+            time.sleep(0.01)
+        for worker in manager.workers:
+            for sid in list(worker["sessions"]):
+                manager.command(sid, "pause")
+        time.sleep(0.5)
+        for worker in manager.workers:
+            try:
+                while True:
+                    manager.handle(*worker["output"].get(timeout=0.2))
+            except queue.Empty:
+                pass
+        # 일시정지 직전까지 진행한 sim 시각 / (wall 초 * 배속). 100%면 실시간을 잘 따라간 것
+        expected = args.seconds * args.speed
+        ratios = [manager.sessions[sid]["frame"]["sim_time"] / expected for sid in ids
+                  if manager.sessions[sid]["frame"] is not None]
+        print(f"{count:>9}{100 * min(ratios):>11.1f}{100 * sum(ratios) / len(ratios):>12.1f}"
+              f"{frames / args.seconds:>10.0f}")
+        manager.shutdown()
+
+if __name__ == "__main__":
+    main()
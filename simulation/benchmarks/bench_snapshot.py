@@ -0,0 +1,49 @@
+import time
+import random
+import argparse
+from simpy import Environment
+import bench_common  # noqa: F401  (sim_engine 경로 설정)
+import sim_engine
+import sim_analysis
+
+# 스냅샷 / 복원 / 포크 비용: 실행 중간(--at)에 스냅샷을 떠서 크기와 시간을 재고,
+# 복원본과 원본을 끝까지 돌려 배송 수가 이어지는지 비교한 뒤, 같은 스냅샷에서 포크 예측을 돌린다.
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--agvs", type=int, nargs="+", default=[3, 6, 10])
+    parser.add_argument("--at", type=float, default=1200.37)
+    parser.add_argument("--duration", type=int, default=3600)
+    parser.add_argument("--forks", type=int, default=4)
+    parser.add_argument("--horizon", type=int, default=900)
+    parser.add_argument("--planner", default="reservation")
+    parser.add_argument("--seed", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"planner={args.planner} snapshot at t={args.at} duration={args.duration}")
+    print(f"{'agvs':>5}{'bytes':>8}{'snap(ms)':>10}{'restore(ms)':>13}{'in-flight':>11}{'orig':>7}{'restored':>10}")
+    for agv_count in args.agvs:
+        random.seed(args.seed)
+        env = Environment()
+        sim = sim_engine.create_simulation(env, agv_count, args.duration, planner=args.planner)
+        env.run(until=args.at)
+        t0 = time.perf_counter()
+        blob = sim_engine.snapshot_simulation(sim)
+        snap = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        restored = sim_engine.restore_simulation(blob)
+        restore = time.perf_counter() - t0
+        in_flight = sum(1 for agv in sim.agvs if agv.activity is not None)
+        assert restored.stats.delivered_count == sim.stats.delivered_count
+        env.run(until=args.duration)
+        restored.env.run(until=args.duration)
+        print(f"{agv_count:>5}{len(blob):>8}{snap * 1e3:>10.2f}{restore * 1e3:>13.2f}{in_flight:>11}"
+              f"{sim.stats.delivered_count:>7}{restored.stats.delivered_count:>10}")
+
+    t0 = time.perf_counter()
+    res = sim_analysis.run_forks(blob, args.forks, args.horizon)
+    print(f"fork x{args.forks} ({args.agvs[-1]} agvs, {args.horizon}s ahead): {res['throughput_per_hour']:.1f}/h "
+          f"± {res['ci_half_width'] or 0:.1f}, wall {time.perf_counter() - t0:.2f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+import time
+import argparse
+import bench_common  # noqa: F401  (sim_engine 경로 설정)
+import sim_analysis
+
+# AGV 대수 스윕: 예전 simulate_opt 방식 (대수별 직렬, 전 대수) vs run_fleet_sweep (풀 + 포화점 조기 종료)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--min-agv", type=int, default=1)
+    parser.add_argument("--max-agv", type=int, default=15)
+    parser.add_argument("--duration", type=int, default=900)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--planner", default="reservation")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    counts = sim_analysis.fleet_counts(args.min_agv, args.max_agv)
+    t0 = time.perf_counter()
+    for n in counts:
+        sim_analysis.run_multiple_sim_analysis(n, args.duration, repeat_runs=args.runs, planner=args.planner, workers=1)
+    serial = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    res = sim_analysis.run_fleet_sweep(counts, args.duration, repeat_runs=args.runs, planner=args.planner,
+                                       workers=args.workers)
+    sweep = time.perf_counter() - t0
+
+    print(f"{'agvs':>5}{'thr/h':>9}{'marginal':>10}")
+    for r in res["optimization_results"]:
+        marginal = r.get("marginal_throughput")
+        print(f"{r['agv_count']:>5}{r['throughput_per_hour']:>9.1f}{'' if marginal is None else f'{marginal:.1f}':>10}")
+    print(f"knee={res['knee']} (threshold {res['knee_threshold']:.1f}/h per AGV) skipped={res['skipped_counts']}")
+    print(f"serial all counts: {serial:.2f}s  sweep: {sweep:.2f}s  ({serial / sweep:.1f}x)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+import time
+import random
+import argparse
+import statistics
+from bench_common import CountingEnvironment
+import sim_engine
+
+# 막힌 AGV 대기 방식 비교: "poll" (0.1~0.3초 재시도) vs "event" (루프가 읽는 상태가 바뀔 때까지 polling을 건너뜀)
+# AGV 수별로 이벤트 수, wall time (평균/표준편차), 피한 polling 수를 출력한다.
+# event는 poll과 같은 시각에 같은 판단을 하므로 시드마다 배송 수가 같아야 한다 (same 열)
+
+def run_once(agv_count, sim_duration, wait_mode, seed):
+    random.seed(seed)
+    env = CountingEnvironment()
+    sim = sim_engine.create_simulation(env, agv_count, sim_duration, wait_mode=wait_mode)
+    t0 = time.perf_counter()
+    env.run(until=sim_duration)
+    return env.events_processed, time.perf_counter() - t0, sim.stats
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--agvs", type=int, nargs="+", default=[5, 10, 20, 40])
+    parser.add_argument("--duration", type=int, default=600)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    print(f"duration={args.duration} runs={args.runs}")
+    print(f"{'agvs':>5} {'mode':<6}{'events':>10}{'wall(s)':>10}{'wall sd':>9}{'delivered':>11}{'polls avoided':>15}"
+          f"{'same':>6}")
+    for agv_count in args.agvs:
+        per_seed = {}
+        for mode in ("poll", "event"):
+            events, walls, delivered, avoided = [], [], [], []
+            for i in range(args.runs):
+                n, wall, stats = run_once(agv_count, args.duration, mode, args.seed + i)
+                events.append(n)
+                walls.append(wall)
+                delivered.append(stats.delivered_count)
+                avoided.append(stats.wait_counters["polls_avoided"])
+            per_seed[mode] = delivered
+            same = "" if mode == "poll" else ("yes" if delivered == per_seed["poll"] else "NO")
+            wall_sd = statistics.stdev(walls) if len(walls) > 1 else 0
+            print(f"{agv_count:>5} {mode:<6}{statistics.mean(events):>10.0f}{statistics.mean(walls):>10.2f}"
+                  f"{wall_sd:>9.2f}{statistics.mean(delivered):>11.1f}{statistics.mean(avoided):>15.0f}{same:>6}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+import time
+import argparse
+import multiprocessing
+import bench_common  # noqa: F401  (sim_engine 경로 설정)
+# 서버와 같은 조건: spawn 자식은 __main__ 모듈을 다시 import 하므로 서버 모듈(eventlet, flask ...)을 같이 불러 둔다
+import simulation_server_test_ver4  # noqa: F401
+from sim_analysis import AnalysisHost, analysis_worker
+
+# 분석 요청의 첫 결과까지 걸리는 시간 (time-to-first-result)
+# before: 요청마다 multiprocessing.Process(analysis_worker) spawn (기존 서버 방식)
+# after:  서버 시작 시 띄운 분석 호스트 (엔진 import / 거리장 / 워커 풀 준비 완료)에 작업으로 전달
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--agvs", type=int, default=3)
+    parser.add_argument("--duration", type=int, default=300)
+    parser.add_argument("--runs", type=int, default=4)
+    parser.add_argument("--requests", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+    ctx = multiprocessing.get_context("spawn")
+
+    print(f"agvs={args.agvs} duration={args.duration} runs={args.runs} requests={args.requests}")
+    before = []
+    for _ in range(args.requests):
+        q = ctx.Queue()
+        t0 = time.perf_counter()
+        p = ctx.Process(target=analysis_worker, args=(args.agvs, args.duration, args.runs, q))
+        p.start()
+        first = None
+        while True:
+            kind, payload = q.get()
+            if first is None:
+                first = time.perf_counter() - t0
+            if kind != "progress":
+                break
+        p.join()
+        before.append((first, time.perf_counter() - t0))
+
+    t0 = time.perf_counter()
+    host = AnalysisHost(args.workers).start()
+    _, kind, info = host.output.get()
+    startup = time.perf_counter() - t0
+    after = []
+    try:
+        for _ in range(args.requests):
+            t0 = time.perf_counter()
+            job_id, _ = host.submit("analysis", agv_count=args.agvs, sim_duration=args.duration, repeat_runs=args.runs)
+            host.dispatch()
+            first = None
+            while True:
+                got, kind, payload = host.output.get()
+                if got != job_id:
+                    continue
+                if first is None:
+                    first = time.perf_counter() - t0
+                if kind != "progress":
+                    host.finish(job_id)
+                    break
+            after.append((first, time.perf_counter() - t0))
+    finally:
+        host.shutdown()
+
+    print(f"host startup (once, at server start): {startup:.2f}s {info}")
+    print(f"{'':<8}{'first result(s)':>16}{'total(s)':>10}")
+    for name, rows in (("before", before), ("after", after)):
+        for first, total in rows:
+            print(f"{name:<8}{first:>16.3f}{total:>10.3f}")
+
+if __name__ == "__main__":
+    main()
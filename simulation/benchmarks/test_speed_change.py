@@ -0,0 +1,94 @@
+import time
+import random
+import argparse
+import threading
+import bench_common  # noqa: F401  (sim_engine 경로 설정)
+import sim_engine
+
+# 실행 중 배속 변경 점검 (pytest로도 돈다: python -m pytest benchmarks/test_speed_change.py)
+# AdjustableRealtimeEnvironment로 기본 플래너 시뮬레이션을 돌리면서 다른 스레드에서 배속을 N번 바꾼다.
+# - delivered_count가 줄거나 리셋되지 않는지, Stats/AGV 객체가 유지되는지
+# - sim 시계가 변경 시점에 튀지 않는지 (변경 직전/직후 virtual_now 차이)
+# - 변경 후 첫 이벤트가 새 배속 기준 예정 wall 시각보다 얼마나 늦게 처리되는지 (자는 중이어도 SPEED_SLICE마다
+#   기준점을 다시 읽으므로 몇 SPEED_SLICE 안이어야 한다), set_factor 호출 비용
+FACTORS = (0.02, 0.002, 0.05, 0.005)
+MAX_LATE_SLICES = 3
+
+def run_speed_changes(agv_count=5, changes=100, interval=0.03, seed=42):
+    random.seed(seed)
+    env = sim_engine.AdjustableRealtimeEnvironment(factor=FACTORS[0], strict=False)
+    sim = sim_engine.create_simulation(env, agv_count, 10 ** 9)
+    stats, agvs = sim.stats, list(sim.agvs)
+    samples = []
+    stop = threading.Event()
+
+    def changer():
+        for i in range(changes):
+            time.sleep(interval)
+            before_count = stats.delivered_count
+            old = env._anchor
+            t0 = time.monotonic()
+            env.set_factor(FACTORS[i % len(FACTORS)])
+            call = time.monotonic() - t0
+            # 새 기준점의 sim 시각 vs 같은 wall 시각에 옛 기준점이 가리키던 sim 시각
+            new = env._anchor
+            jump = new[0] - max(env.now, old[0] + (new[1] - old[1]) / old[2])
+            samples.append((before_count, call, jump, t0))
+        stop.set()
+
+    thread = threading.Thread(target=changer)
+    thread.start()
+    # 이벤트마다 (처리 wall 시각, 그때 기준점으로 본 예정 wall 시각)
+    events = []
+    while not stop.is_set():
+        at = env.peek()
+        env.step()
+        done = time.monotonic()
+        env_start, real_start, factor = env._anchor
+        events.append((done, real_start + (at - env_start) * factor))
+    thread.join()
+
+    late = []
+    for _, _, _, t0 in samples:
+        after = next(((done, due) for done, due in events if done >= t0), None)
+        if after is not None:
+            late.append(after[0] - max(after[1], t0))
+    return {"sim": sim, "stats": stats, "agvs": agvs, "samples": samples, "late": sorted(late),
+            "calls": sorted(call for _, call, _, _ in samples), "sim_time": env.now}
+
+def check(result):
+    stats, samples = result["stats"], result["samples"]
+    counts = [count for count, _, _, _ in samples] + [stats.delivered_count]
+    assert all(a <= b for a, b in zip(counts, counts[1:])), "delivered_count went backwards"
+    assert stats.delivered_count > 0, "nothing delivered while changing speed"
+    sim = result["sim"]
+    assert sim.stats is stats and all(a is b for a, b in zip(sim.agvs, result["agvs"])), \
+        "simulation objects were rebuilt"
+    assert max(abs(jump) for _, _, jump, _ in samples) < 1e-3, "sim clock jumped on speed change"
+    assert result["late"] and result["late"][-1] < MAX_LATE_SLICES * sim_engine.SPEED_SLICE, \
+        f"first event after a speed change was {result['late'][-1] * 1e3:.1f} ms late"
+
+def test_speed_change():
+    result = run_speed_changes()
+    assert len(result["samples"]) == 100
+    check(result)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--agvs", type=int, default=5)
+    parser.add_argument("--changes", type=int, default=100)
+    parser.add_argument("--interval", type=float, default=0.03)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    result = run_speed_changes(args.agvs, args.changes, args.interval, args.seed)
+    check(result)
+    calls, late = result["calls"], result["late"]
+    print(f"changes={len(result['samples'])} sim_time={result['sim_time']:.1f}s "
+          f"delivered={result['stats'].delivered_count} (monotonic, same Stats/AGV objects)")
+    print(f"set_factor call: mean {1e6 * sum(calls) / len(calls):.1f} us, max {1e6 * calls[-1]:.1f} us")
+    print(f"first event after change, late vs new schedule: p50 {1e3 * late[len(late) // 2]:.1f} ms, "
+          f"max {1e3 * late[-1]:.1f} ms (sleep slice {1e3 * sim_engine.SPEED_SLICE:.0f} ms)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,803 @@
+import os
+import json
+import shutil
+import tempfile
+import math
+import time
+import heapq
+import queue
+import signal
+import hashlib
+import itertools
+import statistics
+import traceback
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor, as_completed, wait
+from concurrent.futures.process import BrokenProcessPool
+from collections import defaultdict
+from multiprocessing import get_context
+from sim_engine import (
+    REPEAT_RUNS, WARMUP_PERIOD, PLANNER, RunningMoments, run_one_sim_analysis, restore_simulation,
+    get_distance_fields,
+)
+
+################################
+# 상수 정의
+################################
+ANALYSIS_SEED = 20250101      # 반복실험 i번째 시드 = ANALYSIS_SEED + i (같은 요청은 같은 결과)
+ANALYSIS_WORKERS = None       # None이면 CPU 코어 수
+CI_CONFIDENCE = 0.95          # 신뢰구간 신뢰수준
+CI_TARGET = 0.05              # 적응형 분석 기본 목표: 상대 반폭 (반폭 / 평균) 5%
+CI_MIN_RUNS = 3               # 분산 추정이 가능한 최소 반복 수
+CI_MAX_RUNS = REPEAT_RUNS * 4 # 목표를 못 맞춰도 여기서 멈춘다
+CI_METRICS = ("throughput_per_hour", "avg_cycle")
+MSER_BATCH = 5                # MSER-5: 5초 단위 배치로 워밍업 절단점 탐색
+BATCH_COUNT = 20              # 배치 평균법 초기 배치 수
+BATCH_MIN_COUNT = 10          # 자기상관이 커서 배치를 합쳐도 이 수 밑으로는 내리지 않는다
+BATCH_MAX_LAG1 = 0.2          # 배치 평균 lag-1 자기상관 허용치
+ANALYSIS_METHODS = ("replication", "batch_means")
+KNEE_FRACTION = 0.1           # 스윕: AGV 1대 추가 시 처리량 증가가 (첫 대수의 대당 처리량 * 0.1) 미만이면 포화
+KNEE_PATIENCE = 1             # 포화 판정이 연속 몇 번 나와야 그 뒤 대수를 취소할지
+BATCH_RUN_FACTOR = 4          # 배치 평균 분석의 단일 실행 길이 = sim_duration * 4 (반복 15회 대비 약 1/4 비용)
+
+################################
+# 점진 집계
+################################
+class RunningStats(RunningMoments):
+    # Welford 방식 평균/분산 (sim_engine.RunningMoments) + 평균의 신뢰구간
+    __slots__ = ()
+
+    def half_width(self, confidence=CI_CONFIDENCE):
+        # 평균의 t-신뢰구간 반폭
+        if self.n < 2:
+            return math.inf
+        return t_quantile(0.5 + confidence / 2, self.n - 1) * self.stdev / math.sqrt(self.n)
+
+    def relative_half_width(self, confidence=CI_CONFIDENCE):
+        if self.n < 2:
+            return math.inf
+        if self.mean == 0:
+            return 0.0 if self.stdev == 0 else math.inf
+        return self.half_width(confidence) / abs(self.mean)
+
+def t_quantile(p, df):
+    # 스튜던트 t 분포 분위수 (scipy 없이). df 1, 2는 닫힌 형태, 그 이상은 Cornish-Fisher 전개
+    if df == 1:
+        return math.tan(math.pi * (p - 0.5))
+    if df == 2:
+        return (2 * p - 1) / math.sqrt(2 * p * (1 - p))
+    z = statistics.NormalDist().inv_cdf(p)
+    z3, z5, z7, z9 = z ** 3, z ** 5, z ** 7, z ** 9
+    return (z + (z3 + z) / (4 * df) + (5 * z5 + 16 * z3 + 3 * z) / (96 * df ** 2)
+            + (3 * z7 + 19 * z5 + 17 * z3 - 15 * z) / (384 * df ** 3)
+            + (79 * z9 + 776 * z7 + 1482 * z5 - 1920 * z3 - 945 * z) / (92160 * df ** 4))
+
+class ReplicationAggregate:
+    # 반복실험 결과(compute_simulation_result)를 도착하는 대로 누적해서 deep 분석 결과를 만든다
+    METRICS = ("throughput_per_hour", "delivered_per_agv", "avg_cycle", "avg_wait", "avg_travel")
+
+    def __init__(self, agv_count, planner=PLANNER):
+        self.agv_count = agv_count
+        self.planner = planner
+        self.stats = {name: RunningStats() for name in self.METRICS}
+        self.utilization = RunningStats()
+        self.polls_avoided = 0
+        self.wall_time = 0.0
+
+    @property
+    def runs(self):
+        return self.stats["throughput_per_hour"].n
+
+    def add(self, result):
+        for name in self.METRICS:
+            self.stats[name].add(result[name])
+        if result.get("agv_stats"):
+            self.utilization.add(statistics.mean(data.get("utilization", 0) for data in result["agv_stats"].values()))
+        self.polls_avoided += result.get("wait_counters", {}).get("polls_avoided", 0)
+        self.wall_time += result.get("wall_time", 0.0)
+
+    def confidence_intervals(self, metrics=CI_METRICS, confidence=CI_CONFIDENCE):
+        # 아직 추정 불가(반복 1회)인 반폭은 JSON으로 보낼 수 있게 None
+        finite = lambda x: x if math.isfinite(x) else None  # noqa: E731
+        return {name: {"mean": self.stats[name].mean, "half_width": finite(self.stats[name].half_width(confidence)),
+                       "relative": finite(self.stats[name].relative_half_width(confidence))} for name in metrics}
+
+    def summary(self):
+        return {"repeat_runs": self.runs, "agv_count": self.agv_count,
+                "throughput_per_hour": self.stats["throughput_per_hour"].mean,
+                "std_throughput_per_hour": self.stats["throughput_per_hour"].stdev,
+                "delivered_per_agv": self.stats["delivered_per_agv"].mean,
+                "std_delivered_per_agv": self.stats["delivered_per_agv"].stdev,
+                "avg_cycle": self.stats["avg_cycle"].mean, "avg_wait": self.stats["avg_wait"].mean,
+                "avg_travel": self.stats["avg_travel"].mean, "avg_utilization": self.utilization.mean,
+                "polls_avoided": self.polls_avoided, "planner": self.planner, "analysis_type": "deep"}
+
+def replication_summary(index, seed, result):
+    # 진행 상황으로 클라이언트에 보낼 반복실험 1회 요약 (delivered_record 등 큰 필드 제외)
+    return {"run": index, "seed": seed, "delivered_count": result["delivered_count"],
+            "throughput_per_hour": result["throughput_per_hour"], "delivered_per_agv": result["delivered_per_agv"],
+            "avg_cycle": result["avg_cycle"], "avg_wait": result["avg_wait"], "avg_travel": result["avg_travel"]}
+
+################################
+# 병렬 반복실험
+################################
+def default_workers(repeat_runs):
+    workers = ANALYSIS_WORKERS or os.cpu_count() or 1
+    return max(1, min(workers, repeat_runs))
+
+_pool = None    # start_analysis_pool()로 미리 띄운 풀 (분석 호스트 프로세스 안에서만 사용). 있으면 직렬 실행도 풀에서 한다
+
+@contextmanager
+def worker_pool(workers):
+    # 미리 띄워 둔 풀이 있으면 그것을 쓰고 (닫지 않음), 없으면 이번 분석용 풀을 만들었다가 닫는다
+    if _pool is not None:
+        yield _pool
+        return
+    with ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn")) as pool:
+        yield pool
+
+@contextmanager
+def stop_token():
+    # 풀 워커에 넘기는 중단 표시 (아직 없는 파일 경로). 파일을 만들면 (request_stop)
+    # 그 경로를 받은 반복실험이 STOP_CHECK_INTERVAL sim초 안에 멈추고 None을 돌려준다
+    directory = tempfile.mkdtemp(prefix="sim_stop_")
+    try:
+        yield os.path.join(directory, "stop")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+def request_stop(token):
+    open(token, "w").close()
+
+def run_replication(agv_count, sim_duration, seed, planner=PLANNER, stop=None):
+    # 프로세스 풀 워커에서 실행 (모듈 최상위 함수여야 spawn 방식에서 pickle 가능)
+    t0 = time.perf_counter()
+    should_stop = (lambda: os.path.exists(stop)) if stop is not None else None
+    result = run_one_sim_analysis(agv_count, sim_duration, planner=planner, seed=seed, should_stop=should_stop)
+    if result is not None:
+        result["wall_time"] = time.perf_counter() - t0
+    return result
+
+def run_multiple_sim_analysis(agv_count, sim_duration, repeat_runs=REPEAT_RUNS, planner=PLANNER,
+                              workers=None, base_seed=ANALYSIS_SEED, on_result=None):
+    # 반복실험을 코어 수만큼의 프로세스 풀에 나눠 돌리고, 끝나는 순서대로 집계한다.
+    # on_result(run_index, seed, result, aggregate) 콜백으로 중간 결과를 받을 수 있다.
+    workers = workers or default_workers(repeat_runs)
+    aggregate = ReplicationAggregate(agv_count, planner)
+    seeds = [base_seed + i for i in range(repeat_runs)]
+    if workers == 1 and _pool is None:
+        for i, seed in enumerate(seeds):
+            result = run_replication(agv_count, sim_duration, seed, planner)
+            aggregate.add(result)
+            if on_result:
+                on_result(i, seed, result, aggregate)
+        return aggregate.summary()
+    with worker_pool(workers) as pool:
+        futures = {pool.submit(run_replication, agv_count, sim_duration, seed, planner): i
+                   for i, seed in enumerate(seeds)}
+        for future in as_completed(futures):
+            i = futures[future]
+            result = future.result()
+            aggregate.add(result)
+            if on_result:
+                on_result(i, seeds[i], result, aggregate)
+    return aggregate.summary()
+
+################################
+# 신뢰구간 기반 적응형 반복실험
+################################
+def ci_converged(aggregate, target, metrics, confidence, min_runs):
+    if aggregate.runs < min_runs:
+        return False
+    return all(aggregate.stats[name].relative_half_width(confidence) <= target for name in metrics)
+
+def run_adaptive_sim_analysis(agv_count, sim_duration, target=CI_TARGET, metrics=("throughput_per_hour",),
+                              confidence=CI_CONFIDENCE, min_runs=CI_MIN_RUNS, max_runs=CI_MAX_RUNS,
+                              baseline_runs=REPEAT_RUNS, planner=PLANNER, workers=None,
+                              base_seed=ANALYSIS_SEED, on_result=None):
+    # 모든 metrics의 상대 반폭이 target 이하가 될 때까지 (또는 max_runs까지) 반복실험을 추가한다.
+    # 결과는 시드 순서대로만 집계하므로 워커 수나 완료 순서와 관계없이 같은 실행 수에서 멈춘다.
+    for name in metrics:
+        if name not in ReplicationAggregate.METRICS:
+            raise ValueError(f"metric must be one of {ReplicationAggregate.METRICS}")
+    min_runs = max(2, min_runs)
+    max_runs = max(min_runs, max_runs)
+    workers = workers or default_workers(max_runs)
+    aggregate = ReplicationAggregate(agv_count, planner)
+    t0 = time.perf_counter()
+
+    def accept(i, result):
+        aggregate.add(result)
+        if on_result:
+            on_result(i, base_seed + i, result, aggregate)
+        return ci_converged(aggregate, target, metrics, confidence, min_runs)
+
+    converged = False
+    if workers == 1 and _pool is None:
+        for i in range(max_runs):
+            if accept(i, run_replication(agv_count, sim_duration, base_seed + i, planner)):
+                converged = True
+                break
+    else:
+        with worker_pool(workers) as pool, stop_token() as stop:
+            futures = {}
+            pending = {}
+            next_submit = 0
+            next_accept = 0
+            # 항상 워커 수만큼 실행 중으로 유지. 목표 도달 시 아직 시작 안 한 작업은 취소하고,
+            # 이미 도는 작업은 중단 표시로 멈춘 뒤 끝날 때까지 기다린다 (미리 띄운 풀을 다음 작업에 바로 넘긴다)
+            while next_submit < min(workers, max_runs):
+                futures[pool.submit(run_replication, agv_count, sim_duration, base_seed + next_submit, planner,
+                                    stop)] = next_submit
+                next_submit += 1
+            while futures and not converged:
+                future = next(as_completed(futures))
+                pending[futures.pop(future)] = future.result()
+                while next_accept in pending and not converged:
+                    converged = accept(next_accept, pending.pop(next_accept))
+                    next_accept += 1
+                if converged or next_accept >= max_runs:
+                    break
+                while next_submit < max_runs and len(futures) < workers:
+                    futures[pool.submit(run_replication, agv_count, sim_duration, base_seed + next_submit, planner,
+                                        stop)] = next_submit
+                    next_submit += 1
+            running = [future for future in futures if not future.cancel()]
+            if running:
+                request_stop(stop)
+                wait(running)
+
+    res = aggregate.summary()
+    per_run = aggregate.wall_time / aggregate.runs if aggregate.runs else 0.0
+    res.update({"analysis_type": "adaptive", "converged": converged, "target_rel_ci": target,
+                "confidence": confidence, "ci_metrics": list(metrics), "max_runs": max_runs,
+                "ci": aggregate.confidence_intervals(metrics, confidence), "baseline_runs": baseline_runs,
+                "runs_saved": baseline_runs - aggregate.runs,
+                "cpu_time": aggregate.wall_time, "wall_time": time.perf_counter() - t0,
+                # 고정 baseline_runs회 대비 절약한 CPU 시간 (더 돌았으면 음수)
+                "time_saved": (baseline_runs - aggregate.runs) * per_run})
+    return res
+
+################################
+# 워밍업 자동 절단 (MSER-5) + 단일 실행 배치 평균법
+################################
+def delivery_series(delivered_record, sim_duration):
+    # delivered_record(초 -> 누적 배송 수)를 초당 배송 수 시계열로 바꾼다 -> (첫 초, 시계열).
+    # 보관 한도(SERIES_CAPACITY)보다 긴 실행이면 남아 있는 최근 구간만 쓴다
+    first = min(delivered_record) if delivered_record else 0
+    prev = 0
+    if first > 0:
+        prev = delivered_record[first]
+        first += 1
+    series = []
+    for t in range(first, int(sim_duration)):
+        count = delivered_record.get(t, prev)
+        series.append(count - prev)
+        prev = count
+    return first, series
+
+def mser_truncation(series, batch=MSER_BATCH):
+    # MSER: 앞에서 d개를 버렸을 때 남은 평균의 표준오차 추정치 (var / (n-d))가 최소인 d.
+    # 절단은 전체의 절반까지만 본다. 반환값은 원래 시계열 기준 인덱스 (초)
+    means = [sum(series[i:i + batch]) / batch for i in range(0, len(series) - batch + 1, batch)]
+    n = len(means)
+    if n < 4:
+        return 0
+    suffix_sum = [0.0] * (n + 1)
+    suffix_sq = [0.0] * (n + 1)
+    for i in range(n - 1, -1, -1):
+        suffix_sum[i] = suffix_sum[i + 1] + means[i]
+        suffix_sq[i] = suffix_sq[i + 1] + means[i] ** 2
+    best_d, best = 0, math.inf
+    for d in range(n // 2 + 1):
+        m = n - d
+        mean = suffix_sum[d] / m
+        stat = (suffix_sq[d] / m - mean ** 2) / m
+        if stat < best - 1e-12:
+            best_d, best = d, stat
+    return best_d * batch
+
+def batch_means(values, batches=BATCH_COUNT, confidence=CI_CONFIDENCE):
+    # 시계열을 batches개 배치로 나누고 배치 평균들로 t-신뢰구간을 만든다.
+    # lag-1 자기상관이 크면 인접 배치를 합친다 (배치 수 절반).
+    size = len(values) // batches if batches else 0
+    if size == 0:
+        return None
+    means = [sum(values[i * size:(i + 1) * size]) / size for i in range(batches)]
+    lag1 = lag1_autocorrelation(means)
+    while lag1 > BATCH_MAX_LAG1 and len(means) // 2 >= BATCH_MIN_COUNT:
+        means = [(means[i] + means[i + 1]) / 2 for i in range(0, len(means) - 1, 2)]
+        lag1 = lag1_autocorrelation(means)
+    stats = RunningStats()
+    for m in means:
+        stats.add(m)
+    return {"mean": stats.mean, "half_width": stats.half_width(confidence),
+            "relative": stats.relative_half_width(confidence), "batches": len(means),
+            "batch_size": len(values) // len(means), "lag1": lag1}
+
+def lag1_autocorrelation(values):
+    n = len(values)
+    if n < 3:
+        return 0.0
+    mean = sum(values) / n
+    var = sum((v - mean) ** 2 for v in values)
+    if var == 0:
+        return 0.0
+    return sum((values[i] - mean) * (values[i + 1] - mean) for i in range(n - 1)) / var
+
+def run_batch_means_analysis(agv_count, run_length, planner=PLANNER, seed=ANALYSIS_SEED, batches=BATCH_COUNT,
+                             confidence=CI_CONFIDENCE):
+    # 긴 실행 1회로 정상상태 throughput(/h)과 사이클 시간의 신뢰구간을 추정한다.
+    # 워밍업은 MSER-5로 정하고, 절단 이후의 초당 배송 수 / 배송 완료 시각 기준 사이클 시간으로 배치를 만든다.
+    if _pool is not None:
+        # 분석 호스트에서는 풀 워커에서 돌려야 취소 시 계산을 죽일 수 있다
+        result = _pool.submit(run_replication, agv_count, run_length, seed, planner).result()
+    else:
+        result = run_replication(agv_count, run_length, seed, planner)
+    first, series = delivery_series(result["delivered_record"], run_length)
+    cut = mser_truncation(series)
+    warmup = first + cut
+    steady = series[cut:]
+    throughput = batch_means([x * 3600 for x in steady], batches, confidence)
+
+    # 사이클 시간은 완료 시각으로 같은 경계의 배치에 나누고 배치별 평균을 낸다 (빈 배치는 제외)
+    cycle = None
+    if throughput:
+        size = (len(steady) // throughput["batches"]) or 1
+        buckets = defaultdict(list)
+        for t, duration in result["delivery_log"]:
+            if duration is not None and t >= warmup:
+                b = int((t - warmup) // size)
+                if b < throughput["batches"]:
+                    buckets[b].append(duration)
+        cycle_stats = RunningStats()
+        for b in sorted(buckets):
+            cycle_stats.add(statistics.mean(buckets[b]))
+        if cycle_stats.n > 1:
+            cycle = {"mean": cycle_stats.mean, "half_width": cycle_stats.half_width(confidence),
+                     "relative": cycle_stats.relative_half_width(confidence), "batches": cycle_stats.n}
+
+    res = {"repeat_runs": 1, "agv_count": agv_count, "run_length": run_length, "seed": seed,
+           "warmup": warmup, "configured_warmup": WARMUP_PERIOD,
+           "throughput_per_hour": throughput["mean"] if throughput else result["throughput_per_hour"],
+           "delivered_per_agv": result["delivered_per_agv"],
+           "avg_cycle": cycle["mean"] if cycle else result["avg_cycle"],
+           "avg_wait": result["avg_wait"], "avg_travel": result["avg_travel"],
+           "avg_utilization": statistics.mean(d["utilization"] for d in result["agv_stats"].values()) if result["agv_stats"] else 0,
+           "ci": {"throughput_per_hour": throughput, "avg_cycle": cycle},
+           "cpu_time": result["wall_time"], "planner": planner, "analysis_type": "batch_means"}
+    return res
+
+################################
+# AGV 대수 스윕 (포화점 탐색)
+################################
+class SweepState:
+    # 대수별 집계와 포화점(knee) 판정. 결과는 대수 순서대로 연속된 구간에서만 판정한다.
+    def __init__(self, counts, repeat_runs, planner=PLANNER, knee_threshold=None, patience=KNEE_PATIENCE):
+        self.counts = list(counts)
+        self.repeat_runs = repeat_runs
+        self.knee_threshold = knee_threshold
+        self.patience = patience
+        self.aggregates = {n: ReplicationAggregate(n, planner) for n in self.counts}
+        self.completed = {}
+        self.checked = 0          # counts[:checked]까지 포화 판정 끝
+        self.below = 0
+        self.knee = None
+        self.stop_after = None    # 이 대수보다 큰 대수는 더 돌리지 않는다
+
+    def add(self, agv_count, result):
+        # 해당 대수의 반복이 모두 끝나면 요약을 돌려준다
+        aggregate = self.aggregates[agv_count]
+        aggregate.add(result)
+        if aggregate.runs < self.repeat_runs:
+            return None
+        self.completed[agv_count] = aggregate.summary()
+        self.update_knee()
+        return self.completed[agv_count]
+
+    def update_knee(self):
+        while self.checked < len(self.counts) and self.counts[self.checked] in self.completed:
+            i = self.checked
+            self.checked += 1
+            if i == 0 or self.stop_after is not None:
+                continue
+            prev, cur = self.counts[i - 1], self.counts[i]
+            if self.knee_threshold is None:
+                first = self.completed[self.counts[0]]
+                self.knee_threshold = KNEE_FRACTION * first["throughput_per_hour"] / self.counts[0]
+            marginal = (self.completed[cur]["throughput_per_hour"] - self.completed[prev]["throughput_per_hour"]) / (cur - prev)
+            self.completed[cur]["marginal_throughput"] = marginal
+            if marginal < self.knee_threshold:
+                self.below += 1
+                if self.knee is None:
+                    self.knee = prev
+                if self.below >= self.patience:
+                    self.stop_after = cur
+            else:
+                self.below = 0
+                self.knee = None
+
+    def skipped(self):
+        if self.stop_after is None:
+            return []
+        return [n for n in self.counts if n > self.stop_after and n not in self.completed]
+
+    def summary(self):
+        return {"optimization_results": [self.completed[n] for n in self.counts if n in self.completed],
+                "knee": self.knee, "knee_threshold": self.knee_threshold, "skipped_counts": self.skipped(),
+                "repeat_runs": self.repeat_runs, "analysis_type": "sweep"}
+
+def fleet_counts(min_agv, max_agv, step=1):
+    if min_agv <= 0 or max_agv < min_agv or step <= 0:
+        raise ValueError("need 0 < min_agv <= max_agv and step > 0")
+    return list(range(min_agv, max_agv + 1, step))
+
+def run_fleet_sweep(counts, sim_duration, repeat_runs=REPEAT_RUNS, planner=PLANNER, workers=None,
+                    base_seed=ANALYSIS_SEED, knee_threshold=None, patience=KNEE_PATIENCE, on_count=None,
+                    on_result=None):
+    # 모든 (대수, 반복) 쌍을 한 풀에 넣고 끝나는 대로 집계한다. 대수 오름차순으로 넣기 때문에
+    # 작은 대수가 먼저 끝나서 포화점이 일찍 판정되고, 포화점 뒤 대수의 대기 작업은 취소된다.
+    # 반복 i는 대수와 관계없이 같은 시드(base_seed + i)를 써서 대수 간 차이의 분산을 줄인다.
+    # on_count(summary, state)는 대수별 반복이 모두 끝날 때마다, on_result(n, i, result, state)는 반복 1회마다 불린다.
+    state = SweepState(counts, repeat_runs, planner, knee_threshold, patience)
+    pairs = [(n, i) for n in state.counts for i in range(repeat_runs)]
+    workers = workers or default_workers(len(pairs))
+
+    def accept(n, i, result):
+        summary = state.add(n, result)
+        if on_result:
+            on_result(n, i, result, state)
+        if summary is not None and on_count:
+            on_count(summary, state)
+
+    if workers == 1 and _pool is None:
+        for n, i in pairs:
+            if state.stop_after is not None and n > state.stop_after:
+                break
+            accept(n, i, run_replication(n, sim_duration, base_seed + i, planner))
+        return state.summary()
+    with worker_pool(workers) as pool:
+        futures = {pool.submit(run_replication, n, sim_duration, base_seed + i, planner): (n, i) for n, i in pairs}
+        for future in as_completed(futures):
+            n, i = futures[future]
+            if state.stop_after is not None and n > state.stop_after:
+                continue
+            accept(n, i, future.result())
+            if state.stop_after is not None:
+                for other, (count, _) in futures.items():
+                    if count > state.stop_after:
+                        other.cancel()
+    return state.summary()
+
+def sweep_worker(counts, sim_duration, repeat_runs, output_queue, planner=PLANNER, knee_threshold=None):
+    # 서버용 스윕 작업. ("progress", 반복 1회) / ("count", 대수 요약) -> ("final", 전체 요약) | ("error", traceback)
+    def on_count(summary, state):
+        output_queue.put(("count", dict(summary, knee=state.knee, completed_counts=len(state.completed),
+                                        total_counts=len(state.counts))))
+
+    def on_result(n, i, result, state):
+        output_queue.put(("progress", dict(replication_summary(i, ANALYSIS_SEED + i, result), agv_count=n,
+                                           completed=state.aggregates[n].runs, repeat_runs=repeat_runs)))
+    try:
+        res = run_fleet_sweep(counts, sim_duration, repeat_runs=repeat_runs, planner=planner,
+                              knee_threshold=knee_threshold, on_count=on_count, on_result=on_result)
+        output_queue.put(("final", res))
+    except Exception:
+        output_queue.put(("error", traceback.format_exc()))
+
+################################
+# 스냅샷 포크 (what-if 예측)
+################################
+FORK_COUNT = 8
+FORK_HORIZON = 1800
+
+def run_fork(blob, horizon, seed):
+    # 스냅샷에서 이어서 horizon초 더 돌리고, 그 구간 동안의 처리량을 돌려준다
+    t0 = time.perf_counter()
+    sim = restore_simulation(blob, seed=seed, horizon=horizon)
+    start, delivered = sim.env.now, sim.stats.delivered_count
+    sim.env.run(until=sim.sim_duration)
+    window = sim.stats.delivered_count - delivered
+    return {"seed": seed, "start": start, "end": sim.env.now, "delivered": window,
+            "throughput_per_hour": window / horizon * 3600, "delivered_count": sim.stats.delivered_count,
+            "wall_time": time.perf_counter() - t0}
+
+def run_forks(blob, forks=FORK_COUNT, horizon=FORK_HORIZON, workers=None, base_seed=ANALYSIS_SEED, on_result=None):
+    # 같은 스냅샷에서 시드만 다른 forks개의 미래를 프로세스 풀에서 돌려 예측 구간 처리량의 평균/신뢰구간을 낸다
+    workers = workers or default_workers(forks)
+    stats = RunningStats()
+    results = []
+
+    def accept(i, result):
+        result["fork"] = i
+        results.append(result)
+        stats.add(result["throughput_per_hour"])
+        if on_result:
+            on_result(i, result, stats)
+
+    seeds = [base_seed + i for i in range(forks)]
+    if workers == 1 and _pool is None:
+        for i, seed in enumerate(seeds):
+            accept(i, run_fork(blob, horizon, seed))
+    else:
+        with worker_pool(workers) as pool:
+            futures = {pool.submit(run_fork, blob, horizon, seed): i for i, seed in enumerate(seeds)}
+            for future in as_completed(futures):
+                accept(futures[future], future.result())
+    half = stats.half_width()
+    return {"forks": forks, "horizon": horizon, "start": results[0]["start"] if results else None,
+            "throughput_per_hour": stats.mean, "std_throughput_per_hour": stats.stdev,
+            "ci_half_width": half if math.isfinite(half) else None,
+            "results": sorted(results, key=lambda r: r["fork"]), "analysis_type": "fork"}
+
+def fork_worker(blob, forks, horizon, output_queue):
+    # 서버용 포크 작업. ("progress", 포크 1개 결과) ... ("final", 요약) | ("error", traceback)
+    def on_result(i, result, stats):
+        output_queue.put(("progress", {"fork": result, "completed": stats.n, "forks": forks,
+                                       "throughput_per_hour": stats.mean}))
+    try:
+        output_queue.put(("final", run_forks(blob, forks, horizon, on_result=on_result)))
+    except Exception:
+        output_queue.put(("error", traceback.format_exc()))
+
+def analysis_worker(agv_count, sim_duration, repeat_runs, output_queue, planner=PLANNER, adaptive=None,
+                    method="replication"):
+    # 서버가 별도 프로세스로 띄우는 분석 작업. ("progress" | "final" | "error", payload)를 큐로 보낸다.
+    # adaptive가 주어지면 ({"target": .., "metrics": .., "max_runs": ..}) 신뢰구간 기반 적응형으로 돈다.
+    # method="batch_means"면 sim_duration * BATCH_RUN_FACTOR 길이의 단일 실행으로 추정한다.
+    def on_result(i, seed, result, aggregate):
+        progress = {"replication": replication_summary(i, seed, result), "completed": aggregate.runs,
+                    "repeat_runs": adaptive.get("max_runs", CI_MAX_RUNS) if adaptive else repeat_runs,
+                    "partial": aggregate.summary()}
+        if adaptive:
+            progress["ci"] = aggregate.confidence_intervals(adaptive.get("metrics", ("throughput_per_hour",)))
+        output_queue.put(("progress", progress))
+    try:
+        if method == "batch_means":
+            res = run_batch_means_analysis(agv_count, sim_duration * BATCH_RUN_FACTOR, planner=planner)
+        elif adaptive:
+            res = run_adaptive_sim_analysis(agv_count, sim_duration, planner=planner, baseline_runs=repeat_runs,
+                                            on_result=on_result, **adaptive)
+        else:
+            res = run_multiple_sim_analysis(agv_count, sim_duration, repeat_runs=repeat_runs, planner=planner,
+                                            on_result=on_result)
+        output_queue.put(("final", res))
+    except Exception:
+        output_queue.put(("error", traceback.format_exc()))
+
+################################
+# 미리 띄워 두는 분석 호스트 / 작업 대기열
+################################
+# 요청마다 프로세스를 spawn 하면 서버 모듈(eventlet, flask, simpy ...)을 매번 다시 import 하고
+# 풀 워커도 새로 띄운다. 호스트 프로세스 하나를 서버 시작 시 띄워서 엔진 import / 거리장 계산 /
+# 워커 풀 기동을 미리 끝내 두고, 분석 요청은 작업으로 넘긴다.
+# 작업은 서버 쪽 AnalysisHost 대기열에서 우선순위 순으로 하나씩 호스트에 들어간다. 같은 요청은 하나로 합치고,
+# 실행 중인 작업을 취소하면 풀 워커 프로세스를 죽여서 계산을 실제로 멈춘 뒤 풀을 다시 띄운다.
+ANALYSIS_JOBS = {"analysis": analysis_worker, "sweep": sweep_worker, "fork": fork_worker}
+CANCEL_WAIT = 1.0     # 풀이 깨졌을 때 취소 메시지를 기다리는 시간 (초)
+
+def warm_worker():
+    # 풀 워커 초기화: 엔진 import (이 모듈을 불러오면서 끝남)와 목표 셀 거리장 계산
+    get_distance_fields()
+    return os.getpid()
+
+def start_analysis_pool(workers):
+    # 풀을 (다시) 띄우고 워커 pid 목록을 돌려준다
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+    _pool = ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn"), initializer=warm_worker)
+    # 워커는 submit 할 때 필요한 만큼만 뜨므로 워커 수만큼 넣어서 전부 띄워 둔다
+    return sorted({f.result() for f in [_pool.submit(warm_worker) for _ in range(workers)]})
+
+def pool_alive():
+    try:
+        _pool.submit(os.getpid).result()
+        return True
+    except BrokenProcessPool:
+        return False
+
+def job_key(kind, kwargs):
+    # 같은 요청인지 판단하는 키 (인자 순서/튜플-리스트 차이와 무관)
+    text = json.dumps([kind, kwargs], sort_keys=True, default=lambda o: o.hex() if isinstance(o, bytes) else repr(o))
+    return hashlib.sha1(text.encode()).hexdigest()
+
+class TaggedQueue:
+    # 기존 *_worker 함수가 보내는 (종류, payload)에 작업 id를 붙여 호스트 출력 큐로 보낸다.
+    # "error"는 바로 보내지 않고 들고 있다가 (취소로 풀이 깨진 것일 수 있음) 호스트가 판단한 뒤 보낸다.
+    def __init__(self, job_id, output_queue):
+        self.job_id = job_id
+        self.output_queue = output_queue
+        self.error = None
+
+    def put(self, item):
+        if item[0] == "error":
+            self.error = item[1]
+            return
+        self.output_queue.put((self.job_id,) + tuple(item))
+
+    def flush(self):
+        if self.error is not None:
+            self.output_queue.put((self.job_id, "error", self.error))
+
+def wait_cancel(control_queue, job_id):
+    deadline = time.perf_counter() + CANCEL_WAIT
+    while True:
+        try:
+            msg = control_queue.get(timeout=max(0.0, deadline - time.perf_counter()))
+        except queue.Empty:
+            return False
+        if msg == ("cancel", job_id):
+            return True
+
+def analysis_host(job_queue, output_queue, control_queue, workers=None):
+    # 분석 호스트 프로세스. job_queue에서 (job_id, 종류, kwargs)를 받아 차례로 실행하고
+    # output_queue로 (job_id, 종류, payload)를 보낸다. 계산은 항상 풀 워커에서 한다.
+    # 기동/풀 재시작 시 (None, "ready" | "pool", 정보). 취소된 작업은 (job_id, "cancelled", None). None을 받으면 종료.
+    t0 = time.perf_counter()
+    warm_worker()
+    workers = workers or ANALYSIS_WORKERS or os.cpu_count() or 1
+    pids = start_analysis_pool(workers)
+    output_queue.put((None, "ready", {"workers": workers, "pids": pids, "warmup_seconds": time.perf_counter() - t0}))
+    try:
+        while True:
+            job = job_queue.get()
+            if job is None:
+                break
+            job_id, kind, kwargs = job
+            if not pool_alive():
+                # 직전 작업이 끝난 직후에 취소되어 풀이 깨진 경우
+                output_queue.put((None, "pool", {"pids": start_analysis_pool(workers)}))
+            out = TaggedQueue(job_id, output_queue)
+            ANALYSIS_JOBS[kind](output_queue=out, **kwargs)
+            if not pool_alive():
+                cancelled = wait_cancel(control_queue, job_id)
+                output_queue.put((None, "pool", {"pids": start_analysis_pool(workers)}))
+                if cancelled:
+                    output_queue.put((job_id, "cancelled", None))
+                    continue
+            out.flush()
+    finally:
+        _pool.shutdown(cancel_futures=True)
+
+class AnalysisHost:
+    # 서버 쪽 핸들: 호스트 프로세스와 작업 대기열.
+    # 작업 = {"id", "kind", "kwargs", "priority"(클수록 먼저), "state": "queued" | "running", "subscribers"}
+    # 출력은 서버가 self.output을 읽어서 (None 작업 메시지는 note()에 넘기고) 작업별로 전달한다.
+    def __init__(self, workers=None):
+        self.workers = workers
+        self.ctx = get_context("spawn")
+        self.job_queue = self.ctx.Queue()
+        self.output = self.ctx.Queue()
+        self.control = self.ctx.Queue()
+        self.process = None
+        self.pool_pids = []
+        self.info = None
+        self.jobs = {}
+        self.by_key = {}
+        self.queue = []           # (-priority, 순번, job_id) 힙. 우선순위가 바뀐 항목은 꺼낼 때 건너뛴다
+        self.running = None
+        self._ids = itertools.count(1)
+        self.counters = {"submitted": 0, "coalesced": 0, "completed": 0, "cancelled": 0}
+
+    def start(self):
+        self.process = self.ctx.Process(target=analysis_host,
+                                        args=(self.job_queue, self.output, self.control, self.workers))
+        self.process.start()
+        return self
+
+    def note(self, kind, payload):
+        if kind == "ready":
+            self.info = payload
+        self.pool_pids = payload["pids"]
+
+    def submit(self, kind, subscriber=None, priority=0, **kwargs):
+        # (job_id, 합쳐졌는지). 대기/실행 중인 같은 요청이 있으면 구독자만 추가한다
+        if kind not in ANALYSIS_JOBS:
+            raise ValueError(f"job kind must be one of {tuple(ANALYSIS_JOBS)}")
+        self.counters["submitted"] += 1
+        key = job_key(kind, kwargs)
+        job = self.jobs.get(self.by_key.get(key))
+        if job is not None:
+            self.counters["coalesced"] += 1
+            if subscriber not in job["subscribers"]:
+                job["subscribers"].append(subscriber)
+            if job["state"] == "queued" and priority > job["priority"]:
+                job["priority"] = priority
+                heapq.heappush(self.queue, (-priority, next(self._ids), job["id"]))
+            return job["id"], True
+        job_id = next(self._ids)
+        self.jobs[job_id] = {"id": job_id, "key": key, "kind": kind, "kwargs": kwargs, "priority": priority,
+                             "state": "queued", "subscribers": [subscriber], "cancelled_by": [],
+                             "submitted": time.time()}
+        self.by_key[key] = job_id
+        heapq.heappush(self.queue, (-priority, job_id, job_id))
+        return job_id, False
+
+    def position(self, job_id):
+        # 대기 중이면 앞에 있는 작업 수 (실행 중이거나 없으면 None)
+        job = self.jobs.get(job_id)
+        if job is None or job["state"] != "queued":
+            return None
+        rank = (-job["priority"], job["id"])
+        return sum(1 for j in self.jobs.values() if j["state"] == "queued" and (-j["priority"], j["id"]) < rank)
+
+    def dispatch(self):
+        # 호스트가 비어 있으면 우선순위가 가장 높은 대기 작업을 보낸다
+        if self.running is not None:
+            return None
+        while self.queue:
+            neg_priority, _, job_id = heapq.heappop(self.queue)
+            job = self.jobs.get(job_id)
+            if job is None or job["state"] != "queued" or -neg_priority != job["priority"]:
+                continue
+            job["state"] = "running"
+            job["started"] = time.time()
+            self.running = job_id
+            self.job_queue.put((job_id, job["kind"], job["kwargs"]))
+            return job
+        return None
+
+    def finish(self, job_id, cancelled=False):
+        job = self.jobs.pop(job_id, None)
+        if job is None:
+            return None
+        self.by_key.pop(job["key"], None)
+        if self.running == job_id:
+            self.running = None
+        self.counters["cancelled" if cancelled else "completed"] += 1
+        return job
+
+    def cancel(self, job_id, subscriber=None, force=False):
+        # 요청한 구독자만 빠진다. 남은 구독자가 없거나 force면 실제로 취소한다.
+        # "detached" | "dequeued" (대기 중이라 바로 제거) | "killing" (실행 중, 호스트가 "cancelled"를 보냄) | None
+        job = self.jobs.get(job_id)
+        if job is None:
+            return None
+        if subscriber in job["subscribers"]:
+            job["subscribers"].remove(subscriber)
+        if job["subscribers"] and not force:
+            return "detached"
+        if job["state"] == "queued":
+            self.finish(job_id, cancelled=True)
+            return "dequeued"
+        if subscriber not in job["cancelled_by"]:
+            job["cancelled_by"].append(subscriber)
+        if not job.get("cancelling"):
+            job["cancelling"] = True
+            self.control.put(("cancel", job_id))
+            self.kill_pool()
+        return "killing"
+
+    def kill_pool(self):
+        # 풀 워커를 죽인다. 호스트는 풀이 깨진 것을 보고 작업을 끝내고 풀을 다시 띄운다
+        for pid in self.pool_pids:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except OSError:
+                pass
+
+    def drop_subscriber(self, subscriber):
+        # 연결이 끊긴 클라이언트: 그 클라이언트만 보던 작업은 취소
+        for job_id in [j["id"] for j in self.jobs.values() if subscriber in j["subscribers"]]:
+            self.cancel(job_id, subscriber)
+
+    def describe(self):
+        return {"alive": self.process is not None and self.process.is_alive(), "info": self.info,
+                "running": self.running, "queued": sum(j["state"] == "queued" for j in self.jobs.values()),
+                "jobs": [{"job_id": j["id"], "kind": j["kind"], "state": j["state"], "priority": j["priority"],
+                          "subscribers": len(j["subscribers"])} for j in self.jobs.values()],
+                **self.counters}
+
+    def shutdown(self, timeout=10):
+        if self.process is None:
+            return
+        self.job_queue.put(None)
+        if self.running is not None:
+            # 실행 중인 작업은 기다리지 않는다
+            self.kill_pool()
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.kill_pool()
+        self.process = None
@@ -0,0 +1,172 @@
+import struct
+from collections import deque
+
+################################
+# 상수 정의
+################################
+FRAME_VERSION = 1
+FRAME_KEY = 0                 # 전체 함대 (늦게 들어온 클라이언트 / 함대 구성 변경 시)
+FRAME_DELTA = 1               # 직전 프레임 대비 바뀐 AGV만
+POSITION_SCALE = 100          # 좌표 양자화: 1/100 셀 단위 (uint16 -> 최대 655 셀)
+KEYFRAME_INTERVAL = 50        # 프레임 50개(기본 100ms 주기로 5초)마다 키프레임
+FORMATS = ("json", "binary")
+DETAIL_LEVELS = ("summary", "positions", "full")   # summary: 집계만, positions: 기존 'message', full: 상태 비트 포함
+CLIENT_QUEUE_SIZE = 2         # 클라이언트별 대기 tick 수. 넘치면 오래된 위치부터 버린다
+CLIENT_MAX_PENDING = 8        # 소켓 송신 대기 패킷이 이보다 많으면 (느린 클라이언트) 이번 전송은 건너뛴다
+CLIENT_MAX_FPS = 30
+
+# 헤더: 버전(u8), 종류(u8), 순번(u32), sim 시각(f64), 레코드 수(u16) = 16바이트
+# 레코드: agv_id(u16), x(u16), y(u16), 상태 비트(u8) = 7바이트
+HEADER = struct.Struct("<BBIdH")
+RECORD = struct.Struct("<HHHB")
+
+################################
+# 레코드
+################################
+def quantize(x):
+    return max(0, min(0xFFFF, int(round(x * POSITION_SCALE))))
+
+################################
+# 인코더 / 디코더
+################################
+def pack_frame(kind, seq, sim_time, records):
+    out = bytearray(HEADER.size + RECORD.size * len(records))
+    HEADER.pack_into(out, 0, FRAME_VERSION, kind, seq & 0xFFFFFFFF, sim_time, len(records))
+    offset = HEADER.size
+    for agv_id, (x, y, flags) in records.items():
+        RECORD.pack_into(out, offset, agv_id, x, y, flags)
+        offset += RECORD.size
+    return bytes(out)
+
+class FleetFrameEncoder:
+    # 함대 상태를 바이너리 프레임으로 만든다. 마지막으로 보낸 상태를 기억해서 바뀐 AGV만 델타로 보내고,
+    # KEYFRAME_INTERVAL마다 (또는 함대 구성이 바뀌면) 전체 키프레임을 보낸다.
+    def __init__(self, keyframe_interval=KEYFRAME_INTERVAL):
+        self.keyframe_interval = keyframe_interval
+        self.last = {}
+        self.seq = 0
+        self.since_key = None
+
+    def encode(self, records, sim_time):
+        # 보낼 것이 없으면 None (정지/일시정지 중에는 키프레임 주기에만 전송)
+        if self.since_key is None or self.since_key + 1 >= self.keyframe_interval or records.keys() != self.last.keys():
+            self.last = dict(records)
+            self.since_key = 0
+            self.seq += 1
+            return pack_frame(FRAME_KEY, self.seq, sim_time, self.last)
+        self.since_key += 1
+        changed = {agv_id: rec for agv_id, rec in records.items() if self.last.get(agv_id) != rec}
+        if not changed:
+            return None
+        self.last.update(changed)
+        self.seq += 1
+        return pack_frame(FRAME_DELTA, self.seq, sim_time, changed)
+
+def unpack_frame(data):
+    version, kind, seq, sim_time, count = HEADER.unpack_from(data, 0)
+    if version != FRAME_VERSION:
+        raise ValueError(f"unsupported frame version {version}")
+    records = {}
+    for i in range(count):
+        agv_id, x, y, flags = RECORD.unpack_from(data, HEADER.size + i * RECORD.size)
+        records[agv_id] = (x / POSITION_SCALE, y / POSITION_SCALE, flags)
+    return kind, seq, sim_time, records
+
+class FleetFrameDecoder:
+    # 클라이언트 쪽 상태 복원 (벤치마크/점검용). 델타 순번이 끊기면 다음 키프레임까지 무시한다.
+    def __init__(self):
+        self.fleet = {}
+        self.seq = None
+
+    def apply(self, data):
+        kind, seq, sim_time, records = unpack_frame(data)
+        if kind == FRAME_KEY:
+            self.fleet = records
+        elif self.seq is None or seq != self.seq + 1:
+            return False
+        else:
+            self.fleet.update(records)
+        self.seq = seq
+        return True
+
+################################
+# 클라이언트별 구독
+################################
+class Subscription:
+    # 클라이언트 하나의 방송 설정과 송신 대기열.
+    # update_loop_task가 tick마다 offer()로 함대 상태를 넣고, 클라이언트별 송신 루프가 자기 주기에 맞춰
+    # 최신 것 하나만 꺼내 보낸다. 대기열은 CLIENT_QUEUE_SIZE로 묶여 있어서 느린 클라이언트 때문에 쌓이지 않는다.
+    # tick = {"sim_time", "delivered_count", "agvs": [(agv_id, x, y, flags)], "extra": 기존 'message'에 붙는 키}
+    def __init__(self, format="json", fps=None, agv_ids=None, viewport=None, detail="positions"):
+        if format not in FORMATS:
+            raise ValueError(f"format must be one of {FORMATS}")
+        if detail not in DETAIL_LEVELS:
+            raise ValueError(f"detail must be one of {DETAIL_LEVELS}")
+        if format == "binary" and detail == "summary":
+            raise ValueError("binary frames carry positions; use detail 'positions' or 'full'")
+        if fps is not None and not 0 < fps <= CLIENT_MAX_FPS:
+            raise ValueError(f"fps must be in (0, {CLIENT_MAX_FPS}]")
+        if viewport is not None:
+            x0, y0, x1, y1 = viewport
+            viewport = (min(x0, x1), min(y0, y1), max(x0, x1), max(y0, y1))
+        self.format = format
+        self.fps = fps
+        self.agv_ids = frozenset(agv_ids) if agv_ids is not None else None
+        self.viewport = viewport
+        self.detail = detail
+        self.encoder = FleetFrameEncoder() if format == "binary" else None
+        self.ticks = deque(maxlen=CLIENT_QUEUE_SIZE)
+        self.sent = 0
+        self.dropped = 0        # 보내기 전에 더 새 상태로 대체된 tick (fps가 낮은 구독도 여기에 잡힌다)
+        self.deferred = 0       # 소켓이 밀려 있어서 건너뛴 전송 차례
+
+    def interval(self, default):
+        return 1.0 / self.fps if self.fps else default
+
+    def offer(self, tick):
+        if len(self.ticks) == self.ticks.maxlen:
+            self.dropped += 1
+        self.ticks.append(tick)
+
+    def take(self):
+        if not self.ticks:
+            return None
+        tick = self.ticks.pop()
+        self.dropped += len(self.ticks)
+        self.ticks.clear()
+        return tick
+
+    def select(self, agvs):
+        if self.agv_ids is not None:
+            agvs = [a for a in agvs if a[0] in self.agv_ids]
+        if self.viewport is not None:
+            x0, y0, x1, y1 = self.viewport
+            agvs = [a for a in agvs if x0 <= a[1] <= x1 and y0 <= a[2] <= y1]
+        return agvs
+
+    def payload(self, tick):
+        # (이벤트 이름, 데이터) 또는 보낼 것이 없으면 None
+        if self.encoder is not None:
+            keep = 0xFF if self.detail == "full" else 0
+            records = {a[0]: (quantize(a[1]), quantize(a[2]), a[3] & keep) for a in self.select(tick["agvs"])}
+            frame = self.encoder.encode(records, tick["sim_time"])
+            return None if frame is None else ('fleet_frame', frame)
+        message = {'agv_count': len(tick["agvs"])}
+        if self.detail != "positions":
+            message['sim_time'] = tick["sim_time"]
+            message['delivered_count'] = tick["delivered_count"]
+        if self.detail != "summary":
+            if self.detail == "full":
+                message['agvs'] = [{'agv_id': a[0], 'location_x': a[1], 'location_y': a[2], 'flags': a[3]}
+                                   for a in self.select(tick["agvs"])]
+            else:
+                message['agvs'] = [{'agv_id': a[0], 'location_x': a[1], 'location_y': a[2]}
+                                   for a in self.select(tick["agvs"])]
+        message.update(tick["extra"])
+        return 'message', message
+
+    def describe(self):
+        return {'format': self.format, 'fps': self.fps, 'detail': self.detail,
+                'agv_ids': sorted(self.agv_ids) if self.agv_ids is not None else None,
+                'viewport': list(self.viewport) if self.viewport is not None else None,
+                'sent': self.sent, 'dropped': self.dropped, 'deferred': self.deferred}
@@ -0,0 +1,144 @@
+import os
+import ast
+import json
+import time
+import zlib
+import sqlite3
+import hashlib
+import sim_engine
+import sim_analysis
+
+################################
+# 상수 정의
+################################
+CACHE_PATH = os.environ.get("SIM_CACHE_PATH",
+                            os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache", "results.sqlite3"))
+CACHE_MAX_BYTES = int(os.environ.get("SIM_CACHE_MAX_BYTES", 64 * 1024 * 1024))   # 압축된 결과 합계 상한
+CACHE_TIMEOUT = 5.0        # 다른 서버 프로세스(포트)가 쓰는 중이면 기다리는 시간 (초)
+# 분석 결과를 좌우하는 분석 쪽 상수 (엔진 쪽은 sim_engine.scenario_fingerprint)
+ANALYSIS_CONSTANTS = ("ANALYSIS_SEED", "CI_CONFIDENCE", "CI_TARGET", "CI_MIN_RUNS", "CI_MAX_RUNS", "MSER_BATCH",
+                      "BATCH_COUNT", "BATCH_MIN_COUNT", "BATCH_RUN_FACTOR", "KNEE_FRACTION", "KNEE_PATIENCE")
+
+################################
+# 시나리오 키
+################################
+_code_version = None
+
+def local_sources(*modules):
+    # 모듈들과 그 모듈들이 (직접/간접) import 하는 같은 디렉터리의 소스 파일 경로 (이름 순)
+    pending = [os.path.abspath(module.__file__) for module in modules]
+    found = set()
+    while pending:
+        path = pending.pop()
+        if path in found:
+            continue
+        found.add(path)
+        with open(path, "rb") as f:
+            tree = ast.parse(f.read(), path)
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                names = [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+                names = [node.module]
+            else:
+                continue
+            for name in names:
+                candidate = os.path.join(os.path.dirname(path), name.split(".")[0] + ".py")
+                if os.path.exists(candidate):
+                    pending.append(candidate)
+    return sorted(found)
+
+def code_version():
+    # 엔진/분석 소스와 그것들이 import 하는 맵/탐색/혼잡장 모듈이 바뀌면
+    # (픽업 시간처럼 코드에 박힌 값 포함) 예전 결과를 쓰지 않는다
+    global _code_version
+    if _code_version is None:
+        digest = hashlib.sha256()
+        for path in local_sources(sim_engine, sim_analysis):
+            digest.update(os.path.basename(path).encode())
+            with open(path, "rb") as f:
+                digest.update(f.read())
+        _code_version = digest.hexdigest()
+    return _code_version
+
+def scenario_key(kind, kwargs):
+    # 작업 종류 + 인자 + 맵/배치/타이밍 상수 + 분석 상수(시드 포함) + 코드 버전의 해시.
+    # 스냅샷 blob 같은 bytes는 내용 해시로 넣는다
+    scenario = {"kind": kind, "kwargs": kwargs, "engine": sim_engine.scenario_fingerprint(),
+                "analysis": {name: getattr(sim_analysis, name) for name in ANALYSIS_CONSTANTS},
+                "code": code_version()}
+    text = json.dumps(scenario, sort_keys=True,
+                      default=lambda o: hashlib.sha256(o).hexdigest() if isinstance(o, bytes) else repr(o))
+    return hashlib.sha256(text.encode()).hexdigest()
+
+################################
+# 결과 캐시 (SQLite, 크기 제한 LRU)
+################################
+class ResultCache:
+    # key -> 최종 결과(JSON, zlib 압축). 같은 파일을 여러 서버 프로세스가 같이 쓴다 (WAL).
+    # 압축 크기 합계가 max_bytes를 넘으면 마지막 사용 시각이 오래된 것부터 지운다.
+    def __init__(self, path=CACHE_PATH, max_bytes=CACHE_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.db = None
+        self.counters = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+    def open(self):
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self.db = sqlite3.connect(self.path, timeout=CACHE_TIMEOUT, isolation_level=None, check_same_thread=False)
+        if self.path != ":memory:":
+            self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, kind TEXT, value BLOB, "
+                        "size INTEGER, created REAL, last_used REAL, hits INTEGER DEFAULT 0)")
+        self.db.execute("CREATE INDEX IF NOT EXISTS results_last_used ON results (last_used)")
+        return self
+
+    def close(self):
+        if self.db is not None:
+            self.db.close()
+            self.db = None
+
+    def get(self, key):
+        row = self.db.execute("SELECT value FROM results WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.counters["misses"] += 1
+            return None
+        self.db.execute("UPDATE results SET last_used = ?, hits = hits + 1 WHERE key = ?", (time.time(), key))
+        self.counters["hits"] += 1
+        return json.loads(zlib.decompress(row[0]))
+
+    def put(self, key, kind, result):
+        # 상한보다 큰 결과 하나는 저장하지 않는다
+        value = zlib.compress(json.dumps(result).encode())
+        if len(value) > self.max_bytes:
+            return False
+        now = time.time()
+        self.db.execute("INSERT OR REPLACE INTO results (key, kind, value, size, created, last_used) "
+                        "VALUES (?, ?, ?, ?, ?, ?)", (key, kind, value, len(value), now, now))
+        self.counters["stores"] += 1
+        self.evict()
+        return True
+
+    def evict(self):
+        total = self.db.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+        if total <= self.max_bytes:
+            return 0
+        victims = []
+        for key, size in self.db.execute("SELECT key, size FROM results ORDER BY last_used").fetchall():
+            if total <= self.max_bytes:
+                break
+            victims.append((key,))
+            total -= size
+        self.db.executemany("DELETE FROM results WHERE key = ?", victims)
+        self.counters["evictions"] += len(victims)
+        return len(victims)
+
+    def clear(self):
+        self.db.execute("DELETE FROM results")
+
+    def describe(self):
+        entries, size = self.db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results").fetchone()
+        lookups = self.counters["hits"] + self.counters["misses"]
+        return dict(self.counters, entries=entries, bytes=size, max_bytes=self.max_bytes, path=self.path,
+                    hit_rate=self.counters["hits"] / lookups if lookups else None)
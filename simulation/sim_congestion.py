@@ -0,0 +1,134 @@
+import math
+import numpy as np
+
+################################
+# 혼잡장 (실행 하나가 공유하는 셀별 혼잡도)
+################################
+# AGV가 셀에서 기다린 시간만큼 값이 쌓이고, sim 시간에 따라 반감기 half_life로 식는다.
+#  - 실제 값 = 저장값 * exp(-(now - epoch) / tau). 더할 때 amount * exp((now - epoch) / tau)를 저장하므로
+#    더하기/읽기 모두 셀 하나만 건드린다. 지수가 RENORM_EXPONENT를 넘으면 전체를 한 번 줄이고 epoch를 옮긴다
+#    (이때 floor 아래로 식은 셀은 버린다)
+#  - 격자 전체는 np.float64 배열 (방송/스냅샷용), 탐색은 값이 있는 셀만 든 dict(cells)를 읽는다
+#  - 탐색은 값을 직접 읽지 않고 penalties()가 주는 셀 진입 추가 비용만 본다: 값이 enter 이상이 된 셀은 "혼잡",
+#    leave 아래로 식어야 풀린다 (히스테리시스 - 경계 근처 값이 오르내릴 때마다 경로가 바뀌지 않게).
+#    혼잡한 셀의 추가 비용은 weight x 값, 최대 cap (아무리 막혀도 cap칸 넘게 돌아가지는 않는다)
+RENORM_EXPONENT = 20.0
+
+class CongestionField:
+    def __init__(self, env, rows, cols, half_life, floor=0.01):
+        self.env = env
+        self.rows = rows
+        self.cols = cols
+        self.half_life = half_life
+        self.tau = half_life / math.log(2)
+        self.floor = floor
+        self.grid = np.zeros((rows, cols))
+        self.cells = {}
+        self.epoch = env.now
+        self.version = 0
+        self._scale = (None, 1.0)      # (시각, 그 시각의 감쇠 배율)
+        self.hot = frozenset()         # 마지막으로 계산한 혼잡한 셀 집합 (다음 계산의 이전 상태, 스냅샷에 같이 저장)
+        self._hot_key = None           # (시각, version, 기준)
+
+    def scale(self):
+        now = self.env.now
+        if self._scale[0] == now:
+            return self._scale[1]
+        exponent = (now - self.epoch) / self.tau
+        if exponent > RENORM_EXPONENT:
+            self.renormalize(now)
+            exponent = 0.0
+        self._scale = (now, math.exp(-exponent))
+        return self._scale[1]
+
+    def renormalize(self, now):
+        factor = math.exp(-(now - self.epoch) / self.tau)
+        self.grid *= factor
+        cells = {}
+        for cell, value in self.cells.items():
+            value *= factor
+            if value >= self.floor:
+                cells[cell] = value
+            else:
+                self.grid[cell] = 0.0
+        self.cells = cells
+        self.epoch = now
+        self.version += 1
+
+    def add(self, cell, amount, at=None):
+        # at: amount가 쌓인 시각 (기본 지금). 지난 시각이면 그 뒤로 식은 만큼 줄어든 값이 들어간다
+        if amount <= 0 or not (0 <= cell[0] < self.rows and 0 <= cell[1] < self.cols):
+            return
+        if at is None or at == self.env.now:
+            stored = amount / self.scale()
+        else:
+            self.scale()
+            stored = amount * math.exp((at - self.epoch) / self.tau)
+        self.grid[cell] += stored
+        self.cells[cell] = self.cells.get(cell, 0.0) + stored
+        self.version += 1
+
+    def get(self, cell, default=0):
+        stored = self.cells.get(cell)
+        if stored is None:
+            return default
+        return stored * self.scale()
+
+    def __getitem__(self, cell):
+        return self.get(cell, 0)
+
+    def hot_cells(self, enter, leave):
+        # 혼잡한 셀 집합: 지금 값이 enter 이상이거나, 이미 혼잡했고 아직 leave 이상인 셀
+        # (같은 시각/같은 내용이면 이전 결과를 그대로 쓴다)
+        key = (self.env.now, self.version, enter, leave)
+        if self._hot_key != key:
+            scale = self.scale()
+            enter_limit, leave_limit = enter / scale, leave / scale
+            previous = self.hot
+            self.hot = frozenset(cell for cell, value in self.cells.items()
+                                 if value >= enter_limit or (value >= leave_limit and cell in previous))
+            self._hot_key = key
+        return self.hot
+
+    def penalties(self, enter, leave, weight, cap):
+        # 혼잡한 셀 -> 셀 진입 추가 비용 min(cap, weight x 지금 값)
+        hot = self.hot_cells(enter, leave)
+        scale = self.scale()
+        return {cell: min(cap, weight * self.cells.get(cell, 0.0) * scale) for cell in hot}
+
+    def values(self):
+        return self.grid * self.scale()
+
+    def downsample(self, block):
+        # block x block 셀마다 최댓값 하나 (가장자리는 0으로 채워서 나눈다)
+        values = self.values()
+        rows = -(-self.rows // block)
+        cols = -(-self.cols // block)
+        padded = np.zeros((rows * block, cols * block))
+        padded[:self.rows, :self.cols] = values
+        return padded.reshape(rows, block, cols, block).max(axis=(1, 3))
+
+    def heatmap(self, max_side):
+        # UI 히트맵: 긴 변이 max_side 이하가 되도록 묶은 격자를 0~255로 양자화 (행 우선 평탄화)
+        block = max(1, -(-max(self.rows, self.cols) // max_side))
+        grid = self.downsample(block)
+        peak = float(grid.max()) if grid.size else 0.0
+        cells = np.rint(grid * (255.0 / peak)).astype(np.uint8) if peak > 0 else np.zeros(grid.shape, np.uint8)
+        return {"sim_time": round(self.env.now, 2), "rows": self.rows, "cols": self.cols, "block": block,
+                "shape": list(grid.shape), "peak": round(peak, 3), "half_life": self.half_life,
+                "cells": cells.ravel().tolist()}
+
+    def export(self):
+        # 스냅샷용: 지금 시각 기준 실제 값 격자
+        return self.values().astype(np.float32)
+
+    def load(self, values, hot=()):
+        self.grid = np.array(values, dtype=np.float64)
+        self.rows, self.cols = self.grid.shape
+        self.epoch = self.env.now
+        self._scale = (None, 1.0)
+        self.cells = {(int(r), int(c)): float(self.grid[r, c]) for r, c in zip(*np.nonzero(self.grid >= self.floor))}
+        self.grid[self.grid < self.floor] = 0.0
+        self.hot = frozenset(tuple(cell) for cell in hot)
+        self._hot_key = None
+        self.version += 1
@@ -0,0 +1,142 @@
+import heapq
+
+INF = float("inf")
+
+################################
+# 증분 재탐색 (D* Lite)
+################################
+# 목표에서 거꾸로 탐색한 g / rhs 값을 (AGV, 목표)마다 들고 있다가, 다음 질의에서
+#  - 막힌 셀 집합이 바뀐 곳의 이웃 셀만 다시 계산하고 (update_vertex)
+#  - AGV가 움직인 만큼 키 보정값 km을 올려서
+# 이전 탐색 결과를 그대로 이어 쓴다. 셀로 들어가는 비용은 1 + 추가 비용(혼잡, 없으면 0), 막힌 셀로 들어가는 비용은 무한대.
+# 추가 비용이 바뀐 셀도 막힌 셀이 바뀐 것과 같이 그 이웃만 다시 계산한다.
+# touched = 이번 질의에서 다시 계산한 셀 수 + 큐에서 꺼내 처리한 셀 수 (재탐색 비용 지표)
+
+class DStarLite:
+    def __init__(self, adjacency, start, goal, version=None):
+        self.adjacency = adjacency
+        self.goal = goal
+        self.start = start
+        self.last = start
+        self.version = version
+        self.blocked = set()
+        self.cost = {}
+        self.km = 0
+        self.g = {}
+        self.rhs = {goal: 0}
+        self.queue = []
+        self.queued = {}
+        self.touched = 0
+        self.expanded = 0
+        self._push(goal)
+
+    def _h(self, cell):
+        return abs(cell[0] - self.start[0]) + abs(cell[1] - self.start[1])
+
+    def _key(self, cell):
+        m = min(self.g.get(cell, INF), self.rhs.get(cell, INF))
+        return (m + self._h(cell) + self.km, m)
+
+    def _push(self, cell):
+        key = self._key(cell)
+        self.queued[cell] = key
+        heapq.heappush(self.queue, (key, cell))
+
+    def _top(self):
+        queue, queued = self.queue, self.queued
+        while queue and queued.get(queue[0][1]) != queue[0][0]:
+            heapq.heappop(queue)
+        return queue[0] if queue else None
+
+    def update_vertex(self, cell):
+        self.touched += 1
+        if cell != self.goal:
+            g, blocked, cost = self.g, self.blocked, self.cost
+            best = INF
+            for neighbor in self.adjacency.get(cell, ()):
+                if neighbor not in blocked:
+                    value = g.get(neighbor, INF) + 1 + cost.get(neighbor, 0)
+                    if value < best:
+                        best = value
+            self.rhs[cell] = best
+        if self.g.get(cell, INF) != self.rhs.get(cell, INF):
+            self._push(cell)
+        else:
+            self.queued.pop(cell, None)
+
+    def update_blocked(self, blocked, cost=None):
+        # 막힌 셀 집합이나 추가 비용이 바뀐 셀로 들어가는 간선 비용이 바뀐다 -> 그 셀의 이웃들의 rhs를 다시 계산
+        cost = cost or {}
+        changed = self.blocked.symmetric_difference(blocked)
+        old_cost = self.cost
+        changed.update(cell for cell in old_cost.keys() | cost.keys() if old_cost.get(cell, 0) != cost.get(cell, 0))
+        self.blocked = set(blocked)
+        self.cost = dict(cost)
+        for cell in changed:
+            for neighbor in self.adjacency.get(cell, ()):
+                self.update_vertex(neighbor)
+        return len(changed)
+
+    def compute(self):
+        g, rhs = self.g, self.rhs
+        start = self.start
+        while True:
+            top = self._top()
+            if top is None:
+                break
+            start_key = self._key(start)
+            if top[0] >= start_key and rhs.get(start, INF) == g.get(start, INF):
+                break
+            key, cell = top
+            new_key = self._key(cell)
+            if key < new_key:
+                self._push(cell)
+                continue
+            heapq.heappop(self.queue)
+            del self.queued[cell]
+            self.touched += 1
+            self.expanded += 1
+            if g.get(cell, INF) > rhs.get(cell, INF):
+                g[cell] = rhs[cell]
+                if cell not in self.blocked:
+                    for neighbor in self.adjacency.get(cell, ()):
+                        self.update_vertex(neighbor)
+            else:
+                g[cell] = INF
+                for neighbor in self.adjacency.get(cell, ()) + (cell,):
+                    self.update_vertex(neighbor)
+
+    def plan(self, start, blocked, cost=None):
+        # start에서 goal까지 현재 막힌 셀을 피하는 최소 비용 경로 [start, ..., goal] / 없으면 None
+        # cost: {셀: 진입 추가 비용}
+        self.touched = 0
+        self.expanded = 0
+        if start != self.last:
+            self.km += abs(start[0] - self.last[0]) + abs(start[1] - self.last[1])
+            self.last = start
+        self.start = start
+        self.update_blocked(blocked, cost)
+        self.compute()
+        return self.path()
+
+    def path(self):
+        g, cost = self.g, self.cost
+        cell = self.start
+        if g.get(cell, INF) == INF and cell != self.goal:
+            return None
+        path = [cell]
+        seen = {cell}
+        while cell != self.goal:
+            best, best_value = None, INF
+            for neighbor in self.adjacency.get(cell, ()):
+                if neighbor in self.blocked:
+                    continue
+                value = g.get(neighbor, INF) + cost.get(neighbor, 0)
+                if value < best_value:
+                    best, best_value = neighbor, value
+            if best is None or best in seen:
+                return None
+            path.append(best)
+            seen.add(best)
+            cell = best
+        return path
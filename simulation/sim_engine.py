@@ -0,0 +1,2087 @@
+import os
+import math
+import time
+import zlib
+import queue
+import pickle
+import random
+import statistics
+import heapq
+import bisect
+from functools import partial
+from array import array
+from collections import OrderedDict, defaultdict, deque
+from simpy import Environment
+from simpy.core import EmptySchedule, Infinity, StopSimulation
+from simpy.events import NORMAL, Timeout
+from simpy.rt import RealtimeEnvironment
+from sim_map import WarehouseMap, build_adjacency, index_adjacency, load_map, update_adjacency
+from sim_hpa import ClusterGraph
+from sim_jps import JumpTable, jump_point_search
+from sim_dstar import DStarLite
+from sim_congestion import CongestionField
+
+################################
+# 상수 정의
+################################
+REPEAT_RUNS = 15
+WARMUP_PERIOD = 30
+CHECK_INTERVAL = 3000
+MOVE_RATE = 1.0           # 셀 간 이동 속도 (셀/초)
+STEP_SIZE = 0.01          # "step" 이동 모드의 미세 이동 단위
+
+# 이동 모드
+#  - "edge": 셀 하나를 이동할 때 이벤트 1개만 스케줄하고, 중간 위치는 조회 시점에 보간.
+#            도착 시각과 처리 순서가 "step"과 같아서 같은 시드면 결과도 같다
+#  - "step": 기존 방식 (STEP_SIZE마다 timeout, 셀당 약 100개 이벤트)
+MOVE_MODE = "edge"
+MOVE_MODES = ("edge", "step")
+
+# 막힌 AGV의 대기 방식
+#  - "event": 기다리는 동안 루프가 읽는 상태(다음 셀 점유/예약, 목적지 예약, 경로 탐색 입력)가 바뀔 때까지 잠든다.
+#             바뀐 뒤 poll 모드였다면 깨어났을 첫 polling 시각에 깨어나므로 같은 시드면 결과가 "poll"과 같다
+#  - "poll": 기존 방식 (0.1~0.3초 timeout 후 재시도)
+WAIT_MODE = "event"
+WAIT_MODES = ("event", "poll")
+# 같은 시각에 polling 차례가 겹친 AGV를 처리하는 순서 (두 대기 방식 공통)
+#  - "agv_id": 낮은 id 우선 (TARGET_RESERVATIONS와 같은 우선순위)
+#  - "fifo": 현재 셀에 먼저 도착한(더 오래 서 있던) 순서
+#  - "loaded_first": 적재 중인 AGV 우선, 그 다음 낮은 id
+WAIT_PRIORITY = "agv_id"
+WAIT_PRIORITIES = ("agv_id", "fifo", "loaded_first")
+STUCK_STEPS = 50              # 제자리에서 이보다 많이 다시 시도하면 경로를 버리고 현재 셀을 예약한다
+
+# 충돌 회피 플래너
+#  - "reactive": 기존 방식. 다음 셀만 RESERVED_CELLS에 예약하고, 막히면 대기/재탐색
+#  - "reservation": 시공간 예약 테이블 기반 SIPP. 경로 전체의 (셀, 시간 구간)을 예약해서
+#                   AGV끼리 서로의 경로로 계획하지 않는다
+PLANNER = "reactive"
+PLANNERS = ("reactive", "reservation")
+HEADLESS_FPS = 10             # 헤드리스 최고속 실행: 초당 스냅샷 수 (wall-clock 기준)
+HEADLESS_CHECK_EVENTS = 256   # 이벤트 몇 개마다 wall 시간/제어 메시지를 확인할지
+SPEED_SLICE = 0.05            # 실시간 환경이 한 번에 자는 최대 시간 - 배속 변경이 이 안에 반영된다
+SIPP_MAX_EXPANSIONS = 20000
+# reactive 플래너의 경로 탐색
+#  - "flat": 셀 격자 전체 A* (막힌 셀 없는 경로는 캐시)
+#  - "hpa": 클러스터 계층 그래프 (sim_hpa) - 큰 맵의 먼 경로용. 분석/세션 워커도 SIM_PATH_SEARCH로 같은 값을 쓴다.
+#           최단 경로는 아니다 (출입구를 거쳐 돌아간다). 가까운 목표나 계층 탐색이 못 찾은 경로는 셀 격자 A*로 찾는다
+#  - "jps": Jump Point Search (sim_jps) - 넓은 통로의 대칭 경로를 건너뛰는 최단 경로 A*
+#  - "dstar": D* Lite (sim_dstar) - AGV마다 같은 목표의 탐색 상태를 들고 있다가 막힌 셀이 바뀐 부분만 고친다
+# jps/dstar도 최단 경로지만 길이가 같은 경로 중 고르는 것이 flat A*와 달라서 (이웃 순서/동점 처리가 다른 알고리즘)
+# 같은 시드라도 AGV들의 움직임과 배송 수가 flat과 다르다. 군집 결과 비교는 benchmarks/bench_search_fleet.py
+# (기본 맵 1500초, 시드 6개: 탐색 간 배송 수 차이는 시드 간 표준편차 안)
+PATH_SEARCH = os.environ.get("SIM_PATH_SEARCH", "flat")
+PATH_SEARCHES = ("flat", "hpa", "jps", "dstar")
+RESERVATION_EPS = 1e-6
+HPA_FLAT_DISTANCE = 32        # hpa: 맨해튼 거리가 이보다 가까우면 셀 격자 A* (출입구 우회가 최단의 몇 배가 되는 구간)
+
+# 통계 보관 한도 (긴 실행도 메모리 일정)
+SERIES_CAPACITY = 86400       # 초당 누적 배송 수 시계열(delivered_record)을 최근 몇 초까지 들고 있을지
+DELIVERY_LOG_CAPACITY = 100000  # 배치 평균 분석용 (배송 완료 시각, 사이클 시간)을 최근 몇 건까지
+HISTOGRAM_WIDTH = 1.0         # 사이클/대기/이동 시간 분위수용 고정 구간 히스토그램 (초 단위 구간)
+HISTOGRAM_BINS = 1800         # 그 이상은 마지막 구간에 모은다
+QUANTILES = (0.5, 0.9, 0.99)
+STOP_CHECK_INTERVAL = 100     # 분석 실행이 중단 요청을 확인하는 간격 (sim 초)
+DISTANCE_FIELD_LIMIT = 64        # 목표 셀 거리장을 최대 몇 개까지 들고 있을지 (오래 안 쓴 것부터 버림)
+DISTANCE_FIELD_EAGER = 2000000   # 격자 셀 수 x 목표 수가 이 이하면 전부 미리 계산, 넘으면 쓰일 때 계산
+DISTANCE_FIELD_BUILD_AFTER = 3   # (쓰일 때 계산) 같은 목표가 이만큼 요청되면 계산, 그 전에는 맨해튼 A*로 충분
+PATH_CACHE_SIZE = 65536          # 기억해 두는 (출발, 목표)별 막힌 셀 없는 A* 경로 수 (오래 안 쓴 것부터 버림)
+# 혼잡장: AGV가 기다린 시간(초)이 셀마다 쌓이고 sim 시간에 따라 식는다.
+# 모든 탐색(flat/hpa/jps/dstar)이 같은 비용 모델을 쓴다: 값이 CONGESTION_AVOID 이상이 된 셀은 혼잡한 셀이 되고
+# CONGESTION_AVOID_EXIT 아래로 식어야 풀린다. 혼잡한 셀에 들어가는 비용은 1 + min(CONGESTION_PENALTY_CAP,
+# CONGESTION_WEIGHT x 값) - 막힌 셀처럼 빼지 않고 그만큼 돌아갈 가치가 있을 때만 돌아간다.
+# 기본은 끔 (SIM_CONGESTION=1로 켠다). bench_congestion (1500초, 시드 10개, flat): 구간당 대기는 20~40대 모두
+# 약 1/3로 줄고, 배송 수는 40대에서 43.6 -> 52.7, 20/30대는 시드 간 편차(20 안팎) 안에서 같다.
+# jps/dstar는 40대에서 대기는 줄지만 배송 수도 줄어서 (동점 경로 선택이 달라 교착 양상이 다르다) 같이 쓰지 않는 편이 낫다
+CONGESTION_FIELD = os.environ.get("SIM_CONGESTION", "0") == "1"
+CONGESTION_HALF_LIFE = 30.0      # sim 초
+CONGESTION_FLOOR = 0.05          # 이보다 식은 셀은 버린다
+CONGESTION_AVOID = 5.0           # 혼잡한 셀이 되는 값 (초)
+CONGESTION_AVOID_EXIT = 2.5      # 혼잡이 풀리는 값
+CONGESTION_WEIGHT = 0.5          # 혼잡한 셀의 추가 비용 = 값 x 이것 (칸)
+CONGESTION_PENALTY_CAP = 4.0     # 추가 비용 상한 (칸)
+CONGESTION_HEATMAP_SIDE = 64     # UI 히트맵 격자의 긴 변 (셀을 묶어서 줄인다)
+CONGESTION_HEATMAP_INTERVAL = 1.0  # 히트맵을 보내는 간격 (wall 초)
+
+################################
+# 맵 정의 (격자)
+################################
+# 15x15 불규칙 맵
+MAP = [
+    [2, 2, 2, 2, 2, 2, 2, 2, 2, 2, 2, 2, 2, 2, 2],
+    [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0],
+    [0, 1, 1, 1, 0, 1, 0, 1, 0, 0, 0, 1, 1, 1, 0],
+    [0, 1, 1, 0, 0, 1, 0, 0, 0, 0, 0, 0, 0, 1, 0],
+    [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0],
+    [0, 1, 0, 1, 0, 0, 1, 1, 0, 1, 0, 1, 1, 1, 0],
+    [0, 0, 0, 1, 1, 0, 1, 1, 0, 0, 0, 1, 1, 1, 0],
+    [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0],
+    [0, 0, 0, 1, 0, 1, 0, 1, 1, 1, 0, 1, 1, 1, 0],
+    [0, 1, 0, 0, 0, 1, 0, 1, 1, 1, 0, 0, 0, 1, 0],
+    [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0],
+    [2, 2, 2, 2, 2, 2, 2, 2, 2, 2, 2, 2, 2, 2, 2],
+]
+ROWS = len(MAP)
+COLS = len(MAP[0])
+
+# 출구 구역: row0의 모든 셀
+exit_coords = [(0, c) for c in range(COLS) if MAP[0][c] == 2]
+
+# 적재(선반) 구역: 맵 내부의 "들어간" 영역 (예: (3,3), (5,4), (3,12), (9,12), (8,6))
+shelf_coords = [(3,3), (5,4), (3,12), (9,12), (8,6)]
+
+# 시작 셀: row 11, 열은 [0, 3, 6, 9, 12] (AGV i는 i % 5번째)
+START_CELLS = [(11, c) for c in (0, 3, 6, 9, 12)]
+
+def is_in_corridor(cell):
+    row, col = cell
+    return (2 <= row <= 4) and (2 <= col <= 4)
+
+################################
+# 맵 교체 / 인접 리스트
+################################
+# 맵을 바꿀 때는 update_map_cell() 또는 set_map()을 사용해야 인접 리스트/거리장이 다시 계산된다.
+# MAP/shelf_coords/exit_coords/START_CELLS는 다른 모듈이 import 해서 쓰므로 객체를 바꾸지 않고 내용만 바꾼다.
+MAP_VERSION = 0
+
+def update_map_cell(cell, value):
+    # 인접 리스트와 클러스터 그래프는 cell 주변만 고쳐서 이어 쓴다 (거리장은 다시 계산)
+    global MAP_VERSION, _adjacency, _cluster_graph, _jump_table
+    MAP[cell[0]][cell[1]] = value
+    MAP_VERSION += 1
+    if _adjacency is not None and _adjacency[0] == MAP_VERSION - 1:
+        update_adjacency(_adjacency[1], MAP, cell)
+        _adjacency = (MAP_VERSION, _adjacency[1])
+        if _cluster_graph is not None and _cluster_graph[0] == MAP_VERSION - 1:
+            _cluster_graph[1].update_cell(cell)
+            _cluster_graph = (MAP_VERSION, _cluster_graph[1])
+        if _jump_table is not None and _jump_table[0] == MAP_VERSION - 1:
+            _jump_table[1].update_cell(cell)
+            _jump_table = (MAP_VERSION, _jump_table[1])
+
+def set_map(layout):
+    # sim_map.WarehouseMap으로 맵 전체를 바꾼다 (크기가 달라도 됨)
+    global MAP_VERSION, ROWS, COLS, _adjacency, _map_digest
+    MAP[:] = layout.grid.tolist()
+    ROWS, COLS = layout.shape
+    shelf_coords[:] = layout.shelves
+    exit_coords[:] = layout.exits
+    START_CELLS[:] = layout.starts
+    MAP_VERSION += 1
+    _adjacency = (MAP_VERSION, layout.adjacency())
+    _map_digest = (MAP_VERSION, layout.digest)
+
+def current_map():
+    return WarehouseMap(MAP, shelf_coords, exit_coords, START_CELLS)
+
+_adjacency = None
+_map_digest = None
+_cluster_graph = None
+_jump_table = None
+
+def get_adjacency():
+    # 통로 셀 -> 이웃 통로 셀 튜플 (위, 아래, 왼쪽, 오른쪽 순서)
+    global _adjacency
+    if _adjacency is None or _adjacency[0] != MAP_VERSION:
+        _adjacency = (MAP_VERSION, build_adjacency(MAP))
+    return _adjacency[1]
+
+def get_cluster_graph():
+    global _cluster_graph
+    if _cluster_graph is None or _cluster_graph[0] != MAP_VERSION:
+        _cluster_graph = (MAP_VERSION, ClusterGraph(get_adjacency(), ROWS, COLS))
+    return _cluster_graph[1]
+
+def get_jump_table():
+    global _jump_table
+    if _jump_table is None or _jump_table[0] != MAP_VERSION:
+        _jump_table = (MAP_VERSION, JumpTable(get_adjacency(), ROWS, COLS))
+    return _jump_table[1]
+
+def map_digest():
+    global _map_digest
+    if _map_digest is None or _map_digest[0] != MAP_VERSION:
+        _map_digest = (MAP_VERSION, current_map().digest)
+    return _map_digest[1]
+
+################################
+# 목표 셀 거리장 (distance field)
+################################
+class DistanceField:
+    # 목표 셀 하나까지 정적 맵 위의 실제 최단거리 (SIPP 휴리스틱).
+    # 셀 인덱스(행 * COLS + 열) 기준 array라서 큰 맵에서도 목표당 (셀 수 x 4바이트)
+    __slots__ = ("goal", "cols", "dist")
+
+    def __init__(self, goal, neighbors, cols):
+        self.goal = goal
+        self.cols = cols
+        dist = self.dist = array("i", [-1]) * len(neighbors)
+        start = goal[0] * cols + goal[1]
+        dist[start] = 0
+        # 리스트를 순회하면서 뒤에 붙이면 BFS 큐와 같은 순서
+        queue = [start]
+        for i in queue:
+            d = dist[i] + 1
+            for j in neighbors[i]:
+                if dist[j] < 0:
+                    dist[j] = d
+                    queue.append(j)
+
+    def distance(self, cell):
+        d = self.dist[cell[0] * self.cols + cell[1]]
+        return d if d >= 0 else None
+
+class DistanceFields:
+    # 고정된 목표 셀(선반 + 출구)마다의 거리장. 작은 맵은 전부 미리 계산하고,
+    # 큰 맵은 자주 쓰이는 목표만 계산해서 최근 DISTANCE_FIELD_LIMIT개만 들고 있는다 (한 번 계산에 맵 전체 BFS)
+    def __init__(self, goals):
+        self.version = MAP_VERSION
+        self.goals = set(goals)
+        self.neighbors = index_adjacency(get_adjacency(), ROWS, COLS)
+        self.fields = OrderedDict()
+        self.requests = defaultdict(int)
+        self.limit = DISTANCE_FIELD_LIMIT
+        if ROWS * COLS * len(self.goals) <= DISTANCE_FIELD_EAGER:
+            self.limit = max(self.limit, len(self.goals))
+            for goal in goals:
+                self.fields[goal] = DistanceField(goal, self.neighbors, COLS)
+
+    def field(self, goal):
+        field = self.fields.get(goal)
+        if field is not None:
+            self.fields.move_to_end(goal)
+            return field
+        if goal not in self.goals:
+            return None
+        self.requests[goal] += 1
+        if self.requests[goal] < DISTANCE_FIELD_BUILD_AFTER:
+            return None
+        return self.build(goal)
+
+    def build(self, goal):
+        field = self.fields[goal] = DistanceField(goal, self.neighbors, COLS)
+        if len(self.fields) > self.limit:
+            self.fields.popitem(last=False)
+        return field
+
+_distance_fields = None
+
+def get_distance_fields():
+    global _distance_fields
+    if _distance_fields is None or _distance_fields.version != MAP_VERSION:
+        _distance_fields = DistanceFields(shelf_coords + exit_coords)
+    return _distance_fields
+
+################################
+# 막힌 셀 없는 경로 캐시
+################################
+class PathCache:
+    # (출발, 목표) -> 막힌 셀이 하나도 없을 때 a_star_search가 돌려주는 경로 (정적 맵에서 갈 수 없으면 None).
+    # 최근 PATH_CACHE_SIZE개만 들고 있고, 맵이 바뀌면 새로 만든다
+    def __init__(self, size):
+        self.version = MAP_VERSION
+        self.size = size
+        self.paths = OrderedDict()
+
+    def free_path(self, start, goal):
+        key = (start, goal)
+        if key in self.paths:
+            self.paths.move_to_end(key)
+            return self.paths[key]
+        path = a_star_search(start, goal, 0, {}, defaultdict(int))
+        path = self.paths[key] = tuple(path) if path is not None else None
+        if len(self.paths) > self.size:
+            self.paths.popitem(last=False)
+        return path
+
+_path_cache = None
+
+def get_path_cache():
+    global _path_cache
+    if _path_cache is None or _path_cache.version != MAP_VERSION:
+        _path_cache = PathCache(PATH_CACHE_SIZE)
+    return _path_cache
+
+def scenario_fingerprint():
+    # 실행 결과에 영향을 주는 맵/배치/타이밍 상수 (결과 캐시 키). 실행 중에 바뀔 수 있어서 호출 시점 값을 읽는다
+    return {"map": map_digest(), "shelves": shelf_coords, "exits": exit_coords, "starts": START_CELLS,
+            "warmup": WARMUP_PERIOD,
+            "check_interval": CHECK_INTERVAL, "move_rate": MOVE_RATE, "step_size": STEP_SIZE,
+            "move_mode": MOVE_MODE, "wait_mode": WAIT_MODE, "wait_priority": WAIT_PRIORITY,
+            "stuck_steps": STUCK_STEPS,
+            "sipp_max_expansions": SIPP_MAX_EXPANSIONS, "reservation_eps": RESERVATION_EPS,
+            "path_search": PATH_SEARCH, "congestion": CONGESTION_FIELD and (CONGESTION_HALF_LIFE, CONGESTION_FLOOR,
+                                                                             CONGESTION_AVOID, CONGESTION_AVOID_EXIT,
+                                                                             CONGESTION_WEIGHT, CONGESTION_PENALTY_CAP)}
+
+# SIM_MAP=맵 파일 경로를 주면 import 시점에 적용한다 (spawn으로 뜨는 분석/세션 워커도 환경변수로 같은 맵을 쓴다)
+if os.environ.get("SIM_MAP"):
+    set_map(load_map(os.environ["SIM_MAP"]))
+
+def to_cell(pos):
+    return (int(round(pos[0])), int(round(pos[1])))
+
+def blocked_frontier(start, goal, current_time, cell_blocked, current_agv_id, reserved_cells):
+    # start에서 막히지 않은 셀(a_star_search와 같은 기준)로 갈 수 있는 영역에 goal이 없으면 그 영역을 둘러싼
+    # 막힌 셀 집합, goal에 닿으면 None. 이 셀 중 하나가 풀리기 전에는 start -> goal 탐색이 계속 실패한다
+    adjacency = get_adjacency()
+    seen = {start}
+    frontier = set()
+    stack = [start]
+    while stack:
+        cell = stack.pop()
+        for neighbor in adjacency[cell]:
+            if neighbor in seen or neighbor in frontier:
+                continue
+            if (neighbor in cell_blocked and cell_blocked[neighbor] > current_time) or \
+                    (neighbor in reserved_cells and reserved_cells[neighbor] != current_agv_id):
+                frontier.add(neighbor)
+                continue
+            if neighbor == goal:
+                return None
+            seen.add(neighbor)
+            stack.append(neighbor)
+    return frontier
+
+def is_cell_busy(sim, cell, required_cargo):
+    return sim.occupancy.has_cargo(cell, required_cargo)
+
+def manhattan(a, b):
+    return abs(a[0]-b[0]) + abs(a[1]-b[1])
+
+def a_star_search(start, goal, current_time, cell_blocked, congestion_cost, current_agv_id=None,
+                  reserved_cells=None, heuristic=manhattan, counters=None):
+    if start == goal:
+        return [start]
+    if reserved_cells is None:
+        reserved_cells = {}
+    start_h = heuristic(start, goal)
+    if start_h is None:
+        return None
+    adjacency = get_adjacency()
+    if counters is not None:
+        # expansions: 꺼낸 셀 수, touched: 꺼낸 셀 + 비용을 매긴 셀 (sim_dstar의 재탐색 비용과 같은 기준)
+        counters.setdefault("expansions", 0)
+        counters.setdefault("touched", 0)
+    open_set = []
+    heapq.heappush(open_set, (start_h, 0, start))
+    came_from = {start: None}
+    cost_so_far = {start: 0}
+    while open_set:
+        priority, current_cost, current = heapq.heappop(open_set)
+        if current == goal:
+            path = []
+            while current is not None:
+                path.append(current)
+                current = came_from[current]
+            path.reverse()
+            if counters is not None:
+                counters["touched"] += len(cost_so_far)
+            return path
+        if counters is not None:
+            counters["expansions"] += 1
+            counters["touched"] += 1
+        for neighbor in adjacency[current]:
+            if neighbor in cell_blocked and cell_blocked[neighbor] > current_time:
+                continue
+            if neighbor in reserved_cells and current_agv_id is not None and reserved_cells[neighbor] != current_agv_id:
+                continue
+            new_cost = cost_so_far[current] + 1 + congestion_cost.get(neighbor, 0)
+            if neighbor not in cost_so_far or new_cost < cost_so_far[neighbor]:
+                h = heuristic(neighbor, goal)
+                if h is None:
+                    continue
+                cost_so_far[neighbor] = new_cost
+                priority = new_cost + h
+                heapq.heappush(open_set, (priority, new_cost, neighbor))
+                came_from[neighbor] = current
+    if counters is not None:
+        counters["touched"] += len(cost_so_far)
+    return None
+
+def cached_a_star_path(start, goal, current_time, cell_blocked, congestion_cost, current_agv_id=None,
+                       reserved_cells=None):
+    # a_star_search에 경로 캐시를 앞에 둔 것 (결과는 a_star_search와 같다. 탐색 자체를 빠르게 하지는 않는다):
+    #  1) 막힌 셀이 없어도 갈 수 없는 목표면 (캐시된 None) 탐색 없이 실패
+    #  2) 막힌 셀이 없을 때의 경로(캐시)에 지금 막힌 셀/혼잡한 셀이 없으면 그대로 반환
+    #  3) 있으면 맨해튼 A*
+    # 거리장을 휴리스틱으로 쓰는 A*는 동점인 경로 중 다른 것을 골라서 (AGV들이 같은 길로 몰려 교착이 잦아지고
+    # 배송 수가 크게 줄었다) 쓰지 않는다
+    path = get_path_cache().free_path(start, goal)
+    if path is None:
+        return None
+    if reserved_cells is None:
+        reserved_cells = {}
+    for cell in path[1:]:
+        if cell in cell_blocked and cell_blocked[cell] > current_time:
+            break
+        if cell in reserved_cells and current_agv_id is not None and reserved_cells[cell] != current_agv_id:
+            break
+        if cell in congestion_cost:
+            break
+    else:
+        return list(path)
+    return a_star_search(start, goal, current_time, cell_blocked, congestion_cost, current_agv_id, reserved_cells)
+
+bfs_path = cached_a_star_path
+
+def blocked_cells(start, current_time, cell_blocked, current_agv_id=None, reserved_cells=None):
+    # 지금 지나갈 수 없는 셀 집합 (a_star_search와 같은 기준): 막힘 시각이 남은 셀 + 다른 AGV가 예약한 셀.
+    # 보통 AGV 수 정도. cell_blocked 키는 AGV 위치(실수)일 수 있어 정수 셀로 바꾼다
+    blocked = {to_cell(cell) for cell, until in cell_blocked.items() if until > current_time}
+    if reserved_cells and current_agv_id is not None:
+        blocked.update(to_cell(cell) for cell, agv_id in reserved_cells.items() if agv_id != current_agv_id)
+    blocked.discard(start)
+    return blocked
+
+def congestion_costs(congestion, start, goal):
+    # 혼잡장 -> {혼잡한 셀: 진입 추가 비용} (혼잡장이 없으면 빈 dict). 출발/목표 셀은 비용을 매기지 않는다
+    if congestion is None:
+        return {}
+    costs = congestion.penalties(CONGESTION_AVOID, CONGESTION_AVOID_EXIT, CONGESTION_WEIGHT, CONGESTION_PENALTY_CAP)
+    costs.pop(start, None)
+    costs.pop(goal, None)
+    return costs
+
+# 아래 탐색들은 cached_a_star_path와 같은 인터페이스 (congestion_cost = congestion_costs()의 결과)
+def hpa_path(start, goal, current_time, cell_blocked, congestion_cost, current_agv_id=None, reserved_cells=None):
+    # 계층 탐색은 막힌 출입구를 MAX_REPAIRS번까지만 우회해 보므로, 못 찾으면 셀 격자 A*로 확인한다
+    # (정적 맵에서 갈 수 없는 목표는 경로 캐시가 바로 알려 준다).
+    # 혼잡 비용은 클러스터 안 구간을 이을 때만 반영한다 (어느 클러스터를 지날지는 정적 거리로 정한다)
+    if manhattan(start, goal) < HPA_FLAT_DISTANCE:
+        return a_star_search(start, goal, current_time, cell_blocked, congestion_cost, current_agv_id, reserved_cells)
+    blocked = blocked_cells(start, current_time, cell_blocked, current_agv_id, reserved_cells)
+    path = get_cluster_graph().find_path(start, goal, blocked.__contains__, congestion_cost)
+    if path is None and get_path_cache().free_path(start, goal) is not None:
+        path = a_star_search(start, goal, current_time, cell_blocked, congestion_cost, current_agv_id, reserved_cells)
+    return path
+
+def jps_path(start, goal, current_time, cell_blocked, congestion_cost, current_agv_id=None, reserved_cells=None,
+             counters=None):
+    # JPS는 셀 비용이 모두 같을 때만 맞다. 찾은 최단 경로가 혼잡한 셀을 지나지 않으면 그 경로가 최소 비용 경로이고
+    # (어느 경로든 비용 >= 길이), 지나면 비용을 더한 A*로 다시 찾는다
+    blocked = blocked_cells(start, current_time, cell_blocked, current_agv_id, reserved_cells)
+    path = jump_point_search(get_jump_table(), start, goal, blocked, counters)
+    if path is not None and congestion_cost and any(cell in congestion_cost for cell in path[1:]):
+        path = a_star_search(start, goal, current_time, cell_blocked, congestion_cost, current_agv_id, reserved_cells,
+                             counters=counters)
+    return path
+
+def dstar_planner(planners, key, start, goal, counters=None):
+    # key의 D* Lite 탐색 상태. 목표나 맵이 바뀌었으면 새로 만든다
+    planner = planners.get(key) if planners is not None else None
+    if planner is None or planner.goal != goal or planner.version != MAP_VERSION:
+        planner = DStarLite(get_adjacency(), start, goal, MAP_VERSION)
+        if planners is not None:
+            planners[key] = planner
+    elif counters is not None:
+        counters["replans"] = counters.get("replans", 0) + 1
+    return planner
+
+def dstar_path(start, goal, current_time, cell_blocked, congestion_cost, current_agv_id=None, reserved_cells=None,
+               planners=None, counters=None):
+    # planners: AGV id -> DStarLite (Simulation마다 따로). 같은 AGV가 같은 목표를 다시 물으면 이전 탐색을 고쳐 쓴다.
+    # 혼잡 비용은 셀 진입 비용으로 그대로 넣는다 (바뀐 셀만 다시 계산).
+    # counters: replans(이전 탐색을 이어 쓴 질의 수), touched(다시 계산/처리한 셀 수 합계)
+    blocked = blocked_cells(start, current_time, cell_blocked, current_agv_id, reserved_cells)
+    planner = dstar_planner(planners, current_agv_id, start, goal, counters)
+    path = planner.plan(start, blocked, congestion_cost)
+    if counters is not None:
+        counters["touched"] = counters.get("touched", 0) + planner.touched
+    return path
+
+SEARCH_FUNCTIONS = {"flat": cached_a_star_path, "hpa": hpa_path, "jps": jps_path, "dstar": dstar_path}
+
+def get_start_position(i):
+    return START_CELLS[i % len(START_CELLS)]
+
+# 목적지 선정 함수 – 후보군에서 이미 낮은 ID가 예약한 좌표는 제외
+def find_nearest_exit(sim, pos, current_agv_id=None):
+    if pos in exit_coords:
+        return pos
+    candidates = []
+    for ex in exit_coords:
+        if is_cell_busy(sim, ex, 1) or sim.reservations.is_parked(ex, current_agv_id):
+            continue
+        if ex in sim.target_reservations:
+            reserved_id = sim.target_reservations[ex]
+            # 이미 낮은 id가 예약한 경우 후보에서 제외
+            if reserved_id < current_agv_id:
+                continue
+        candidates.append(ex)
+    if candidates:
+        chosen = min(candidates, key=lambda e: abs(pos[0]-e[0]) + abs(pos[1]-e[1]))
+        sim.target_reservations[chosen] = current_agv_id
+        return chosen
+    else:
+        chosen = min(exit_coords, key=lambda e: abs(pos[0]-e[0]) + abs(pos[1]-e[1]))
+        if sim.target_reservations.get(chosen, current_agv_id) >= current_agv_id:
+            sim.target_reservations[chosen] = current_agv_id
+        return chosen
+
+def find_nearest_shelf(sim, pos, current_agv_id=None):
+    if pos in shelf_coords:
+        return pos
+    candidates = []
+    for sh in shelf_coords:
+        if is_cell_busy(sim, sh, 0) or sim.reservations.is_parked(sh, current_agv_id):
+            continue
+        if sh in sim.target_reservations:
+            reserved_id = sim.target_reservations[sh]
+            if reserved_id < current_agv_id:
+                continue
+        candidates.append(sh)
+    if candidates:
+        chosen = min(candidates, key=lambda s: abs(pos[0]-s[0]) + abs(pos[1]-s[1]))
+        sim.target_reservations[chosen] = current_agv_id
+        return chosen
+    else:
+        chosen = min(shelf_coords, key=lambda s: abs(pos[0]-s[0]) + abs(pos[1]-s[1]))
+        if sim.target_reservations.get(chosen, current_agv_id) >= current_agv_id:
+            sim.target_reservations[chosen] = current_agv_id
+        return chosen
+
+################################
+# 점유 인덱스 (셀 -> AGV)
+################################
+class WatchedDict(dict):
+    # 값이 실제로 바뀔 때 on_change(key)를 부르는 dict (RESERVED_CELLS / TARGET_RESERVATIONS)
+    __slots__ = ("on_change",)
+    _missing = object()
+
+    def __init__(self, data=(), on_change=None):
+        super().__init__(data)
+        self.on_change = on_change
+
+    def __setitem__(self, key, value):
+        if self.on_change is None:
+            super().__setitem__(key, value)
+        elif self.get(key, self._missing) != value:
+            super().__setitem__(key, value)
+            self.on_change(key)
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        if self.on_change is not None:
+            self.on_change(key)
+
+class OccupancyIndex:
+    # AGV가 셀에 들어오거나 나갈 때만 갱신되는 셀 -> AGV 인덱스.
+    # 이동 중인 AGV는 도착할 때까지 출발 셀과 도착 셀을 모두 점유한다.
+    # on_change(cell): 셀의 점유자나 점유자의 적재 상태가 바뀔 때 (event 대기 모드에서 잠든 AGV를 깨운다)
+    def __init__(self, on_change=None):
+        self.cells = defaultdict(set)
+        self.agv_cells = defaultdict(set)
+        self.cargo_counts = defaultdict(int)   # (셀, cargo) -> AGV 수
+        self.on_change = on_change
+
+    def enter(self, agv, cell):
+        if cell in self.agv_cells[agv]:
+            return
+        self.cells[cell].add(agv)
+        self.agv_cells[agv].add(cell)
+        self.cargo_counts[(cell, agv.cargo)] += 1
+        if self.on_change is not None:
+            self.on_change(cell)
+
+    def leave(self, agv, cell):
+        if cell not in self.agv_cells[agv]:
+            return
+        self.agv_cells[agv].discard(cell)
+        occupants = self.cells[cell]
+        occupants.discard(agv)
+        if not occupants:
+            del self.cells[cell]
+        self._decrement(cell, agv.cargo)
+        if self.on_change is not None:
+            self.on_change(cell)
+
+    def change_cargo(self, agv, old_cargo, new_cargo):
+        for cell in self.agv_cells[agv]:
+            self._decrement(cell, old_cargo)
+            self.cargo_counts[(cell, new_cargo)] += 1
+            if self.on_change is not None:
+                self.on_change(cell)
+
+    def _decrement(self, cell, cargo):
+        key = (cell, cargo)
+        self.cargo_counts[key] -= 1
+        if self.cargo_counts[key] <= 0:
+            del self.cargo_counts[key]
+
+    def occupants(self, cell):
+        return self.cells.get(cell, ())
+
+    def is_occupied(self, cell, exclude=None):
+        occupants = self.cells.get(cell)
+        if not occupants:
+            return False
+        if exclude is not None and exclude in occupants:
+            return len(occupants) > 1
+        return True
+
+    def has_cargo(self, cell, cargo, exclude=None):
+        count = self.cargo_counts.get((cell, cargo), 0)
+        if exclude is not None and exclude.cargo == cargo and cell in self.agv_cells[exclude]:
+            count -= 1
+        return count > 0
+
+################################
+# AGV / 통계
+################################
+class WaitJitter:
+    # AGV마다 따로 두는 대기 jitter 난수열. event 모드는 건너뛴 polling 시각을 미리 계산하므로
+    # 앞으로 뽑을 값을 먼저 볼 수 있어야 하고 (peek), 실제로 지나간 polling 수만큼만 소비한다 (take)
+    __slots__ = ("rng", "ahead")
+
+    def __init__(self, seed):
+        self.rng = random.Random(seed)
+        self.ahead = deque()
+
+    def peek(self, i):
+        while len(self.ahead) <= i:
+            self.ahead.append(self.rng.random())
+        return self.ahead[i]
+
+    def take(self, n):
+        for _ in range(n):
+            if self.ahead:
+                self.ahead.popleft()
+            else:
+                self.rng.random()
+
+class AGV:
+    # 대수가 많아도 가볍도록 __slots__ 레코드 (인스턴스 dict 없음).
+    # 경로는 리스트 + 현재 셀 인덱스로 들고, 한 칸 이동하면 인덱스만 늘린다 (앞에서 pop(0) 하지 않음).
+    __slots__ = ("id", "env", "start_pos", "_pos", "route", "route_index", "_cargo", "occupancy", "pickup_time",
+                 "arrival_time", "last_pos", "stuck_steps", "leg_start", "leg_wait", "move_from", "move_to",
+                 "depart_time", "arrive_time", "activity", "jitter")
+
+    def __init__(self, agv_id, start_pos, env=None):
+        self.id = agv_id
+        self.env = env
+        self.start_pos = (float(start_pos[0]), float(start_pos[1]))
+        self._pos = (float(start_pos[0]), float(start_pos[1]))
+        self.route = []
+        self.route_index = 0
+        self._cargo = 0
+        self.occupancy = None
+        self.pickup_time = None
+        self.arrival_time = 0
+        self.last_pos = self._pos
+        self.stuck_steps = 0
+        # 구간(선반<->출구) 단위 대기/이동 시간 집계용
+        self.leg_start = 0
+        self.leg_wait = 0.0
+        # "edge" 이동 중인 구간: (출발 좌표, 도착 셀, 출발 시각, 도착 시각)
+        self.move_from = None
+        self.move_to = None
+        self.depart_time = None
+        self.arrive_time = None
+        # 진행 중인 동작 (스냅샷 복원 시 이어서 끝낸다)
+        # ("pick" | "drop", 시작 시각, 끝 시각) / ("move", 출발 셀, 도착 셀, 도착 시각) / None
+        self.activity = None
+        # 막혔을 때 재시도 간격의 jitter. 전역 난수와 따로 두어야 event 모드가 건너뛴 polling도 poll 모드와 같은 값을 쓴다
+        self.jitter = WaitJitter(random.getrandbits(64))
+
+    @property
+    def pos(self):
+        # 이동 중이면 출발/도착 시각으로부터 현재 위치를 보간해서 돌려준다
+        if self.move_to is None or self.env is None:
+            return self._pos
+        now = self.env.now
+        if now >= self.arrive_time:
+            return self.move_to
+        span = self.arrive_time - self.depart_time
+        frac = (now - self.depart_time) / span if span > 0 else 1.0
+        return (self.move_from[0] + (self.move_to[0] - self.move_from[0]) * frac,
+                self.move_from[1] + (self.move_to[1] - self.move_from[1]) * frac)
+
+    @pos.setter
+    def pos(self, value):
+        self._pos = value
+        self.move_from = None
+        self.move_to = None
+
+    @property
+    def path(self):
+        # 남은 경로 (현재 셀부터). 스냅샷/조회용 복사본이라 이동 루프에서는 next_cell/destination을 쓴다
+        return self.route[self.route_index:]
+
+    @path.setter
+    def path(self, value):
+        self.route = value if value is not None else []
+        self.route_index = 0
+
+    @property
+    def next_cell(self):
+        i = self.route_index + 1
+        return self.route[i] if i < len(self.route) else None
+
+    @property
+    def destination(self):
+        return self.route[-1] if self.route_index < len(self.route) else None
+
+    def advance_path(self):
+        if self.route_index < len(self.route):
+            self.route_index += 1
+
+    @property
+    def cargo(self):
+        return self._cargo
+
+    @cargo.setter
+    def cargo(self, value):
+        if self.occupancy is not None and value != self._cargo:
+            self.occupancy.change_cargo(self, self._cargo, value)
+        self._cargo = value
+
+    @property
+    def state_flags(self):
+        # 방송용 상태 비트: 1 = 적재 중, 2 = 이동 중, 4 = 적재/하역 작업 중
+        flags = 1 if self._cargo else 0
+        if self.activity is not None:
+            flags |= 2 if self.activity[0] == "move" else 4
+        return flags
+
+    def begin_move(self, next_cell, depart_time, arrive_time):
+        self.move_from = self.pos
+        self.move_to = (float(next_cell[0]), float(next_cell[1]))
+        self.depart_time = depart_time
+        self.arrive_time = arrive_time
+
+################################
+# 스트리밍 통계 (값을 쌓아 두지 않는 집계)
+################################
+class RunningMoments:
+    # Welford 방식 평균/분산 + 합계/최솟값/최댓값. 값 개수와 무관하게 크기가 일정하다
+    __slots__ = ("n", "mean", "m2", "total", "min", "max")
+
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def add(self, x):
+        self.n += 1
+        delta = x - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (x - self.mean)
+        self.total += x
+        self.min = x if self.min is None or x < self.min else self.min
+        self.max = x if self.max is None or x > self.max else self.max
+
+    @property
+    def variance(self):
+        return self.m2 / (self.n - 1) if self.n > 1 else 0.0
+
+    @property
+    def stdev(self):
+        return self.variance ** 0.5
+
+    def summary(self):
+        return {"n": self.n, "mean": self.total / self.n if self.n else 0, "std": self.stdev,
+                "min": self.min, "max": self.max}
+
+class FixedHistogram:
+    # 폭 width인 구간 bins개 (넘는 값은 마지막 구간). 분위수는 구간 안에서 선형 보간
+    __slots__ = ("width", "counts", "n")
+
+    def __init__(self, width=None, bins=None):
+        self.width = width or HISTOGRAM_WIDTH
+        self.counts = array("q", bytes(8 * (bins or HISTOGRAM_BINS)))
+        self.n = 0
+
+    def add(self, x):
+        self.counts[min(max(int(x / self.width), 0), len(self.counts) - 1)] += 1
+        self.n += 1
+
+    def quantile(self, q):
+        if self.n == 0:
+            return None
+        rank = q * self.n
+        seen = 0
+        for i, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                return (i + (rank - seen) / count) * self.width
+            seen += count
+        return len(self.counts) * self.width
+
+    def quantiles(self, qs=QUANTILES):
+        return {f"p{round(q * 100)}": self.quantile(q) for q in qs}
+
+class SeriesRing:
+    # 초 -> 누적 값 시계열의 최근 capacity초만 들고 있는 고정 크기 링 버퍼 (dict처럼 []/get/items).
+    # record_stats가 초 단위로 차례로 쓴다. 건너뛴 초는 직전 값으로 채운다
+    __slots__ = ("capacity", "values", "origin", "start", "end")
+
+    def __init__(self, capacity=None):
+        self.capacity = capacity or SERIES_CAPACITY
+        self.values = array("q")
+        self.origin = None      # 첫 기록 초 (링 인덱스 기준)
+        self.start = 0          # 보관 중인 가장 오래된 초
+        self.end = 0            # 마지막 기록 초 + 1
+
+    def _slot(self, t):
+        return (t - self.origin) % self.capacity
+
+    def __setitem__(self, t, value):
+        if self.origin is None:
+            self.origin = self.start = self.end = t
+        if t < self.start:
+            return
+        while self.end <= t:
+            fill = value if self.end == t else self.values[self._slot(self.end - 1)]
+            if len(self.values) < self.capacity:
+                self.values.append(fill)
+            else:
+                self.values[self._slot(self.end)] = fill
+            self.end += 1
+        self.values[self._slot(t)] = value
+        self.start = max(self.start, self.end - self.capacity)
+
+    def get(self, t, default=None):
+        return self.values[self._slot(t)] if self.start <= t < self.end else default
+
+    def __contains__(self, t):
+        return self.start <= t < self.end
+
+    def __len__(self):
+        return self.end - self.start
+
+    def items(self):
+        return ((t, self.values[self._slot(t)]) for t in range(self.start, self.end))
+
+class DeliveryLog:
+    # (배송 완료 시각, 사이클 시간 또는 None)의 최근 capacity건만 두 array에 담는 링 버퍼 (None은 nan으로 저장)
+    __slots__ = ("capacity", "times", "durations", "head")
+
+    def __init__(self, capacity=None):
+        self.capacity = capacity or DELIVERY_LOG_CAPACITY
+        self.times = array("d")
+        self.durations = array("d")
+        self.head = 0           # 가득 찬 뒤 다음에 덮어쓸 위치 (= 가장 오래된 항목)
+
+    def append(self, item):
+        t, duration = item
+        duration = math.nan if duration is None else duration
+        if len(self.times) < self.capacity:
+            self.times.append(t)
+            self.durations.append(duration)
+            return
+        self.times[self.head] = t
+        self.durations[self.head] = duration
+        self.head = (self.head + 1) % self.capacity
+
+    def extend(self, items):
+        for item in items:
+            self.append(item)
+
+    def __len__(self):
+        return len(self.times)
+
+    def __iter__(self):
+        n = len(self.times)
+        for i in range(n):
+            j = (self.head + i) % n
+            d = self.durations[j]
+            yield self.times[j], None if d != d else d
+
+class EventLog:
+    # 선택 사항: 원시 이벤트를 CSV 한 줄씩 파일로 남긴다 (event,time,agv_id,value1,value2).
+    # pick / drop(사이클 시간) / leg(대기, 이동) - 메모리에는 쌓지 않는다
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, "a", buffering=1 << 16)
+
+    def write(self, event, t, agv_id, *values):
+        self.file.write(",".join([event, repr(t), str(agv_id)] + ["" if v is None else repr(v) for v in values])
+                        + "\n")
+
+    def close(self):
+        if not self.file.closed:
+            self.file.close()
+
+class AgvStats:
+    # AGV 1대의 통계: 배송 수와 사이클/대기/이동 시간의 스트리밍 집계
+    __slots__ = ("count", "times", "wait_times", "travel_times")
+
+    def __init__(self):
+        self.count = 0
+        self.times = RunningMoments()
+        self.wait_times = RunningMoments()
+        self.travel_times = RunningMoments()
+
+    def summary(self):
+        return {"count": self.count, "cycle": self.times.summary(), "wait": self.wait_times.summary(),
+                "travel": self.travel_times.summary()}
+
+class Stats:
+    # 실행 길이와 무관하게 크기가 일정한 통계. event_log 경로를 주면 원시 이벤트를 파일로도 남긴다
+    def __init__(self, event_log=None):
+        self.delivered_count = 0
+        self.delivered_record = SeriesRing()
+        self.delivered_history = {}
+        self.delivery_log = DeliveryLog()   # (배송 완료 시각, 사이클 시간 또는 None)
+        self.agv_stats = defaultdict(AgvStats)
+        self.histograms = {"cycle": FixedHistogram(), "wait": FixedHistogram(), "travel": FixedHistogram()}
+        self.wait_counters = {"waits": 0, "wakeups": 0, "timer_wakeups": 0, "polls_avoided": 0}
+        self.plan_counters = {"plans": 0, "failed": 0, "expansions": 0}
+        self.event_log = EventLog(event_log) if event_log is not None else None
+
+    def close(self):
+        if self.event_log is not None:
+            self.event_log.close()
+
+class PollWaiter:
+    # 잠든 AGV 하나. poll 모드였다면 깨어났을 시각 (since + 간격1 + 간격2 ...)을 필요한 만큼만 늘려 가며 계산한다.
+    # 간격은 poll 모드와 같은 순서로 더하고 jitter도 같은 값을 쓰므로 시각이 부동소수까지 같다
+    __slots__ = ("agv", "event", "key", "cells", "interval", "jitter", "delays", "ticks", "passed", "settled",
+                 "wake_j", "keys")
+
+    def __init__(self, agv, event, key, cells, since, interval, jitter):
+        self.agv = agv
+        self.event = event
+        self.key = key
+        self.cells = cells
+        self.interval = interval
+        self.jitter = jitter
+        self.delays = [0.0]
+        self.ticks = [since]
+        self.passed = 0       # 이미 지나간 (poll 모드라면 처리된) 마지막 polling 번호
+        self.settled = 0      # AGV 상태 (대기 시간, stuck, jitter 소비)에 반영한 마지막 polling 번호
+        self.wake_j = None    # 깨어나기로 예약한 polling 번호
+        self.keys = ()
+
+    def tick(self, j):
+        # j번째 polling 시각 (0 = 대기 시작)
+        while len(self.ticks) <= j:
+            n = len(self.ticks)
+            if self.jitter:
+                low, high = self.interval - self.jitter, self.interval + self.jitter
+                delay = low + (high - low) * self.agv.jitter.peek(n - 1 - self.settled)
+            else:
+                delay = self.interval
+            self.delays.append(delay)
+            self.ticks.append(self.ticks[-1] + delay)
+        return self.ticks[j]
+
+    def first_tick_from(self, at):
+        # at 이후 (at 포함) 첫 polling 번호
+        j = 1
+        while self.tick(j) < at:
+            j += 1
+        return j
+
+class Simulation:
+    # 시뮬레이션 1회분의 상태 (AGV, 통계, 예약 정보)를 한 곳에 묶는다.
+    # 분석 실행과 라이브 실행이 서로의 AGV/예약을 보지 않도록 실행마다 따로 만든다.
+    def __init__(self, env, agvs, sim_duration, stats=None, move_mode=MOVE_MODE,
+                 reserved_cells=None, target_reservations=None,
+                 wait_mode=WAIT_MODE, wait_priority=WAIT_PRIORITY, planner=PLANNER, search=None, congestion=None):
+        search = search or PATH_SEARCH
+        congestion = CONGESTION_FIELD if congestion is None else congestion
+        if move_mode not in MOVE_MODES:
+            raise ValueError(f"move_mode must be one of {MOVE_MODES}")
+        if wait_mode not in WAIT_MODES:
+            raise ValueError(f"wait_mode must be one of {WAIT_MODES}")
+        if wait_priority not in WAIT_PRIORITIES:
+            raise ValueError(f"wait_priority must be one of {WAIT_PRIORITIES}")
+        if planner not in PLANNERS:
+            raise ValueError(f"planner must be one of {PLANNERS}")
+        if search not in PATH_SEARCHES:
+            raise ValueError(f"search must be one of {PATH_SEARCHES}")
+        self.env = env
+        self.agvs = agvs
+        for agv in agvs:
+            agv.env = env
+        self.sim_duration = sim_duration
+        self.stats = stats if stats is not None else Stats()
+        self.move_mode = move_mode
+        # 픽업/하역한 셀을 잠시 막아 두는 표는 AGV마다 따로 (ver4 원본의 AGV 프로세스별 cell_blocked = {}와 같게).
+        # 공유하면 다른 AGV가 막 작업한 선반/출구가 목표로 잡혔을 때 경로 탐색이 실패한다
+        self.cell_blocked = {agv.id: {} for agv in agvs}
+        self.wait_mode = wait_mode
+        self.wait_priority = wait_priority
+        event_mode = wait_mode == "event"
+        # polling 차례: (시각, 우선순위 키, 순번, PollWaiter, polling 번호) 힙. 같은 시각에 걸린 차례마다
+        # WAIT_TICK_PRIORITY timeout 하나를 두고, 그 시각의 다른 이벤트를 모두 처리한 뒤 우선순위 순으로 하나씩 깨운다
+        self._ticks = []
+        self._tick_times = set()
+        self._tick_seq = 0
+        self._tick_cursor = (-math.inf, ())   # 마지막으로 깨운 (시각, 우선순위 키)
+        # event 모드: 키 -> 그 키가 바뀌면 깨워야 하는 PollWaiter (dict를 순서 있는 집합으로 씀)
+        #   ("cell", 셀): 점유/RESERVED_CELLS, ("reserved", 셀): RESERVED_CELLS, ("target", 셀): TARGET_RESERVATIONS,
+        #   "goal": 목표 선택 입력 (TARGET_RESERVATIONS, 선반/출구 점유), "plan": "goal" + RESERVED_CELLS 전체,
+        #   "table": 예약 테이블
+        self._watchers = defaultdict(dict)
+        self._sleeping = {}    # 대기 중인 PollWaiter (스냅샷 때 지나간 polling을 반영하려고)
+        # 경로 탐색 실패 기억: AGV id -> (출발, 목표, 닿을 수 있는 영역을 막은 셀, 그중 cell_blocked가 가장 먼저 풀리는 시각).
+        # 막은 셀의 RESERVED_CELLS가 바뀌거나 그 시각이 되기 전까지는 같은 탐색을 다시 돌리지 않는다
+        self.failed_plans = {}
+        self._failure_cells = defaultdict(set)   # 막은 셀 -> 그 셀에 막힌 실패 기억을 가진 AGV id
+        self.goal_cells = set(shelf_coords) | set(exit_coords)
+        self.occupancy = OccupancyIndex(on_change=self._occupancy_changed if event_mode else None)
+        for agv in agvs:
+            agv.occupancy = self.occupancy
+            self.occupancy.enter(agv, to_cell(agv.pos))
+        self.reserved_cells = WatchedDict(reserved_cells or {}, self._reserved_changed)
+        self.target_reservations = WatchedDict(target_reservations or {},
+                                               self._target_changed if event_mode else None)
+        self.wait_counters = self.stats.wait_counters
+        self.planner = planner
+        self.search = search
+        self.path_search = SEARCH_FUNCTIONS[search]
+        if search == "dstar":
+            self.path_search = partial(dstar_path, planners={}, counters=self.stats.plan_counters)
+        self.plan_counters = self.stats.plan_counters
+        # 실행 하나의 모든 탐색이 같이 읽고 쓰는 혼잡장 (끄면 예전처럼 탐색마다 빈 dict)
+        self.congestion = CongestionField(env, ROWS, COLS, CONGESTION_HALF_LIFE, CONGESTION_FLOOR) if congestion else None
+        self.reservations = ReservationTable(on_change=self._table_changed if event_mode else None)
+        if planner == "reservation":
+            for agv in agvs:
+                self.reservations.reserve(to_cell(agv.pos), env.now, float("inf"), agv.id)
+
+    def start(self):
+        process = agv_process_reserved if self.planner == "reservation" else agv_process
+        for agv in self.agvs:
+            if agv.activity is not None:
+                # 스냅샷에서 복원된 AGV: 하던 동작을 마저 끝내고 평소 루프로 들어간다
+                self.env.process(resume_agv(self, agv, process))
+            else:
+                self.env.process(process(self, agv))
+        self.env.process(record_stats(self.env, self.sim_duration, self.stats))
+        self.env.process(record_interval_stats(self.env, self.sim_duration, self.stats))
+
+    def _wait_key(self, agv):
+        if self.wait_priority == "loaded_first":
+            return (-agv.cargo, agv.id)
+        if self.wait_priority == "fifo":
+            return (agv.arrival_time, agv.id)
+        return (agv.id,)
+
+    def plan_path(self, agv, start, goal):
+        self.plan_counters["plans"] += 1
+        now = self.env.now
+        failed = self.failed_plans.get(agv.id)
+        if failed is not None and failed[0] == start and failed[1] == goal and now < failed[3]:
+            # 지난번에 닿을 수 있는 영역을 막고 있던 셀이 그대로다 - 다시 찾아도 실패
+            self.plan_counters["failed"] += 1
+            return None
+        self._forget_failure(agv.id)
+        blocked = self.cell_blocked[agv.id]
+        path = self.path_search(start, goal, now, blocked, congestion_costs(self.congestion, start, goal),
+                                current_agv_id=agv.id, reserved_cells=self.reserved_cells)
+        if path is None:
+            self.plan_counters["failed"] += 1
+            frontier = blocked_frontier(start, goal, now, blocked, agv.id, self.reserved_cells)
+            if frontier is not None:
+                until = min((blocked[cell] for cell in frontier if blocked.get(cell, 0) > now), default=math.inf)
+                self.failed_plans[agv.id] = (start, goal, frontier, until)
+                for cell in frontier:
+                    self._failure_cells[cell].add(agv.id)
+        return path
+
+    def _forget_failure(self, agv_id):
+        failed = self.failed_plans.pop(agv_id, None)
+        if failed is not None:
+            for cell in failed[2]:
+                ids = self._failure_cells.get(cell)
+                if ids is not None:
+                    ids.discard(agv_id)
+                    if not ids:
+                        del self._failure_cells[cell]
+
+    def plan_reserved(self, agv, start, goal):
+        # 기존 예약을 풀고 start -> goal 경로를 SIPP로 찾아 예약한다. 실패하면 제자리 주차 예약을 되살린다.
+        now = self.env.now
+        self.plan_counters["plans"] += 1
+        self.reservations.release_agv(agv.id)
+        steps, expansions = sipp_path(self.reservations, agv.id, start, goal, now, 1.0 / MOVE_RATE)
+        self.plan_counters["expansions"] += expansions
+        if steps is None:
+            self.plan_counters["failed"] += 1
+            self.reservations.reserve(start, now, float("inf"), agv.id)
+            return None
+        self.reservations.reserve_steps(agv.id, start, steps, now)
+        return steps
+
+    def wait_for_cell(self, agv, cell, poll_interval, jitter=0.0):
+        # agv_process: cell(None이면 새 경로)을 기다리며 poll_interval(±jitter) 뒤에 루프를 다시 돈다.
+        # event 모드는 루프 한 바퀴가 읽는 상태가 그대로인 polling을 건너뛴다. 다음 셀의 점유/예약, 목적지 예약,
+        # (경로를 다시 찾는 바퀴라면) 경로 탐색 입력이 바뀌거나 stuck 처리 / cell_blocked 만료 시각이 되면
+        # 그 뒤 첫 polling 시각에 깨어나서, poll 모드와 같은 시각에 같은 판단을 한다.
+        # (혼잡장은 신호를 보내지 않는다 - 켜 두면 혼잡도 변화만으로 달라지는 경로는 다음 신호 때 반영된다)
+        keys, ticks, times = [], [], []
+        if self.wait_mode == "event":
+            dest = agv.destination
+            owner = self.target_reservations.get(dest) if dest is not None else agv.id
+            replan = owner is not None and owner < agv.id     # 다음 바퀴가 목적지를 다시 고른다
+            if dest is not None:
+                keys.append(("target", dest))
+                if owner is None or owner > agv.id:
+                    ticks.append(1)     # 다음 바퀴가 목적지 예약을 (다시) 쓴다
+            if cell is not None:
+                keys.append(("cell", cell))
+            if replan or agv.next_cell is None or agv.stuck_steps > STUCK_STEPS:
+                now = self.env.now
+                # 경로가 없어서 기다리는 중이면, 닿을 수 있는 영역을 막고 있는 셀의 예약이 풀리거나 목표가 바뀔 때만
+                # 다시 찾아볼 만하다 (그 밖의 예약 변화로는 계속 실패). 그 외에는 경로 탐색 입력 전체를 본다
+                failed = self.failed_plans.get(agv.id) if agv.next_cell is None else None
+                frontier = failed[2] if failed is not None and failed[0] == to_cell(agv.pos) else None
+                if frontier is not None:
+                    keys.append("goal")
+                    keys.extend(("reserved", blocked_cell) for blocked_cell in frontier)
+                else:
+                    keys.append("plan")
+                expiry = min((t for t in self.cell_blocked[agv.id].values() if t > now), default=None)
+                if expiry is not None:
+                    times.append(expiry)
+            if agv.stuck_steps <= STUCK_STEPS:
+                ticks.append(STUCK_STEPS + 1 - agv.stuck_steps)
+        return self._wait(agv, (cell,), poll_interval, jitter, keys, ticks, times)
+
+    def wait_for_plan(self, agv, goals, poll_interval):
+        # agv_process_reserved: 예약 경로를 못 찾았을 때. event 모드는 예약 테이블이나 목표 후보(goals 점유,
+        # TARGET_RESERVATIONS)가 바뀌거나 다른 AGV의 예약 구간이 끝나는 시각 뒤 첫 polling에 깨어난다
+        keys, times = [], []
+        if self.wait_mode == "event":
+            keys = ["plan", "table"]
+            now = self.env.now
+            end = min((iv[1] for ivs in self.reservations.intervals.values() for iv in ivs
+                       if now < iv[1] < math.inf and iv[2] != agv.id), default=None)
+            if end is not None:
+                times.append(end)
+        return self._wait(agv, goals, poll_interval, 0.0, keys, (), times)
+
+    def add_congestion(self, agv, cells, waited, at=None):
+        # 기다린 시간만큼 AGV가 서 있던 셀과, 특정 셀 하나(다음 셀 등)를 기다렸다면 그 셀에도 혼잡도를 쌓는다.
+        # at: 더한 시각 (지나간 polling을 나중에 반영할 때 그 사이 식은 만큼 덜 더한다)
+        if self.congestion is None or waited <= 0:
+            return
+        self.congestion.add(to_cell(agv.pos), waited, at)
+        if len(cells) == 1 and cells[0] is not None:
+            self.congestion.add(cells[0], waited, at)
+
+    def _wait(self, agv, cells, poll_interval, jitter, keys, ticks, times):
+        env = self.env
+        since = env.now
+        waiter = PollWaiter(agv, env.event(), self._wait_key(agv), cells, since, poll_interval, jitter)
+        self._sleeping[waiter] = None
+        if self.wait_mode == "poll":
+            self._wake_at(waiter, 1)
+        else:
+            self.wait_counters["waits"] += 1
+            waiter.keys = keys
+            for key in keys:
+                self._watchers[key][waiter] = None
+            for j in ticks:
+                self._wake_at(waiter, j)
+            for at in times:
+                self._wake_at(waiter, waiter.first_tick_from(at))
+        j = yield waiter.event
+        del self._sleeping[waiter]
+        # 마지막 한 번의 stuck 카운트는 루프가 올린다
+        self._settle(waiter, j, j - 1)
+
+    def _settle(self, waiter, j, stuck_until):
+        # 지나간 polling waiter.settled+1 .. j번을 poll 모드와 똑같이 AGV에 반영한다 (stuck은 stuck_until번까지)
+        agv = waiter.agv
+        settled = waiter.settled
+        if j <= settled:
+            return
+        for i in range(settled + 1, j + 1):
+            agv.leg_wait += waiter.delays[i]
+            self.add_congestion(agv, waiter.cells, waiter.delays[i], waiter.ticks[i])
+        if waiter.jitter:
+            agv.jitter.take(j - settled)
+        agv.stuck_steps += stuck_until - settled
+        if self.wait_mode == "event":
+            self.wait_counters["polls_avoided"] += stuck_until - settled
+        waiter.settled = j
+
+    def settle_waits(self):
+        # 스냅샷 직전: 자고 있는 AGV마다 poll 모드라면 이미 처리됐을 polling을 상태에 반영한다
+        # (복원하면 모두 루프 처음부터 다시 판단하므로, poll 모드에서 찍은 스냅샷과 같아야 한다)
+        for waiter in self._sleeping:
+            if not waiter.event.triggered:
+                j = self._first_pending(waiter) - 1
+                self._settle(waiter, j, j)
+
+    def _wake_at(self, waiter, j, timer=True):
+        if waiter.wake_j is not None and waiter.wake_j <= j:
+            return
+        waiter.wake_j = j
+        at = waiter.tick(j)
+        self._tick_seq += 1
+        heapq.heappush(self._ticks, (at, waiter.key, self._tick_seq, waiter, j, timer))
+        if at not in self._tick_times:
+            self._tick_times.add(at)
+            event = PriorityTimeout(self.env, delay_until(self.env.now, at), WAIT_TICK_PRIORITY)
+            event.callbacks.append(self._dispatch_tick)
+
+    def _dispatch_tick(self, event):
+        # 지금 시각에 걸린 polling 차례 중 우선순위가 가장 높은 하나를 깨운다. 깨어난 AGV가 같은 시각에 한 일을
+        # 모두 처리한 뒤 다음 차례를 깨우도록, 남은 차례는 timeout을 새로 걸어 넘긴다
+        now = self.env.now
+        self._tick_times.discard(now)
+        ticks = self._ticks
+        while ticks and ticks[0][0] <= now:
+            at, key, _, waiter, j, timer = heapq.heappop(ticks)
+            if waiter.wake_j != j or waiter.event.triggered:
+                continue
+            self._tick_cursor = (at, key)
+            for watched in waiter.keys:
+                waiters = self._watchers[watched]
+                del waiters[waiter]
+                if not waiters:
+                    del self._watchers[watched]
+            if self.wait_mode == "event":
+                self.wait_counters["timer_wakeups" if timer else "wakeups"] += 1
+            waiter.event.succeed(j)
+            if ticks and ticks[0][0] <= now:
+                self._tick_times.add(now)
+                event = PriorityTimeout(self.env, 0, WAIT_TICK_PRIORITY)
+                event.callbacks.append(self._dispatch_tick)
+            return
+
+    def _signal(self, key):
+        # key가 바뀌었다: 그 키를 보고 있는 AGV마다 poll 모드라면 아직 처리되지 않았을 첫 polling에 깨운다
+        waiters = self._watchers.get(key)
+        if not waiters:
+            return
+        now = self.env.now
+        for waiter in waiters:
+            if waiter.wake_j is not None and waiter.ticks[waiter.wake_j - 1] < now:
+                continue    # 이미 지나가지 않은 첫 polling에 깨우기로 되어 있다
+            self._wake_at(waiter, self._first_pending(waiter), timer=False)
+
+    def _first_pending(self, waiter):
+        # poll 모드라면 아직 처리되지 않았을 첫 polling 번호
+        now = self.env.now
+        cursor = self._tick_cursor
+        j = waiter.passed + 1
+        while True:
+            at = waiter.tick(j)
+            if at > now or (at == now and (at, waiter.key) > cursor):
+                waiter.passed = j - 1
+                return j
+            j += 1
+
+    def _occupancy_changed(self, cell):
+        self._signal(("cell", cell))
+        if cell in self.goal_cells:
+            self._signal("goal")
+            self._signal("plan")
+
+    def _reserved_changed(self, cell):
+        for agv_id in list(self._failure_cells.get(cell, ())):
+            self._forget_failure(agv_id)
+        if self.wait_mode == "event":
+            self._signal(("cell", cell))
+            self._signal(("reserved", cell))
+            self._signal("plan")
+
+    def _target_changed(self, cell):
+        self._signal(("target", cell))
+        self._signal("goal")
+        self._signal("plan")
+
+    def _table_changed(self):
+        self._signal("table")
+
+def create_simulation(env, agv_count, sim_duration, move_mode=MOVE_MODE,
+                      wait_mode=WAIT_MODE, wait_priority=WAIT_PRIORITY, planner=PLANNER, event_log=None, search=None,
+                      congestion=None):
+    agvs = [AGV(i, get_start_position(i)) for i in range(agv_count)]
+    sim = Simulation(env, agvs, sim_duration, stats=Stats(event_log), move_mode=move_mode,
+                     wait_mode=wait_mode, wait_priority=wait_priority, planner=planner, search=search,
+                     congestion=congestion)
+    sim.start()
+    return sim
+
+def compute_simulation_result(stats, sim_duration, agv_count):
+    # AGV별 값 목록 대신 요약(개수/평균/표준편차/최소/최대)과 전체 분위수만 내보낸다.
+    # delivered_record / delivery_log는 보관 한도(SERIES_CAPACITY, DELIVERY_LOG_CAPACITY) 안의 최근 구간
+    final_agv_stats = {}
+    for agv_id, data in stats.agv_stats.items():
+        final_agv_stats[agv_id] = data.summary()
+        final_agv_stats[agv_id]["avg_time"] = final_agv_stats[agv_id]["cycle"]["mean"]
+        final_agv_stats[agv_id]["utilization"] = data.times.total / sim_duration if sim_duration > 0 else 0
+    res = {"end_time": sim_duration, "delivered_count": stats.delivered_count,
+           "delivered_history": stats.delivered_history, "delivered_record": dict(stats.delivered_record.items()),
+           "delivery_log": list(stats.delivery_log),
+           "agv_stats": final_agv_stats, "agv_count": agv_count, "wait_counters": dict(stats.wait_counters),
+           "plan_counters": dict(stats.plan_counters),
+           "quantiles": {name: hist.quantiles() for name, hist in stats.histograms.items()}}
+    delivered_counts = res["delivered_count"]
+    throughput = delivered_counts / sim_duration * 3600
+    delivered_per_agv = delivered_counts / agv_count
+    result = {"throughput_per_hour": throughput, "delivered_per_agv": delivered_per_agv,
+              "avg_cycle": statistics.mean([d["avg_time"] for d in final_agv_stats.values()]) if final_agv_stats else 0,
+              "avg_wait": statistics.mean([d["wait"]["mean"] for d in final_agv_stats.values()]) if final_agv_stats else 0,
+              "avg_travel": statistics.mean([d["travel"]["mean"] for d in final_agv_stats.values()]) if final_agv_stats else 0}
+    res.update(result)
+    return res
+
+def compute_single_run_result(stats, sim_duration, agv_count):
+    base = compute_simulation_result(stats, sim_duration, agv_count)
+    return {"end_time": base["end_time"], "delivered_count": base["delivered_count"],
+            "throughput_per_hour": base["throughput_per_hour"], "delivered_per_agv": base["delivered_per_agv"],
+            "avg_cycle": base["avg_cycle"], "avg_wait": base["avg_wait"],
+            "avg_travel": base["avg_travel"], "wait_counters": base["wait_counters"],
+            "plan_counters": base["plan_counters"], "analysis_type": "single"}
+
+################################
+# SimPy 프로세스
+################################
+def finish_leg(agv, env, stats):
+    # 선반/출구에 도착한 시점에 직전 구간의 대기 시간과 이동 시간(대기 포함)을 기록
+    if agv.leg_start >= WARMUP_PERIOD:
+        data = stats.agv_stats[agv.id]
+        travel = env.now - agv.leg_start
+        data.wait_times.add(agv.leg_wait)
+        data.travel_times.add(travel)
+        stats.histograms["wait"].add(agv.leg_wait)
+        stats.histograms["travel"].add(travel)
+        if stats.event_log is not None:
+            stats.event_log.write("leg", env.now, agv.id, agv.leg_wait, travel)
+
+def start_leg(agv, env):
+    agv.leg_start = env.now
+    agv.leg_wait = 0.0
+
+def do_pick(agv, env, stats, cell_blocked):
+    now = env.now
+    finish_leg(agv, env, stats)
+    cell_blocked[agv.pos] = now + 10
+    agv.activity = ("pick", now, now + 10)
+    yield env.timeout(10)
+    finish_pick(agv, env, stats, now)
+
+def finish_pick(agv, env, stats, started):
+    agv.activity = None
+    agv.cargo = 1
+    if started >= WARMUP_PERIOD:
+        agv.pickup_time = started
+    stats.agv_stats[agv.id].count += 1
+    if stats.event_log is not None:
+        stats.event_log.write("pick", env.now, agv.id)
+    start_leg(agv, env)
+
+def do_drop(agv, env, stats, cell_blocked):
+    start_drop = env.now
+    finish_leg(agv, env, stats)
+    cell_blocked[agv.pos] = start_drop + 10
+    agv.activity = ("drop", start_drop, start_drop + 10)
+    yield env.timeout(10)
+    finish_drop(agv, env, stats)
+
+def finish_drop(agv, env, stats):
+    agv.activity = None
+    drop_finish = env.now
+    duration = None
+    if agv.pickup_time is not None:
+        duration = drop_finish - agv.pickup_time
+        stats.agv_stats[agv.id].times.add(duration)
+        stats.histograms["cycle"].add(duration)
+        agv.pickup_time = None
+    agv.cargo = 0
+    stats.delivered_count += 1
+    stats.delivery_log.append((drop_finish, duration))
+    if stats.event_log is not None:
+        stats.event_log.write("drop", drop_finish, agv.id, duration)
+    start_leg(agv, env)
+
+ARRIVAL_PRIORITY = NORMAL + 1
+WAIT_TICK_PRIORITY = ARRIVAL_PRIORITY + 1
+
+class PriorityTimeout(Timeout):
+    # priority를 지정하는 timeout (simpy Timeout은 항상 NORMAL)
+    def __init__(self, env, delay, priority):
+        self.env = env
+        self.callbacks = []
+        self._value = None
+        self._delay = delay
+        self._ok = True
+        env.schedule(self, priority, delay)
+
+class Arrival(PriorityTimeout):
+    # 셀 도착 timeout. 같은 시각의 보통 이벤트를 모두 처리한 뒤에 처리된다.
+    # step은 도착 직전에, edge는 출발할 때 도착 이벤트를 걸어서 (time, priority, 순번) 중 순번이 다르지만,
+    # 도착끼리만 같은 priority를 쓰므로 같은 시각의 처리 순서는 두 모드가 같다
+    def __init__(self, env, delay):
+        super().__init__(env, delay, ARRIVAL_PRIORITY)
+
+def move_step(agv, env, next_cell):
+    # 기존 방식: STEP_SIZE마다 위치를 갱신
+    current_pos = agv.pos
+    dx = next_cell[0] - current_pos[0]
+    dy = next_cell[1] - current_pos[1]
+    distance = (dx**2 + dy**2)**0.5
+    num_steps = int(distance / STEP_SIZE)
+    remaining = distance - num_steps * STEP_SIZE
+    agv.activity = ("move", to_cell(current_pos), tuple(next_cell), env.now + distance)
+    for i in range(num_steps):
+        current_pos = (current_pos[0] + STEP_SIZE * dx / distance, current_pos[1] + STEP_SIZE * dy / distance)
+        if i == num_steps - 1 and remaining <= 0:
+            yield Arrival(env, STEP_SIZE)
+        else:
+            yield env.timeout(STEP_SIZE)
+        agv.pos = current_pos
+    if remaining > 0:
+        current_pos = (current_pos[0] + remaining * dx / distance, current_pos[1] + remaining * dy / distance)
+        yield Arrival(env, remaining)
+        agv.pos = current_pos
+    agv.activity = None
+
+def step_arrival(current_pos, next_cell, now):
+    # move_step이 도착하는 시각. STEP_SIZE씩 같은 순서로 더하므로 부동소수 누적 오차까지 같다
+    # (도착 시각이 정수로 떨어지지 않음)
+    dx = next_cell[0] - current_pos[0]
+    dy = next_cell[1] - current_pos[1]
+    distance = (dx**2 + dy**2)**0.5
+    num_steps = int(distance / STEP_SIZE)
+    for _ in range(num_steps):
+        now += STEP_SIZE / MOVE_RATE
+    remaining = distance - num_steps * STEP_SIZE
+    if remaining > 0:
+        now += remaining / MOVE_RATE
+    return now
+
+def delay_until(now, at):
+    # now + delay가 정확히 at이 되는 delay (at - now는 반올림 때문에 1ulp 어긋날 수 있다)
+    delay = at - now
+    while delay > 0 and now + delay > at:
+        delay = math.nextafter(delay, 0.0)
+    while now + delay < at:
+        delay = math.nextafter(delay, math.inf)
+    return delay
+
+def move_edge(agv, env, next_cell):
+    # 셀 하나 이동 = 이벤트 1개. 중간 위치는 agv.pos 조회 시 보간된다.
+    # 도착 시각은 step과 같은 누적 시각이고 Arrival priority로 처리 순서도 같아서, 같은 시드면 "step"과 결과가 같다
+    current_pos = agv.pos
+    depart = env.now
+    arrive_time = step_arrival(current_pos, next_cell, depart)
+    agv.begin_move(next_cell, depart, arrive_time)
+    agv.activity = ("move", to_cell(current_pos), tuple(next_cell), arrive_time)
+    if arrive_time > depart:
+        yield Arrival(env, delay_until(depart, arrive_time))
+    agv.activity = None
+
+def agv_process(sim, agv):
+    env = sim.env
+    stats = sim.stats
+    sim_duration = sim.sim_duration
+    cell_blocked = sim.cell_blocked[agv.id]
+    reserved_cells = sim.reserved_cells
+    target_reservations = sim.target_reservations
+    move = move_edge if sim.move_mode == "edge" else move_step
+    while env.now < sim_duration:
+        # 동적 목적지 재할당: 만약 이미 정해진 경로의 최종 목적지(dest)가 TARGET_RESERVATIONS에 등록되어 있고,
+        # 그 예약이 자신보다 낮은(우선순위 높은) AGV에 의한 것이라면 재할당
+        current_cell = to_cell(agv.pos)
+        dest = agv.destination
+        if dest is not None:
+            if dest in target_reservations:
+                if target_reservations[dest] < agv.id:
+                    # 다른 AGV(우선순위 높음)가 해당 목적지를 예약한 상태이므로 재할당
+                    if agv.cargo == 0:
+                        new_target = find_nearest_shelf(sim, current_cell, agv.id)
+                    else:
+                        new_target = find_nearest_exit(sim, current_cell, agv.id)
+                    new_path = sim.plan_path(agv, current_cell, new_target)
+                    if new_path and len(new_path) > 1:
+                        agv.path = new_path
+                    else:
+                        agv.path = []
+                else:
+                    target_reservations[dest] = agv.id
+
+        pos = agv.pos
+        if abs(pos[0] - agv.last_pos[0]) < 0.001 and abs(pos[1] - agv.last_pos[1]) < 0.001:
+            agv.stuck_steps += 1
+        else:
+            agv.stuck_steps = 0
+        agv.last_pos = pos
+        current_cell = to_cell(pos)
+        if agv.stuck_steps > STUCK_STEPS:
+            agv.path = []
+            reserved_cells[current_cell] = agv.id
+        # 하역: cargo==1이면 출구로 이동
+        if agv.cargo == 1 and current_cell in exit_coords:
+            available_exit = find_nearest_exit(sim, current_cell, agv.id)
+            if available_exit != current_cell:
+                new_path = sim.plan_path(agv, current_cell, available_exit)
+                if new_path and len(new_path) > 1:
+                    agv.path = new_path
+                yield from sim.wait_for_cell(agv, None, 0.1)
+                continue
+        # 적재: cargo==0이고 현재 위치가 적재 구역
+        if agv.cargo == 0 and current_cell in shelf_coords:
+            busy = sim.occupancy.has_cargo(current_cell, 0, exclude=agv)
+            if busy:
+                new_target = find_nearest_shelf(sim, current_cell, agv.id)
+                if new_target != current_cell:
+                    new_path = sim.plan_path(agv, current_cell, new_target)
+                    if new_path and len(new_path) > 1:
+                        agv.path = new_path
+                    yield from sim.wait_for_cell(agv, None, 0.1)
+                    continue
+            yield env.process(do_pick(agv, env, stats, cell_blocked))
+            target = find_nearest_exit(sim, current_cell, agv.id)
+            new_path = sim.plan_path(agv, current_cell, target)
+            if new_path and len(new_path) > 1:
+                agv.path = new_path
+            yield env.timeout(random.uniform(0.5, 1.5))
+            continue
+        if agv.next_cell is None:
+            if agv.cargo == 0:
+                target = find_nearest_shelf(sim, current_cell, agv.id)
+                path = sim.plan_path(agv, current_cell, target)
+                agv.path = path if path is not None else []
+            else:
+                target = find_nearest_exit(sim, current_cell, agv.id)
+                path = sim.plan_path(agv, current_cell, target)
+                agv.path = path if path is not None else []
+        next_cell = agv.next_cell
+        if next_cell is not None:
+            if sim.occupancy.is_occupied(next_cell, exclude=agv) or (next_cell in reserved_cells and reserved_cells[next_cell] != agv.id):
+                yield from sim.wait_for_cell(agv, next_cell, 0.2, jitter=0.1)
+                continue
+            if next_cell not in reserved_cells:
+                reserved_cells[next_cell] = agv.id
+            from_cell = to_cell(agv.pos)
+            sim.occupancy.enter(agv, next_cell)
+            yield from move(agv, env, next_cell)
+            agv.pos = (float(next_cell[0]), float(next_cell[1]))
+            if from_cell != next_cell:
+                sim.occupancy.leave(agv, from_cell)
+            agv.arrival_time = env.now
+            if next_cell in reserved_cells and reserved_cells[next_cell] == agv.id:
+                del reserved_cells[next_cell]
+            # stuck 처리로 잡아 둔 출발 셀 예약은 떠날 때 푼다 (남겨 두면 그 셀을 지나는 경로가 계속 막힌다)
+            if reserved_cells.get(from_cell) == agv.id:
+                del reserved_cells[from_cell]
+            agv.advance_path()
+        else:
+            yield from sim.wait_for_cell(agv, None, 0.1)
+        current_int_cell = to_cell(agv.pos)
+        if agv.cargo == 0 and current_int_cell in shelf_coords:
+            busy = sim.occupancy.has_cargo(current_int_cell, 0, exclude=agv)
+            if busy:
+                new_target = find_nearest_shelf(sim, current_int_cell, agv.id)
+                if new_target != current_int_cell:
+                    new_path = sim.plan_path(agv, current_int_cell, new_target)
+                    if new_path and len(new_path) > 1:
+                        agv.path = new_path
+                    yield from sim.wait_for_cell(agv, None, 0.1)
+                    continue
+            yield env.process(do_pick(agv, env, stats, cell_blocked))
+            target = find_nearest_exit(sim, current_int_cell, agv.id)
+            new_path = sim.plan_path(agv, current_int_cell, target)
+            if new_path and len(new_path) > 1:
+                agv.path = new_path
+            yield env.timeout(random.uniform(0.5, 1.5))
+        elif agv.cargo == 1 and current_int_cell in exit_coords:
+            available_exit = find_nearest_exit(sim, current_int_cell, agv.id)
+            if available_exit != current_int_cell:
+                new_path = sim.plan_path(agv, current_int_cell, available_exit)
+                if new_path and len(new_path) > 1:
+                    agv.path = new_path
+                yield from sim.wait_for_cell(agv, None, 0.1)
+                continue
+            yield env.process(do_drop(agv, env, stats, cell_blocked))
+            target = find_nearest_shelf(sim, current_int_cell, agv.id)
+            new_path = sim.plan_path(agv, current_int_cell, target)
+            if new_path and len(new_path) > 1:
+                agv.path = new_path
+            yield env.timeout(random.uniform(0.5, 1.5))
+
+################################
+# 시공간 예약 플래너 (SIPP)
+################################
+class ReservationTable:
+    # 셀 -> [(시작, 끝, agv_id)] 점유 구간 (시작 시각 기준 정렬).
+    # 셀 c에서 다음 셀로 이동하는 AGV는 다음 셀에 도착할 때까지 c를 점유하므로 맞바꾸기(swap) 충돌도 막힌다.
+    # 끝이 inf인 구간은 그 셀에 주차 중이라는 뜻이며, 다시 계획할 때 풀린다.
+    # on_change(): 예약이 늘거나 풀릴 때 (event 대기 모드에서 잠든 AGV를 깨운다)
+    def __init__(self, on_change=None):
+        self.intervals = defaultdict(list)
+        self.agv_cells = defaultdict(set)
+        self.on_change = on_change
+
+    def reserve(self, cell, start, end, agv_id):
+        bisect.insort(self.intervals[cell], (start, end, agv_id))
+        self.agv_cells[agv_id].add(cell)
+        if self.on_change is not None:
+            self.on_change()
+
+    def reserve_steps(self, agv_id, start_cell, steps, now):
+        enter = now
+        cell = start_cell
+        for from_cell, to_cell_, depart, arrive in steps:
+            self.reserve(from_cell, enter, arrive, agv_id)
+            enter = depart
+            cell = to_cell_
+        self.reserve(cell, enter, float("inf"), agv_id)
+
+    def is_parked(self, cell, agv_id):
+        # 다른 AGV가 이 셀에 주차(끝이 inf인 예약) 중인지
+        for start, end, owner in self.intervals.get(cell, ()):
+            if end == float("inf") and owner != agv_id:
+                return True
+        return False
+
+    def release_agv(self, agv_id):
+        for cell in self.agv_cells.pop(agv_id, ()):
+            kept = [iv for iv in self.intervals[cell] if iv[2] != agv_id]
+            if kept:
+                self.intervals[cell] = kept
+            else:
+                del self.intervals[cell]
+        if self.on_change is not None:
+            self.on_change()
+
+    def safe_intervals(self, cell, now, agv_id, co_located_ok=False):
+        # now 이후 다른 AGV가 점유하지 않는 구간 목록 [(시작, 끝)]
+        # co_located_ok: 출발 셀에 이미 같이 서 있는 AGV(시작 시각 <= now)는 무시
+        ivs = self.intervals.get(cell)
+        result = []
+        t = now
+        if ivs:
+            live = [iv for iv in ivs if iv[1] > now]
+            if len(live) != len(ivs):
+                if live:
+                    self.intervals[cell] = live
+                else:
+                    del self.intervals[cell]
+            for start, end, owner in live:
+                if owner == agv_id or (co_located_ok and start <= now):
+                    continue
+                if start > t:
+                    result.append((t, start))
+                t = max(t, end)
+        if t < float("inf"):
+            result.append((t, float("inf")))
+        return result
+
+def sipp_path(table, agv_id, start, goal, now, move_time):
+    # Safe Interval Path Planning. 상태 = (셀, 안전 구간 번호), 값 = 가장 이른 도착 시각.
+    # goal에서는 끝이 inf인 안전 구간에 도착해야 (계속 머무를 수 있어야) 성공.
+    # 반환: ([(from_cell, to_cell, 출발 시각, 도착 시각)], 확장한 노드 수) / 실패 시 (None, 확장 수)
+    inf = float("inf")
+    field = get_distance_fields().field(goal)
+    if field is not None:
+        dist, cols = field.dist, field.cols
+        def heuristic(cell):
+            d = dist[cell[0] * cols + cell[1]]
+            return None if d < 0 else d * move_time
+    else:
+        def heuristic(cell):
+            return manhattan(cell, goal) * move_time
+    adjacency = get_adjacency()
+    intervals = {start: table.safe_intervals(start, now, agv_id, co_located_ok=True)}
+    if not intervals[start] or intervals[start][0][0] > now + RESERVATION_EPS:
+        return None, 0
+    h0 = heuristic(start)
+    if h0 is None:
+        return None, 0
+    open_set = [(now + h0, now, start, 0)]
+    best = {(start, 0): now}
+    parent = {(start, 0): None}
+    expansions = 0
+    while open_set:
+        f, t, cell, idx = heapq.heappop(open_set)
+        state = (cell, idx)
+        if t > best[state] + RESERVATION_EPS:
+            continue
+        expansions += 1
+        if expansions > SIPP_MAX_EXPANSIONS:
+            break
+        interval_end = intervals[cell][idx][1]
+        if cell == goal and interval_end == inf:
+            steps = []
+            while parent[state] is not None:
+                prev_state, depart = parent[state]
+                steps.append((prev_state[0], state[0], depart, best[state]))
+                state = prev_state
+            steps.reverse()
+            return steps, expansions
+        for neighbor in adjacency[cell]:
+            h = heuristic(neighbor)
+            if h is None:
+                continue
+            if neighbor not in intervals:
+                intervals[neighbor] = table.safe_intervals(neighbor, now, agv_id)
+            for j, (safe_start, safe_end) in enumerate(intervals[neighbor]):
+                depart = max(t, safe_start)
+                arrive = depart + move_time
+                # 현재 셀의 안전 구간 안에 다음 셀 도착까지 끝나야 한다 (이후 구간은 더 늦으므로 중단)
+                if arrive > interval_end + RESERVATION_EPS:
+                    break
+                if arrive >= safe_end:
+                    continue
+                key = (neighbor, j)
+                if arrive < best.get(key, inf) - RESERVATION_EPS:
+                    best[key] = arrive
+                    parent[key] = (state, depart)
+                    heapq.heappush(open_set, (arrive + h, arrive, neighbor, j))
+    return None, expansions
+
+def agv_process_reserved(sim, agv):
+    # "reservation" 플래너용 AGV 프로세스: 목적지까지 전체 경로를 예약한 뒤 예약 시각대로 이동한다.
+    # 예약이 겹치지 않으므로 이동 중에는 점유 검사/랜덤 대기가 필요 없다.
+    env = sim.env
+    stats = sim.stats
+    move = move_edge if sim.move_mode == "edge" else move_step
+    while env.now < sim.sim_duration:
+        current_cell = to_cell(agv.pos)
+        if agv.cargo == 0 and current_cell in shelf_coords:
+            yield env.process(do_pick(agv, env, stats, sim.cell_blocked[agv.id]))
+            yield env.timeout(random.uniform(0.5, 1.5))
+        elif agv.cargo == 1 and current_cell in exit_coords:
+            yield env.process(do_drop(agv, env, stats, sim.cell_blocked[agv.id]))
+            yield env.timeout(random.uniform(0.5, 1.5))
+        if agv.cargo == 0:
+            target = find_nearest_shelf(sim, current_cell, agv.id)
+        else:
+            target = find_nearest_exit(sim, current_cell, agv.id)
+        steps = sim.plan_reserved(agv, current_cell, target)
+        if not steps:
+            # 목적지 후보가 모두 다른 AGV 차지이거나 경로가 막힘 - 예약 테이블/목표 후보가 바뀔 때까지 대기
+            goals = shelf_coords if agv.cargo == 0 else exit_coords
+            yield from sim.wait_for_plan(agv, goals, 0.1)
+            continue
+        agv.path = [current_cell] + [step[1] for step in steps]
+        for from_cell, next_cell, depart, arrive in steps:
+            delay = depart - env.now
+            if delay > RESERVATION_EPS:
+                agv.leg_wait += delay
+                yield env.timeout(delay)
+                sim.add_congestion(agv, (), delay)
+            sim.occupancy.enter(agv, next_cell)
+            yield from move(agv, env, next_cell)
+            agv.pos = (float(next_cell[0]), float(next_cell[1]))
+            agv.arrival_time = env.now
+            sim.occupancy.leave(agv, from_cell)
+            agv.advance_path()
+
+def record_stats(env, sim_duration, stats):
+    # 초 단위 정각에 기록 (스냅샷에서 복원해 중간 시각부터 시작해도 같은 눈금)
+    if env.now != int(env.now):
+        yield env.timeout(int(env.now) + 1 - env.now)
+    while env.now < sim_duration:
+        stats.delivered_record[int(env.now)] = stats.delivered_count
+        yield env.timeout(1)
+
+def record_interval_stats(env, sim_duration, stats):
+    t = (int(env.now // CHECK_INTERVAL) + 1) * CHECK_INTERVAL
+    while t <= sim_duration:
+        yield env.timeout(t - env.now)
+        stats.delivered_history[t] = stats.delivered_count
+        t += CHECK_INTERVAL
+
+################################
+# 분석 실행 (Flask/eventlet 없이 실행 가능)
+################################
+def run_one_sim_analysis(agv_count, sim_duration, move_mode=MOVE_MODE, planner=PLANNER, seed=None, event_log=None,
+                         should_stop=None):
+    # should_stop()이 참이면 (STOP_CHECK_INTERVAL sim초마다 확인) 중간에 멈추고 None을 돌려준다
+    if seed is not None:
+        random.seed(seed)
+    env = Environment()
+    sim = create_simulation(env, agv_count, sim_duration, move_mode=move_mode, planner=planner, event_log=event_log)
+    if should_stop is None:
+        env.run(until=sim_duration)
+    else:
+        while env.now < sim_duration:
+            env.run(until=min(sim_duration, env.now + STOP_CHECK_INTERVAL))
+            if should_stop():
+                sim.stats.close()
+                return None
+    sim.stats.close()
+    result = compute_simulation_result(sim.stats, sim_duration, agv_count)
+    return result
+
+################################
+# 스냅샷 / 복원 / 포크
+################################
+SNAPSHOT_VERSION = 5      # 2: 통계가 스트리밍 집계 객체 (AgvStats, SeriesRing, DeliveryLog, FixedHistogram)
+                          # 3: 맵이 격자(np.uint8) + 선반/출구/시작 셀 층
+                          # 4: cell_blocked가 AGV id -> 막힌 셀 dict
+                          # 5: AGV마다 대기 jitter 난수열 (jitter)
+AGV_FIELDS = ("id", "start_pos", "_pos", "path", "_cargo", "pickup_time", "arrival_time", "last_pos",
+              "stuck_steps", "leg_start", "leg_wait", "move_from", "move_to", "depart_time", "arrive_time", "activity",
+              "jitter")
+
+def snapshot_simulation(sim):
+    # 실행 중인 시뮬레이션 전체 상태 (시계, AGV, 예약, 통계, 난수 상태, 맵)를 압축된 바이너리로 만든다.
+    # SimPy 프로세스(제너레이터)는 직렬화할 수 없으므로 각 AGV의 진행 중 동작(agv.activity)을 저장하고,
+    # 복원 시 그 동작을 마저 끝낸 뒤 프로세스 루프를 새로 시작한다. 셀 대기열은 저장하지 않는다
+    # (복원 직후에는 아무도 기다리지 않고 각 AGV가 루프 처음에서 다시 판단한다).
+    # event 모드에서 건너뛰고 있던 polling은 먼저 반영해서 poll 모드에서 찍은 스냅샷과 같게 만든다.
+    sim.settle_waits()
+    stats = sim.stats
+    layout = current_map()
+    state = {
+        "version": SNAPSHOT_VERSION, "now": sim.env.now, "sim_duration": sim.sim_duration,
+        "move_mode": sim.move_mode, "wait_mode": sim.wait_mode, "wait_priority": sim.wait_priority,
+        "planner": sim.planner, "search": sim.search, "rng": random.getstate(),
+        "map": layout.grid, "map_digest": layout.digest, "shelves": layout.shelves,
+        "exits": layout.exits, "starts": layout.starts,
+        "agvs": [{name: getattr(agv, name) for name in AGV_FIELDS} for agv in sim.agvs],
+        "cell_blocked": {agv_id: dict(blocked) for agv_id, blocked in sim.cell_blocked.items()},
+        "reserved_cells": dict(sim.reserved_cells),
+        "target_reservations": dict(sim.target_reservations),
+        "congestion": sim.congestion.export() if sim.congestion is not None else None,
+        "congestion_hot": sorted(sim.congestion.hot) if sim.congestion is not None else [],
+        "reservations": {cell: list(ivs) for cell, ivs in sim.reservations.intervals.items()},
+        "stats": {"delivered_count": stats.delivered_count, "delivered_record": stats.delivered_record,
+                  "delivered_history": dict(stats.delivered_history), "delivery_log": stats.delivery_log,
+                  "agv_stats": dict(stats.agv_stats), "histograms": stats.histograms,
+                  "wait_counters": dict(stats.wait_counters), "plan_counters": dict(stats.plan_counters)},
+    }
+    return zlib.compress(pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL))
+
+def load_snapshot(blob):
+    state = pickle.loads(zlib.decompress(blob))
+    if state.get("version") != SNAPSHOT_VERSION:
+        raise ValueError(f"unsupported snapshot version {state.get('version')}")
+    return state
+
+def restore_simulation(blob, make_env=Environment, sim_duration=None, seed=None, start=True, horizon=None):
+    # 스냅샷에서 시뮬레이션을 다시 만든다. make_env(initial_time=...)로 환경을 만든다
+    # (예: 실시간이면 lambda initial_time: AdjustableRealtimeEnvironment(initial_time, factor, strict=False)).
+    # seed를 주면 저장된 난수 상태 대신 새 시드로 이어간다 (포크마다 다른 미래).
+    # horizon을 주면 스냅샷 시각 + horizon까지 돌린다.
+    state = load_snapshot(blob)
+    if horizon is not None:
+        sim_duration = state["now"] + horizon
+    if state["map_digest"] != map_digest():
+        set_map(WarehouseMap(state["map"], state["shelves"], state["exits"], state["starts"],
+                             digest=state["map_digest"]))
+    env = make_env(initial_time=state["now"])
+    agvs = []
+    for data in state["agvs"]:
+        agv = AGV(data["id"], data["start_pos"])
+        for name in AGV_FIELDS:
+            setattr(agv, name, data[name])
+        agvs.append(agv)
+    stats = Stats()
+    saved = state["stats"]
+    stats.delivered_count = saved["delivered_count"]
+    stats.delivered_record = saved["delivered_record"]
+    stats.delivered_history.update(saved["delivered_history"])
+    stats.delivery_log = saved["delivery_log"]
+    stats.agv_stats.update(saved["agv_stats"])
+    stats.histograms = saved["histograms"]
+    stats.wait_counters.update(saved["wait_counters"])
+    stats.plan_counters.update(saved["plan_counters"])
+    sim = Simulation(env, agvs, sim_duration if sim_duration is not None else state["sim_duration"],
+                     stats=stats, move_mode=state["move_mode"], reserved_cells=state["reserved_cells"],
+                     target_reservations=state["target_reservations"], wait_mode=state["wait_mode"],
+                     wait_priority=state["wait_priority"], planner=state["planner"], search=state.get("search"),
+                     congestion=(state["congestion"] is not None) if "congestion" in state else None)
+    if state.get("congestion") is not None:
+        sim.congestion.load(state["congestion"], state.get("congestion_hot", ()))
+    for agv_id, blocked in state["cell_blocked"].items():
+        sim.cell_blocked[agv_id].update(blocked)
+    # 이동 중이던 AGV는 출발 셀과 도착 셀을 모두 점유 중 (보간 위치로 잡힌 셀은 둘 중 하나)
+    for agv in agvs:
+        if agv.activity is not None and agv.activity[0] == "move":
+            sim.occupancy.enter(agv, agv.activity[1])
+            sim.occupancy.enter(agv, agv.activity[2])
+    # 생성자가 잡아 둔 주차 예약 대신 저장된 예약으로 (테이블 객체는 event 대기 신호 때문에 그대로 둔다)
+    sim.reservations.intervals.clear()
+    sim.reservations.agv_cells.clear()
+    for cell, ivs in state["reservations"].items():
+        for start_t, end_t, owner in ivs:
+            sim.reservations.reserve(cell, start_t, end_t, owner)
+    if seed is not None:
+        random.seed(seed)
+        for agv in agvs:
+            agv.jitter = WaitJitter(random.getrandbits(64))
+    else:
+        random.setstate(state["rng"])
+    if start:
+        sim.start()
+    return sim
+
+def stop_environment(env):
+    # 다른 그린렛에서 돌고 있는 env.run()을 현재 시각에서 끝낸다 (일시정지/교체용)
+    event = env.event()
+    event.callbacks.append(StopSimulation.callback)
+    event.succeed()
+
+def resume_agv(sim, agv, process):
+    # 스냅샷 시점에 진행 중이던 동작을 남은 시간만큼 마저 하고 평소 프로세스로 넘어간다
+    env = sim.env
+    activity = agv.activity
+    if activity[0] == "move":
+        _, from_cell, next_cell, arrive = activity
+        if arrive > env.now:
+            yield Arrival(env, delay_until(env.now, arrive))
+        agv.activity = None
+        agv.pos = (float(next_cell[0]), float(next_cell[1]))
+        if from_cell != next_cell:
+            sim.occupancy.leave(agv, from_cell)
+        agv.arrival_time = env.now
+        if sim.reserved_cells.get(next_cell) == agv.id:
+            del sim.reserved_cells[next_cell]
+        agv.advance_path()
+    else:
+        kind, started, end = activity
+        if end > env.now:
+            yield env.timeout(end - env.now)
+        if kind == "pick":
+            finish_pick(agv, env, sim.stats, started)
+        else:
+            finish_drop(agv, env, sim.stats)
+    yield from process(sim, agv)
+
+################################
+# 배속을 실행 중에 바꿀 수 있는 실시간 환경
+################################
+class AdjustableRealtimeEnvironment(RealtimeEnvironment):
+    # RealtimeEnvironment와 같지만 set_factor로 배속을 바로 바꿀 수 있다.
+    # 기준점 (sim 시각, wall 시각, factor)을 현재 시점으로 옮기기 때문에 시계가 튀지 않고,
+    # 다음 이벤트부터 새 factor로 진행한다. 환경/AGV/통계는 그대로 유지된다.
+    # 기준점은 튜플 하나로 바꿔서 다른 스레드/그린렛에서 호출해도 step이 섞인 값을 읽지 않는다.
+    def __init__(self, initial_time=0, factor=1.0, strict=True):
+        super().__init__(initial_time, factor, strict)
+        self._anchor = (self.env_start, self.real_start, factor)
+
+    @property
+    def factor(self):
+        return self._anchor[2]
+
+    def virtual_now(self, real_now=None):
+        # wall 시각 기준으로 sim 시계가 있어야 할 위치 (다음 이벤트를 기다리는 중이면 now보다 앞선다)
+        env_start, real_start, factor = self._anchor
+        real_now = time.monotonic() if real_now is None else real_now
+        return max(self.now, env_start + (real_now - real_start) / factor)
+
+    def set_factor(self, factor):
+        if factor <= 0:
+            raise ValueError("factor must be positive")
+        real_now = time.monotonic()
+        env_start = self.virtual_now(real_now)
+        self._anchor = (env_start, real_now, factor)
+        self.env_start, self.real_start, self._factor = self._anchor
+
+    def sync(self):
+        self.real_start = time.monotonic()
+        self.env_start = self.now
+        self._anchor = (self.env_start, self.real_start, self._anchor[2])
+
+    def step(self):
+        evt_time = self.peek()
+        if evt_time is Infinity:
+            raise EmptySchedule
+        env_start, real_start, factor = self._anchor
+        real_time = real_start + (evt_time - env_start) * factor
+        if self.strict and time.monotonic() - real_time > factor:
+            delta = time.monotonic() - real_time
+            raise RuntimeError(f'Simulation too slow for real time ({delta:.3f}s).')
+        # 짧게 나눠 자면서 매번 기준점을 다시 읽는다
+        while True:
+            env_start, real_start, factor = self._anchor
+            delta = real_start + (self.peek() - env_start) * factor - time.monotonic()
+            if delta <= 0:
+                break
+            time.sleep(min(delta, SPEED_SLICE))
+        Environment.step(self)
+
+################################
+# 헤드리스 최고속 실행 (실시간 환경 없이 돌리면서 일정 fps로 스냅샷)
+################################
+def snapshot_state(sim):
+    return {"sim_time": round(sim.env.now, 2), "delivered_count": sim.stats.delivered_count,
+            "agv_count": len(sim.agvs),
+            "agvs": [{"agv_id": agv.id, "location_x": agv.pos[0], "location_y": agv.pos[1], "flags": agv.state_flags}
+                     for agv in sim.agvs]}
+
+def congestion_heatmap(sim):
+    # UI 히트맵용으로 줄인 혼잡장 (CongestionField.heatmap 형식). 혼잡장을 끈 실행이면 None
+    if sim.congestion is None:
+        return None
+    return sim.congestion.heatmap(CONGESTION_HEATMAP_SIDE)
+
+def run_headless(sim, until, fps=HEADLESS_FPS, on_frame=None, poll_control=None):
+    # 일반 Environment를 이벤트 단위로 최대한 빨리 돌리고, wall-clock 1/fps초마다 on_frame(스냅샷)을 부른다.
+    # 스냅샷의 speed는 직전 프레임 구간에서 달성한 sim초/wall초.
+    # CONGESTION_HEATMAP_INTERVAL초마다 한 번은 스냅샷에 "congestion" (줄인 혼잡장)을 붙인다.
+    # poll_control()이 False를 돌려주면 멈춘다 (일시정지 등 대기는 poll_control 안에서 한다).
+    env = sim.env
+    start_wall = time.perf_counter()
+    start_sim = env.now
+    last_wall, last_sim = start_wall, start_sim
+    last_heatmap = None
+    events = 0
+    while env.peek() < until:
+        env.step()
+        events += 1
+        if events % HEADLESS_CHECK_EVENTS:
+            continue
+        now = time.perf_counter()
+        if poll_control is not None:
+            wait_start = now
+            if poll_control() is False:
+                break
+            now = time.perf_counter()
+            # 일시정지로 기다린 시간은 속도 계산에서 뺀다
+            start_wall += now - wait_start
+            last_wall += now - wait_start
+        if on_frame is not None and now - last_wall >= 1.0 / fps:
+            frame = snapshot_state(sim)
+            frame["speed"] = (env.now - last_sim) / (now - last_wall)
+            if sim.congestion is not None and (last_heatmap is None or now - last_heatmap >= CONGESTION_HEATMAP_INTERVAL):
+                frame["congestion"] = congestion_heatmap(sim)
+                last_heatmap = now
+            on_frame(frame)
+            last_wall, last_sim = now, env.now
+    else:
+        env.run(until=until)
+    wall = time.perf_counter() - start_wall
+    return {"sim_seconds": env.now - start_sim, "wall_seconds": wall, "events": events,
+            "speed": (env.now - start_sim) / wall if wall > 0 else 0.0}
+
+def headless_worker(agv_count, sim_duration, output_queue, control_queue, planner=PLANNER, fps=HEADLESS_FPS,
+                    seed=None):
+    # 서버가 별도 프로세스로 띄우는 최고속 라이브 실행.
+    # output_queue로 ("frame", 스냅샷) ... ("final", 결과) | ("error", 메시지)를 보내고,
+    # control_queue에서 "pause" / "resume" / "stop" / "snapshot"을 받는다 ("snapshot"이면 ("snapshot", blob) 전송).
+    state = {"paused": False, "sim": None}
+
+    def poll_control():
+        while True:
+            try:
+                msg = control_queue.get(block=state["paused"])
+            except queue.Empty:
+                return True
+            if msg == "stop":
+                return False
+            if msg == "snapshot":
+                output_queue.put(("snapshot", snapshot_simulation(state["sim"])))
+            if msg in ("pause", "resume"):
+                state["paused"] = msg == "pause"
+
+    try:
+        if seed is not None:
+            random.seed(seed)
+        env = Environment()
+        sim = create_simulation(env, agv_count, sim_duration, move_mode=MOVE_MODE, planner=planner)
+        state["sim"] = sim
+        timing = run_headless(sim, sim_duration, fps, lambda frame: output_queue.put(("frame", frame)), poll_control)
+        output_queue.put(("frame", dict(snapshot_state(sim), speed=timing["speed"], congestion=congestion_heatmap(sim))))
+        result = compute_single_run_result(sim.stats, env.now if env.now > 0 else sim_duration, agv_count)
+        result.update(timing)
+        result["analysis_type"] = "headless"
+        output_queue.put(("final", result))
+    except Exception as e:
+        output_queue.put(("error", str(e)))
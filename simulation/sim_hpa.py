@@ -0,0 +1,294 @@
+import heapq
+from collections import OrderedDict, deque
+
+################################
+# 상수 정의
+################################
+CLUSTER_SIZE = 16          # 클러스터 한 변 (셀)
+ENTRANCE_SPLIT = 6         # 경계의 연속 통로 구간이 이 길이 이상이면 양 끝 두 곳, 짧으면 가운데 한 곳을 출입구로
+REFINE_CACHE = 65536       # 클러스터 안 구간 (출입구 -> 출입구) 경로 캐시 크기
+MAX_REPAIRS = 8            # 막힌 셀 때문에 구간을 못 이으면 그 간선을 빼고 추상 탐색을 다시 하는 횟수
+
+################################
+# 계층 그래프 (HPA*)
+################################
+# 격자를 CLUSTER_SIZE 정사각형 클러스터로 나누고, 이웃 클러스터 경계의 통로 구간마다 출입구 셀 쌍을 둔다.
+# 추상 노드 = 출입구 셀, 간선 = 경계 건너기 (비용 1) + 같은 클러스터 안 출입구끼리 (클러스터 안 최단거리).
+# 질의는 시작/목표 셀을 자기 클러스터 출입구에 잠깐 잇고 추상 그래프에서 A* 한 뒤, 구간별로 클러스터 안에서만
+# 실제 경로를 잇는다 (처음 쓰일 때 계산해서 캐시). 정적 맵의 셀이 바뀌면 그 셀 주변 클러스터만 다시 계산한다.
+# 셀 진입 추가 비용(혼잡)을 주면 클러스터 안 구간만 그 비용으로 다시 잇는다 (추상 그래프는 정적 거리 그대로).
+class ClusterGraph:
+    def __init__(self, adjacency, rows, cols, size=None):
+        self.adjacency = adjacency
+        self.rows = rows
+        self.cols = cols
+        self.size = size or CLUSTER_SIZE
+        self.crows = (rows + self.size - 1) // self.size
+        self.ccols = (cols + self.size - 1) // self.size
+        self.transitions = {}      # (클러스터, 오른쪽/아래 클러스터) -> [(셀, 건너편 셀)]
+        self.inter = {}            # 출입구 셀 -> {건너편 출입구 셀}
+        self.intra = {}            # 클러스터 -> {출입구 셀: {같은 클러스터 출입구 셀: 거리}}
+        self.paths = OrderedDict()  # (출입구, 출입구) -> 클러스터 안 경로 (정적 맵 기준)
+        self.counters = {"queries": 0, "abstract_expansions": 0, "refined": 0, "cached": 0, "repairs": 0}
+        for cr in range(self.crows):
+            for cc in range(self.ccols):
+                for other in ((cr, cc + 1), (cr + 1, cc)):
+                    if other[0] < self.crows and other[1] < self.ccols:
+                        self._build_border((cr, cc), other)
+        for cr in range(self.crows):
+            for cc in range(self.ccols):
+                self._build_intra((cr, cc))
+
+    def cluster(self, cell):
+        return (cell[0] // self.size, cell[1] // self.size)
+
+    def bounds(self, cluster):
+        r0, c0 = cluster[0] * self.size, cluster[1] * self.size
+        return r0, min(r0 + self.size, self.rows), c0, min(c0 + self.size, self.cols)
+
+    def nodes(self, cluster):
+        return self.intra.get(cluster, {})
+
+    def describe(self):
+        return dict(self.counters, clusters=self.crows * self.ccols, size=self.size,
+                    nodes=sum(len(nodes) for nodes in self.intra.values()),
+                    edges=sum(len(edges) for nodes in self.intra.values() for edges in nodes.values()) // 2
+                    + sum(len(t) for t in self.transitions.values()), cached_paths=len(self.paths))
+
+    ################################
+    # 만들기 / 부분 갱신
+    ################################
+    def _build_border(self, a, b):
+        # a의 오른쪽(또는 아래) 경계와 b 사이의 통로 구간마다 출입구 셀 쌍
+        for cell, other in self.transitions.pop((a, b), ()):
+            self.inter[cell].discard(other)
+            self.inter[other].discard(cell)
+        r0, r1, c0, c1 = self.bounds(a)
+        if b[1] > a[1]:
+            pairs = [((r, c1 - 1), (r, c1)) for r in range(r0, r1)]
+        else:
+            pairs = [((r1 - 1, c), (r1, c)) for c in range(c0, c1)]
+        transitions = []
+        run = []
+        for cell, other in pairs + [(None, None)]:
+            if cell is not None and other in self.adjacency.get(cell, ()):
+                run.append((cell, other))
+                continue
+            if run:
+                if len(run) >= ENTRANCE_SPLIT:
+                    transitions += [run[0], run[-1]]
+                else:
+                    transitions.append(run[len(run) // 2])
+                run = []
+        self.transitions[(a, b)] = transitions
+        for cell, other in transitions:
+            self.inter.setdefault(cell, set()).add(other)
+            self.inter.setdefault(other, set()).add(cell)
+
+    def _build_intra(self, cluster):
+        nodes = self._cluster_nodes(cluster)
+        edges = {node: {} for node in nodes}
+        targets = set(nodes)
+        for node in nodes:
+            dist = self.local_bfs(node, cluster)
+            for other in targets:
+                if other != node and other in dist:
+                    edges[node][other] = dist[other]
+        self.intra[cluster] = edges
+
+    def _cluster_nodes(self, cluster):
+        cr, cc = cluster
+        nodes = set()
+        for key in (((cr, cc - 1), cluster), ((cr - 1, cc), cluster), (cluster, (cr, cc + 1)), (cluster, (cr + 1, cc))):
+            for cell, other in self.transitions.get(key, ()):
+                nodes.add(cell if self.cluster(cell) == cluster else other)
+        return sorted(nodes)
+
+    def update_cell(self, cell):
+        # cell의 통로/벽이 바뀐 뒤 (adjacency는 이미 고쳐진 상태) 그 클러스터와 맞닿은 경계/클러스터만 다시 계산
+        cluster = self.cluster(cell)
+        cr, cc = cluster
+        touched = {cluster}
+        for a, b in (((cr, cc - 1), cluster), ((cr - 1, cc), cluster), (cluster, (cr, cc + 1)), (cluster, (cr + 1, cc))):
+            if min(a + b) >= 0 and max(a[0], b[0]) < self.crows and max(a[1], b[1]) < self.ccols:
+                self._build_border(a, b)
+                touched.update((a, b))
+        for other in touched:
+            self._build_intra(other)
+        for key in [key for key in self.paths if self.cluster(key[0]) in touched]:
+            del self.paths[key]
+
+    ################################
+    # 클러스터 안 탐색
+    ################################
+    def local_bfs(self, start, cluster, blocked=None):
+        r0, r1, c0, c1 = self.bounds(cluster)
+        adjacency = self.adjacency
+        dist = {start: 0}
+        queue = deque([start])
+        while queue:
+            cell = queue.popleft()
+            d = dist[cell] + 1
+            for neighbor in adjacency.get(cell, ()):
+                if neighbor in dist or not (r0 <= neighbor[0] < r1 and c0 <= neighbor[1] < c1):
+                    continue
+                if blocked is not None and blocked(neighbor):
+                    continue
+                dist[neighbor] = d
+                queue.append(neighbor)
+        return dist
+
+    def local_path(self, start, goal, cluster, blocked=None, cost=None):
+        if cost:
+            return self.local_cheapest(start, goal, cluster, blocked, cost)
+        r0, r1, c0, c1 = self.bounds(cluster)
+        adjacency = self.adjacency
+        came_from = {start: None}
+        queue = deque([start])
+        while queue:
+            cell = queue.popleft()
+            if cell == goal:
+                path = []
+                while cell is not None:
+                    path.append(cell)
+                    cell = came_from[cell]
+                path.reverse()
+                return path
+            for neighbor in adjacency.get(cell, ()):
+                if neighbor in came_from or not (r0 <= neighbor[0] < r1 and c0 <= neighbor[1] < c1):
+                    continue
+                if blocked is not None and blocked(neighbor):
+                    continue
+                came_from[neighbor] = cell
+                queue.append(neighbor)
+        return None
+
+    def local_cheapest(self, start, goal, cluster, blocked, cost):
+        # 클러스터 안 최소 비용 경로 (셀 진입 비용 1 + cost.get(셀, 0), 다익스트라)
+        r0, r1, c0, c1 = self.bounds(cluster)
+        adjacency = self.adjacency
+        came_from = {start: None}
+        best = {start: 0}
+        queue = [(0, start)]
+        while queue:
+            d, cell = heapq.heappop(queue)
+            if cell == goal:
+                path = []
+                while cell is not None:
+                    path.append(cell)
+                    cell = came_from[cell]
+                path.reverse()
+                return path
+            if d > best[cell]:
+                continue
+            for neighbor in adjacency.get(cell, ()):
+                if not (r0 <= neighbor[0] < r1 and c0 <= neighbor[1] < c1):
+                    continue
+                if blocked is not None and blocked(neighbor):
+                    continue
+                nd = d + 1 + cost.get(neighbor, 0)
+                if nd < best.get(neighbor, float("inf")):
+                    best[neighbor] = nd
+                    came_from[neighbor] = cell
+                    heapq.heappush(queue, (nd, neighbor))
+        return None
+
+    def _segment(self, a, b, blocked, cost=None):
+        # 같은 클러스터 출입구 a -> b. 정적 경로를 캐시하고, 막힌 셀이나 추가 비용이 있는 셀이 끼면 다시 찾는다
+        key = (a, b)
+        path = self.paths.get(key)
+        if path is None:
+            path = self.local_path(a, b, self.cluster(a))
+            if path is None:
+                return None
+            self.paths[key] = path
+            if len(self.paths) > REFINE_CACHE:
+                self.paths.popitem(last=False)
+            self.counters["refined"] += 1
+        else:
+            self.paths.move_to_end(key)
+            self.counters["cached"] += 1
+        if (blocked is not None and any(blocked(cell) for cell in path[1:])) or \
+                (cost and any(cell in cost for cell in path[1:])):
+            return self.local_path(a, b, self.cluster(a), blocked, cost)
+        return path
+
+    ################################
+    # 질의
+    ################################
+    def find_path(self, start, goal, blocked=None, cost=None):
+        # blocked(cell) -> True면 지나갈 수 없는 셀 (시작 셀은 검사하지 않는다). 못 찾으면 None
+        # cost: {셀: 진입 추가 비용} - 클러스터 안 구간을 이을 때만 쓴다
+        self.counters["queries"] += 1
+        if start == goal:
+            return [start]
+        if start not in self.adjacency or goal not in self.adjacency:
+            return None
+        if blocked is not None and blocked(goal):
+            return None
+        start_cluster, goal_cluster = self.cluster(start), self.cluster(goal)
+        start_edges = {node: d for node, d in self.local_bfs(start, start_cluster, blocked).items()
+                       if node in self.nodes(start_cluster) or node == goal}
+        goal_edges = {node: d for node, d in self.local_bfs(goal, goal_cluster, blocked).items()
+                      if node in self.nodes(goal_cluster)}
+        banned = set()
+        for _ in range(MAX_REPAIRS + 1):
+            route = self._abstract_search(start, goal, start_edges, goal_edges, blocked, banned)
+            if route is None:
+                return None
+            path = [start]
+            for a, b in zip(route, route[1:]):
+                if abs(a[0] - b[0]) + abs(a[1] - b[1]) == 1 and self.cluster(a) != self.cluster(b):
+                    path.append(b)
+                    continue
+                if a == start or b == goal:
+                    segment = self.local_path(a, b, self.cluster(a), blocked, cost)
+                else:
+                    segment = self._segment(a, b, blocked, cost)
+                if segment is None:
+                    banned.add((a, b))
+                    break
+                path.extend(segment[1:])
+            else:
+                return path
+            self.counters["repairs"] += 1
+        return None
+
+    def _abstract_search(self, start, goal, start_edges, goal_edges, blocked, banned):
+        def neighbors(node):
+            if node == start:
+                edges = list(start_edges.items())
+            else:
+                edges = list(self.intra[self.cluster(node)][node].items())
+            edges += [(other, 1) for other in self.inter.get(node, ())]
+            if node in goal_edges:
+                edges.append((goal, goal_edges[node]))
+            return edges
+
+        def h(cell):
+            return abs(cell[0] - goal[0]) + abs(cell[1] - goal[1])
+
+        open_set = [(h(start), 0, start)]
+        cost = {start: 0}
+        came_from = {start: None}
+        while open_set:
+            _, g, node = heapq.heappop(open_set)
+            if node == goal:
+                route = []
+                while node is not None:
+                    route.append(node)
+                    node = came_from[node]
+                route.reverse()
+                return route
+            if g > cost[node]:
+                continue
+            self.counters["abstract_expansions"] += 1
+            for other, d in neighbors(node):
+                if (node, other) in banned or (blocked is not None and other != goal and blocked(other)):
+                    continue
+                new_cost = g + d
+                if new_cost < cost.get(other, float("inf")):
+                    cost[other] = new_cost
+                    came_from[other] = node
+                    heapq.heappush(open_set, (new_cost + h(other), new_cost, other))
+        return None
@@ -0,0 +1,185 @@
+import heapq
+from array import array
+from bisect import bisect_left, bisect_right
+
+################################
+# Jump Point Search (4방향 격자)
+################################
+# 이동 비용이 모두 같은 4방향 격자에서 대칭인 최단 경로를 하나만 펼친다.
+#  - 가로 이동: 같은 방향으로 계속 가다가 "강제 이웃"(바로 전 셀의 위/아래는 막혔는데 지금 셀의 위/아래는 열린 곳)이
+#    생기거나 목표에 닿으면 그 셀이 점프 포인트
+#  - 세로 이동: 한 칸마다 좌우로 가로 점프를 해 보고, 하나라도 점프 포인트를 찾으면 그 셀이 점프 포인트
+#  - 후속 방향: 시작 셀은 4방향, 세로로 온 셀은 (직진 + 좌우), 가로로 온 셀은 (직진 + 강제 이웃 방향)
+# 가로 점프는 정적 맵 기준으로 행마다 미리 계산한 표(다음 벽 / 다음 강제 이웃 열)를 쓰고,
+# 잠깐 막힌 셀(blocked)은 질의마다 행별 정렬 목록으로 겹쳐서 본다 (막힌 셀 = 벽 + 위/아래 행에 강제 이웃을 만든다).
+# 경로 길이는 셀 격자 A*와 같지만, 길이가 같은 경로 중에서는 직진을 길게 이어 가는 쪽을 골라서 A*가 고르는 경로와
+# 다를 수 있다 (군집 배송 수 비교: benchmarks/bench_search_fleet.py)
+
+class JumpTable:
+    # 행마다 오른쪽/왼쪽으로 가로 점프했을 때 처음 만나는 벽(또는 맵 끝) 열과 강제 이웃 열 (-1 = 없음).
+    # 인덱스는 행 * 열 수 + 열
+    def __init__(self, adjacency, rows, cols):
+        self.adjacency = adjacency
+        self.rows = rows
+        self.cols = cols
+        size = rows * cols
+        self.wall = {1: array("i", [0]) * size, -1: array("i", [0]) * size}
+        self.jump = {1: array("i", [0]) * size, -1: array("i", [0]) * size}
+        for r in range(rows):
+            self.build_row(r)
+
+    def build_row(self, r):
+        adjacency, cols = self.adjacency, self.cols
+        base = r * cols
+        for dc in (1, -1):
+            wall, jump = self.wall[dc], self.jump[dc]
+            # 진행 방향의 끝에서부터 거꾸로 채운다
+            end = cols if dc == 1 else -1
+            next_wall, next_jump = end, -1
+            for c in (range(cols - 1, -1, -1) if dc == 1 else range(cols)):
+                wall[base + c] = next_wall
+                jump[base + c] = next_jump
+                if (r, c) not in adjacency:
+                    next_wall, next_jump = c, -1
+                elif any((r + vr, c) in adjacency and (r + vr, c - dc) not in adjacency for vr in (-1, 1)):
+                    next_jump = c
+
+    def update_cell(self, cell):
+        # cell의 통로/벽이 바뀐 뒤 (adjacency는 이미 고쳐진 상태) 영향을 받는 세 행만 다시 계산
+        for r in (cell[0] - 1, cell[0], cell[0] + 1):
+            if 0 <= r < self.rows:
+                self.build_row(r)
+
+def jump_point_search(table, start, goal, blocked=(), counters=None):
+    # blocked: 지금 지나갈 수 없는 셀 집합 (시작 셀은 검사하지 않는다).
+    # 반환: 셀 경로 [start, ..., goal] / 못 찾으면 None. counters에는 expansions(펼친 점프 포인트), scanned(건너뛴 셀)
+    if start == goal:
+        return [start]
+    adjacency, cols = table.adjacency, table.cols
+    if start not in adjacency or goal not in adjacency or goal in blocked:
+        return None
+    rows_blocked = {}
+    for r, c in blocked:
+        rows_blocked.setdefault(r, []).append(c)
+    for columns in rows_blocked.values():
+        columns.sort()
+    walls, jumps = table.wall, table.jump
+    scanned = 0
+
+    def free(cell):
+        return cell in adjacency and cell not in blocked
+
+    def jump_horizontal(r, c, dc):
+        # (r, c)에서 dc 방향 가로 점프. 점프 포인트 열 / 없으면 None
+        nonlocal scanned
+        i = r * cols + c
+        stop = walls[dc][i]
+        columns = rows_blocked.get(r)
+        if columns:
+            if dc == 1:
+                k = bisect_right(columns, c)
+                if k < len(columns) and columns[k] < stop:
+                    stop = columns[k]
+            else:
+                k = bisect_left(columns, c) - 1
+                if k >= 0 and columns[k] > stop:
+                    stop = columns[k]
+        best = jumps[dc][i]
+        if best != -1 and (best - stop) * dc >= 0:
+            best = -1
+        if goal[0] == r and (goal[1] - c) * dc > 0 and (stop - goal[1]) * dc > 0:
+            if best == -1 or (best - goal[1]) * dc > 0:
+                best = goal[1]
+        # 위/아래 행의 막힌 셀 바로 다음 열은 강제 이웃
+        for vr in (-1, 1):
+            columns = rows_blocked.get(r + vr)
+            if not columns:
+                continue
+            if dc == 1:
+                k = bisect_left(columns, c)
+                while k < len(columns):
+                    x = columns[k] + 1
+                    if x >= stop or (best != -1 and x >= best):
+                        break
+                    if free((r + vr, x)):
+                        best = x
+                        break
+                    k += 1
+            else:
+                k = bisect_right(columns, c) - 1
+                while k >= 0:
+                    x = columns[k] - 1
+                    if x <= stop or (best != -1 and x <= best):
+                        break
+                    if free((r + vr, x)):
+                        best = x
+                        break
+                    k -= 1
+        scanned += abs((best if best != -1 else stop) - c)
+        return None if best == -1 else best
+
+    def jump(cell, direction):
+        nonlocal scanned
+        dr, dc = direction
+        r, c = cell
+        if dr == 0:
+            point = jump_horizontal(r, c, dc)
+            return None if point is None else (r, point)
+        while True:
+            r += dr
+            nxt = (r, c)
+            if not free(nxt):
+                return None
+            scanned += 1
+            if nxt == goal:
+                return nxt
+            if jump_horizontal(r, c, 1) is not None or jump_horizontal(r, c, -1) is not None:
+                return nxt
+
+    def directions(cell, arrived):
+        if arrived is None:
+            return ((-1, 0), (1, 0), (0, -1), (0, 1))
+        dr, dc = arrived
+        if dc == 0:
+            return (arrived, (0, -1), (0, 1))
+        forced = [(vr, 0) for vr in (-1, 1)
+                  if free((cell[0] + vr, cell[1])) and not free((cell[0] + vr, cell[1] - dc))]
+        return [arrived] + forced
+
+    def h(cell):
+        return abs(cell[0] - goal[0]) + abs(cell[1] - goal[1])
+
+    open_set = [(h(start), 0, start)]
+    cost = {start: 0}
+    came_from = {start: (None, None)}
+    expansions = 0
+    path = None
+    while open_set:
+        _, g, cell = heapq.heappop(open_set)
+        if cell == goal:
+            path = [cell]
+            while came_from[cell][0] is not None:
+                parent = came_from[cell][0]
+                dr = (parent[0] > cell[0]) - (parent[0] < cell[0])
+                dc = (parent[1] > cell[1]) - (parent[1] < cell[1])
+                while cell != parent:
+                    cell = (cell[0] + dr, cell[1] + dc)
+                    path.append(cell)
+            path.reverse()
+            break
+        if g > cost[cell]:
+            continue
+        expansions += 1
+        for direction in directions(cell, came_from[cell][1]):
+            point = jump(cell, direction)
+            if point is None:
+                continue
+            new_cost = g + abs(point[0] - cell[0]) + abs(point[1] - cell[1])
+            if new_cost < cost.get(point, float("inf")):
+                cost[point] = new_cost
+                came_from[point] = (cell, direction)
+                heapq.heappush(open_set, (new_cost + h(point), new_cost, point))
+    if counters is not None:
+        counters["expansions"] = counters.get("expansions", 0) + expansions
+        counters["scanned"] = counters.get("scanned", 0) + scanned
+    return path
@@ -0,0 +1,256 @@
+import io
+import os
+import csv
+import json
+import hashlib
+from collections import deque
+import numpy as np
+
+################################
+# 상수 정의
+################################
+# 격자 값: 시뮬레이터 MAP과 같은 지형 코드 (0 통로, 1 벽, 2 출구 구역). 선반/시작 셀은 통로 위의 층으로 따로 둔다
+FREE, WALL, EXIT, SHELF, START = 0, 1, 2, 3, 4
+# CSV 셀 / JSON 문자열 행에서 쓰는 문자
+CELL_CODES = {"0": FREE, ".": FREE, " ": FREE, "1": WALL, "#": WALL, "2": EXIT, "E": EXIT,
+              "3": SHELF, "S": SHELF, "4": START, "A": START}
+# 이미지 지도: 픽셀마다 가장 가까운 색으로 분류 (RGB)
+IMAGE_PALETTE = {FREE: (255, 255, 255), WALL: (0, 0, 0), EXIT: (255, 0, 0), SHELF: (0, 255, 0), START: (0, 0, 255)}
+IMAGE_EXTENSIONS = (".png", ".bmp", ".gif", ".tif", ".tiff", ".ppm", ".pgm")
+DIRECTIONS = ((-1, 0), (1, 0), (0, -1), (0, 1))   # 이웃 순서 = 엔진 탐색 순서 (바꾸면 같은 시드 결과가 달라진다)
+MAP_CACHE_DIR = os.environ.get("SIM_MAP_CACHE",
+                               os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache", "maps"))
+
+################################
+# 맵
+################################
+class WarehouseMap:
+    # 지형 격자 (np.uint8, 행 x 열)와 선반/출구/시작 셀 층. 셀 좌표는 (행, 열)
+    def __init__(self, grid, shelves, exits, starts, name=None, digest=None):
+        self.grid = np.ascontiguousarray(grid, dtype=np.uint8)
+        self.shelves = [(int(r), int(c)) for r, c in shelves]
+        self.exits = [(int(r), int(c)) for r, c in exits]
+        self.starts = [(int(r), int(c)) for r, c in starts]
+        self.name = name
+        self.digest = digest or layout_digest(self.grid, self.shelves, self.exits, self.starts)
+        self._adjacency = None
+
+    @property
+    def shape(self):
+        return self.grid.shape
+
+    def layer(self, cells):
+        mask = np.zeros(self.grid.shape, dtype=bool)
+        if cells:
+            rows, cols = zip(*cells)
+            mask[list(rows), list(cols)] = True
+        return mask
+
+    def adjacency(self):
+        if self._adjacency is None:
+            self._adjacency = build_adjacency(self.grid)
+        return self._adjacency
+
+    def check(self):
+        # 층 셀이 격자 안의 통로인지, 선반과 시작 셀이 모두 출구에서 닿는지 확인한다
+        rows, cols = self.grid.shape
+        for name, cells in (("shelves", self.shelves), ("exits", self.exits), ("starts", self.starts)):
+            if not cells:
+                raise ValueError(f"map has no {name}")
+            bad = [cell for cell in cells
+                   if not (0 <= cell[0] < rows and 0 <= cell[1] < cols) or self.grid[cell] == WALL]
+            if bad:
+                raise ValueError(f"{name} outside the map or on walls: {bad[:10]}")
+        reached = reachable(self.adjacency(), self.exits)
+        unreachable = [cell for cell in self.shelves + self.starts if cell not in reached]
+        if unreachable:
+            raise ValueError(f"{len(unreachable)} shelf/start cells not reachable from any exit: {unreachable[:10]}")
+        return self
+
+    def to_json(self):
+        # 문자열 행 + 층 목록 (load_map으로 다시 읽을 수 있는 형식)
+        chars = {FREE: ".", WALL: "#", EXIT: "E"}
+        return {"name": self.name, "grid": ["".join(chars[v] for v in row) for row in self.grid.tolist()],
+                "shelves": [list(cell) for cell in self.shelves], "exits": [list(cell) for cell in self.exits],
+                "starts": [list(cell) for cell in self.starts]}
+
+    def describe(self):
+        return {"name": self.name, "rows": self.shape[0], "cols": self.shape[1], "digest": self.digest,
+                "cells": int((self.grid != WALL).sum()), "shelves": len(self.shelves), "exits": len(self.exits),
+                "starts": len(self.starts)}
+
+def layout_digest(grid, shelves, exits, starts):
+    digest = hashlib.sha256()
+    digest.update(repr(grid.shape).encode())
+    digest.update(np.ascontiguousarray(grid, dtype=np.uint8).tobytes())
+    digest.update(json.dumps([shelves, exits, starts]).encode())
+    return digest.hexdigest()
+
+def build_adjacency(grid):
+    # 통로 셀 -> 이웃 통로 셀 튜플 (DIRECTIONS 순서). 경로 탐색이 매번 경계/벽 검사를 하지 않도록 미리 계산
+    passable = (np.asarray(grid) != WALL).astype(np.uint8)
+    bits = np.zeros(passable.shape, dtype=np.uint8)
+    bits[1:, :] |= passable[:-1, :]
+    bits[:-1, :] |= passable[1:, :] << 1
+    bits[:, 1:] |= passable[:, :-1] << 2
+    bits[:, :-1] |= passable[:, 1:] << 3
+    rows, cols = np.nonzero(passable)
+    adjacency = {}
+    for r, c, b in zip(rows.tolist(), cols.tolist(), bits[rows, cols].tolist()):
+        adjacency[(r, c)] = tuple((r + dr, c + dc) for bit, (dr, dc) in enumerate(DIRECTIONS) if b >> bit & 1)
+    return adjacency
+
+def update_adjacency(adjacency, grid, cell):
+    # cell 하나의 지형이 바뀐 뒤 cell과 네 이웃의 항목만 다시 만든다 (grid[r][c] 인덱싱 되는 격자)
+    rows, cols = len(grid), len(grid[0])
+    for r, c in [cell] + [(cell[0] + dr, cell[1] + dc) for dr, dc in DIRECTIONS]:
+        if not (0 <= r < rows and 0 <= c < cols):
+            continue
+        if grid[r][c] == WALL:
+            adjacency.pop((r, c), None)
+            continue
+        adjacency[(r, c)] = tuple((r + dr, c + dc) for dr, dc in DIRECTIONS
+                                  if 0 <= r + dr < rows and 0 <= c + dc < cols and grid[r + dr][c + dc] != WALL)
+
+def index_adjacency(adjacency, rows, cols):
+    # 같은 인접 리스트를 셀 인덱스(행 * 열 수 + 열) 기준으로: 인덱스 -> 이웃 인덱스 튜플 (벽은 빈 튜플)
+    neighbors = [()] * (rows * cols)
+    for (r, c), cells in adjacency.items():
+        neighbors[r * cols + c] = tuple(nr * cols + nc for nr, nc in cells)
+    return neighbors
+
+def reachable(adjacency, sources):
+    seen = set(cell for cell in sources if cell in adjacency)
+    queue = deque(seen)
+    while queue:
+        for neighbor in adjacency[queue.popleft()]:
+            if neighbor not in seen:
+                seen.add(neighbor)
+                queue.append(neighbor)
+    return seen
+
+################################
+# 읽기 (JSON / CSV / 이미지)
+################################
+def parse_rows(rows):
+    # 코드 행 목록 -> (지형 격자, 선반, 출구, 시작). 선반/시작 셀은 지형상 통로로 둔다
+    try:
+        codes = np.array([[v if isinstance(v, int) else CELL_CODES[str(v).strip() or " "] for v in row]
+                          for row in rows], dtype=np.uint8)
+    except KeyError as e:
+        raise ValueError(f"unknown map cell {e.args[0]!r}")
+    except ValueError:
+        raise ValueError("map grid must be a non-empty rectangle")
+    if codes.ndim != 2 or codes.size == 0 or codes.max() > START:
+        raise ValueError("map grid must be a non-empty rectangle")
+    return codes_to_layers(codes)
+
+def codes_to_layers(codes):
+    cells = lambda code: [tuple(cell) for cell in np.argwhere(codes == code).tolist()]  # noqa: E731
+    shelves, exits, starts = cells(SHELF), cells(EXIT), cells(START)
+    grid = codes.copy()
+    grid[(codes == SHELF) | (codes == START)] = FREE
+    return grid, shelves, exits, starts
+
+def parse_json(data):
+    # {"grid": [[0, 1, ...], ...] 또는 ["..#E", ...], "shelves": [[r, c], ...], "exits": [...], "starts": [...]}
+    # 층 목록이 없으면 격자 코드(2 출구 / 3 선반 / 4 시작)에서 가져온다
+    doc = json.loads(data)
+    rows = [list(row) if isinstance(row, str) else row for row in doc["grid"]]
+    grid, shelves, exits, starts = parse_rows(rows)
+    return WarehouseMap(grid, doc.get("shelves", shelves), doc.get("exits", exits), doc.get("starts", starts),
+                        name=doc.get("name"))
+
+def parse_csv(data):
+    rows = [row for row in csv.reader(io.StringIO(data.decode())) if row]
+    grid, shelves, exits, starts = parse_rows(rows)
+    return WarehouseMap(grid, shelves, exits, starts)
+
+def read_netpbm(data):
+    # 바이너리 PGM(P5) / PPM(P6), 최댓값 255 이하 - Pillow 없이 읽는다
+    tokens, pos = [], 2
+    while len(tokens) < 3:
+        while data[pos:pos + 1].isspace():
+            pos += 1
+        if data[pos:pos + 1] == b"#":
+            pos = data.index(b"\n", pos) + 1
+            continue
+        end = pos
+        while not data[end:end + 1].isspace():
+            end += 1
+        tokens.append(int(data[pos:end]))
+        pos = end
+    width, height, _ = tokens
+    channels = 3 if data[:2] == b"P6" else 1
+    pixels = np.frombuffer(data, dtype=np.uint8, count=width * height * channels, offset=pos + 1)
+    pixels = pixels.reshape(height, width, channels)
+    return np.repeat(pixels, 3, axis=2) if channels == 1 else pixels
+
+def parse_image(data, ext):
+    if data[:2] in (b"P5", b"P6"):
+        pixels = read_netpbm(data)
+    else:
+        try:
+            from PIL import Image
+        except ImportError:
+            raise ValueError(f"reading {ext} maps needs Pillow; use .ppm/.pgm, JSON or CSV instead")
+        pixels = np.asarray(Image.open(io.BytesIO(data)).convert("RGB"))
+    palette = np.array(list(IMAGE_PALETTE.values()), dtype=np.int32)
+    distance = ((pixels[:, :, None, :].astype(np.int32) - palette[None, None, :, :]) ** 2).sum(axis=3)
+    codes = np.array(list(IMAGE_PALETTE), dtype=np.uint8)[distance.argmin(axis=2)]
+    grid, shelves, exits, starts = codes_to_layers(codes)
+    return WarehouseMap(grid, shelves, exits, starts)
+
+def map_format(path):
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".json":
+        return "json"
+    if ext in (".csv", ".txt"):
+        return "csv"
+    if ext in IMAGE_EXTENSIONS:
+        return "image"
+    raise ValueError(f"unknown map format {ext!r} (json, csv or image)")
+
+################################
+# 내용 해시 캐시
+################################
+# 같은 파일 내용은 프로세스 안에서는 객체 그대로, 다른 프로세스(세션/분석 워커)에서는
+# 파싱/검사가 끝난 격자를 .npz로 다시 읽어서 파싱을 건너뛴다
+_maps = {}
+
+def load_map(path, use_cache=True):
+    with open(path, "rb") as f:
+        data = f.read()
+    key = hashlib.sha256(data).hexdigest()
+    if use_cache and key in _maps:
+        return _maps[key]
+    name = os.path.splitext(os.path.basename(path))[0]
+    cached = os.path.join(MAP_CACHE_DIR, key + ".npz")
+    if use_cache and os.path.exists(cached):
+        with np.load(cached) as saved:
+            layout = WarehouseMap(saved["grid"], saved["shelves"].tolist(), saved["exits"].tolist(),
+                                  saved["starts"].tolist(), name=name)
+    else:
+        fmt = map_format(path)
+        if fmt == "json":
+            layout = parse_json(data)
+        elif fmt == "csv":
+            layout = parse_csv(data)
+        else:
+            layout = parse_image(data, os.path.splitext(path)[1].lower())
+        layout.name = layout.name or name
+        layout.check()
+        if use_cache:
+            os.makedirs(MAP_CACHE_DIR, exist_ok=True)
+            tmp = cached + f".{os.getpid()}.tmp.npz"
+            np.savez(tmp, grid=layout.grid, shelves=np.array(layout.shelves, dtype=np.int32).reshape(-1, 2),
+                     exits=np.array(layout.exits, dtype=np.int32).reshape(-1, 2),
+                     starts=np.array(layout.starts, dtype=np.int32).reshape(-1, 2))
+            os.replace(tmp, cached)
+    if use_cache:
+        _maps[key] = layout
+    return layout
+
+def save_map(layout, path):
+    with open(path, "w") as f:
+        json.dump(layout.to_json(), f)
@@ -0,0 +1,268 @@
+import os
+import time
+import uuid
+import queue
+import random
+import multiprocessing
+from simpy import Environment
+from sim_engine import (
+    MOVE_MODE, PLANNER, PLANNERS, HEADLESS_FPS, CONGESTION_HEATMAP_INTERVAL, create_simulation,
+    compute_single_run_result, snapshot_simulation, load_snapshot, restore_simulation, snapshot_state, map_digest,
+    congestion_heatmap,
+)
+
+################################
+# 상수 정의
+################################
+SESSION_WORKERS = max(1, min(4, os.cpu_count() or 1))
+SESSION_MAX_PER_WORKER = 32
+SESSION_IDLE_TIMEOUT = 600.0   # 구독자/명령이 이 시간(초) 동안 없으면 세션을 닫는다
+SESSION_TICK = 0.02            # 워커 루프 주기 (wall 초)
+SESSION_SLICE = 0.05           # 최고속 세션이 한 바퀴에 쓸 수 있는 최대 wall 시간 (다른 세션이 굶지 않게)
+SESSION_COMMANDS = ("pause", "resume", "speed", "snapshot", "close")
+
+################################
+# 워커 프로세스 안의 세션
+################################
+class LiveSession:
+    # 워커 프로세스 하나가 여러 세션을 번갈아 돌린다. 세션마다 자기 Simulation/Environment와
+    # 난수 상태를 따로 들고 있어서 (돌리기 전에 random 상태를 바꿔 끼운다) 같은 워커의 다른 세션과 섞이지 않는다.
+    # 실시간 환경처럼 sleep 하지 않고 wall 시계 기준 목표 sim 시각까지 일반 Environment를 진행시킨다.
+    # speed = sim초/wall초 배율, None이면 최고속.
+    def __init__(self, session_id, sim, speed=1.0, fps=HEADLESS_FPS):
+        self.id = session_id
+        self.sim = sim
+        self.fps = fps
+        self.paused = False
+        self.finished = False
+        self.rng = random.getstate()
+        self.last_frame = 0.0
+        self.last_heatmap = None
+        self.set_speed(speed)
+
+    def set_speed(self, speed):
+        if speed is not None and speed <= 0:
+            raise ValueError("speed must be positive or None (max)")
+        self.speed = speed
+        self.anchor = (self.sim.env.now, time.perf_counter())
+
+    def pause(self):
+        self.paused = True
+
+    def resume(self):
+        self.paused = False
+        self.anchor = (self.sim.env.now, time.perf_counter())
+
+    def advance(self, now, deadline):
+        # 목표 시각까지 (최고속이면 deadline까지) 이벤트를 처리한다. 끝나면 True
+        sim = self.sim
+        env = sim.env
+        if self.speed is None:
+            until = sim.sim_duration
+        else:
+            until = min(sim.sim_duration, self.anchor[0] + (now - self.anchor[1]) * self.speed)
+        random.setstate(self.rng)
+        try:
+            while time.perf_counter() < deadline:
+                if env.peek() > until:
+                    if until > env.now:
+                        env.run(until=until)
+                    break
+                env.step()
+        finally:
+            self.rng = random.getstate()
+        return env.now >= sim.sim_duration
+
+    def frame(self, now):
+        frame = snapshot_state(self.sim)
+        frame["session_id"] = self.id
+        frame["speed"] = 0.0 if self.paused else (self.speed if self.speed is not None else -1.0)
+        frame["paused"] = self.paused
+        if self.last_heatmap is None or now - self.last_heatmap >= CONGESTION_HEATMAP_INTERVAL:
+            frame["congestion"] = congestion_heatmap(self.sim)
+            self.last_heatmap = now
+        self.last_frame = now
+        return frame
+
+    def result(self):
+        sim = self.sim
+        result = compute_single_run_result(sim.stats, sim.env.now if sim.env.now > 0 else sim.sim_duration,
+                                           len(sim.agvs))
+        result["session_id"] = self.id
+        return result
+
+def create_live_session(session_id, params):
+    # params: agv_count, duration, planner, speed, fps, seed / 또는 blob (스냅샷에서 시작)
+    seed = params.get("seed")
+    if params.get("blob") is not None:
+        state = load_snapshot(params["blob"])
+        # 맵은 프로세스 전역이라 같은 워커의 다른 세션과 공유된다. 맵이 다른 스냅샷은 받지 않는다.
+        if state["map_digest"] != map_digest():
+            raise ValueError("snapshot map differs from the session host map")
+        sim = restore_simulation(params["blob"], sim_duration=params.get("duration"), seed=seed)
+    else:
+        random.seed(seed)
+        sim = create_simulation(Environment(), params.get("agv_count") or 3, params.get("duration") or 3000,
+                                move_mode=MOVE_MODE, planner=params.get("planner", PLANNER))
+    return LiveSession(session_id, sim, params.get("speed", 1.0), params.get("fps", HEADLESS_FPS))
+
+def session_worker(command_queue, output_queue):
+    # 세션 호스트 워커. command_queue에서 (op, session_id, payload)를 받는다.
+    # op: "create" | "pause" | "resume" | "speed" | "snapshot" | "close" | "shutdown"
+    # output_queue로 (종류, session_id, payload)를 보낸다.
+    # 종류: "created" | "frame" | "final" | "snapshot" | "closed" | "error"
+    sessions = {}
+    while True:
+        # 돌릴 세션이 없으면 명령이 올 때까지 잠들고, 있으면 SESSION_TICK만 기다린다
+        idle = all(s.paused or s.finished for s in sessions.values())
+        commands = []
+        try:
+            commands.append(command_queue.get(block=True, timeout=None if idle else SESSION_TICK))
+            while True:
+                commands.append(command_queue.get_nowait())
+        except queue.Empty:
+            pass
+        for op, session_id, payload in commands:
+            if op == "shutdown":
+                return
+            try:
+                if op == "create":
+                    session = create_live_session(session_id, payload)
+                    sessions[session_id] = session
+                    output_queue.put(("created", session_id, session.frame(time.perf_counter())))
+                    continue
+                session = sessions.get(session_id)
+                if session is None:
+                    raise KeyError(f"unknown session {session_id}")
+                if op in ("pause", "resume", "speed"):
+                    if op == "pause":
+                        session.pause()
+                    elif op == "resume":
+                        session.resume()
+                    else:
+                        session.set_speed(payload)
+                    output_queue.put(("frame", session_id, session.frame(time.perf_counter())))
+                elif op == "snapshot":
+                    random.setstate(session.rng)
+                    output_queue.put(("snapshot", session_id, snapshot_simulation(session.sim)))
+                elif op == "close":
+                    del sessions[session_id]
+                    output_queue.put(("closed", session_id, None))
+            except Exception as e:
+                output_queue.put(("error", session_id, str(e)))
+
+        running = [s for s in sessions.values() if not s.paused and not s.finished]
+        for session in running:
+            now = time.perf_counter()
+            try:
+                done = session.advance(now, now + SESSION_SLICE)
+            except Exception as e:
+                session.finished = True
+                output_queue.put(("error", session.id, str(e)))
+                continue
+            now = time.perf_counter()
+            if done:
+                session.finished = True
+                output_queue.put(("frame", session.id, session.frame(now)))
+                output_queue.put(("final", session.id, session.result()))
+            elif now - session.last_frame >= 1.0 / session.fps:
+                output_queue.put(("frame", session.id, session.frame(now)))
+
+################################
+# 서버 쪽 세션 관리자
+################################
+class SessionManager:
+    # 세션 id -> 워커 프로세스 라우팅, 생성 시 가장 한가한 워커에 배치, 유휴 세션 정리.
+    # 워커 출력은 서버가 worker["output"]을 읽어서 handle()에 넘긴다 (eventlet이면 tpool로 대기).
+    def __init__(self, workers=SESSION_WORKERS, max_per_worker=SESSION_MAX_PER_WORKER,
+                 idle_timeout=SESSION_IDLE_TIMEOUT):
+        self.worker_count = workers
+        self.max_per_worker = max_per_worker
+        self.idle_timeout = idle_timeout
+        self.workers = []
+        self.sessions = {}
+
+    def start(self):
+        for i in range(self.worker_count):
+            commands = multiprocessing.Queue()
+            output = multiprocessing.Queue()
+            p = multiprocessing.Process(target=session_worker, args=(commands, output), daemon=True)
+            p.start()
+            self.workers.append({"index": i, "process": p, "commands": commands, "output": output, "sessions": set()})
+        return self
+
+    def shutdown(self):
+        for worker in self.workers:
+            worker["commands"].put(("shutdown", None, None))
+        for worker in self.workers:
+            worker["process"].join(timeout=5)
+            if worker["process"].is_alive():
+                worker["process"].terminate()
+        self.workers = []
+        self.sessions = {}
+
+    def create(self, params):
+        if params.get("planner", PLANNER) not in PLANNERS:
+            raise ValueError(f"planner must be one of {PLANNERS}")
+        worker = min(self.workers, key=lambda w: len(w["sessions"]))
+        if len(worker["sessions"]) >= self.max_per_worker:
+            raise RuntimeError("session host is full")
+        session_id = uuid.uuid4().hex[:12]
+        worker["sessions"].add(session_id)
+        self.sessions[session_id] = {"worker": worker["index"], "status": "starting", "frame": None, "result": None,
+                                     "created": time.time(), "last_active": time.time(),
+                                     "agv_count": params.get("agv_count"), "planner": params.get("planner", PLANNER)}
+        worker["commands"].put(("create", session_id, params))
+        return session_id
+
+    def touch(self, session_id):
+        session = self.sessions.get(session_id)
+        if session is not None:
+            session["last_active"] = time.time()
+
+    def command(self, session_id, op, payload=None):
+        if op not in SESSION_COMMANDS:
+            raise ValueError(f"command must be one of {SESSION_COMMANDS}")
+        session = self.sessions.get(session_id)
+        if session is None:
+            raise KeyError(f"unknown session {session_id}")
+        session["last_active"] = time.time()
+        self.workers[session["worker"]]["commands"].put((op, session_id, payload))
+
+    def handle(self, kind, session_id, payload):
+        # 워커 출력 하나를 반영한다
+        session = self.sessions.get(session_id)
+        if session is None:
+            return
+        if kind in ("created", "frame"):
+            session["frame"] = payload
+            if session["status"] in ("starting", "running", "paused"):
+                session["status"] = "paused" if payload["paused"] else "running"
+        elif kind == "final":
+            session["status"] = "finished"
+            session["result"] = payload
+        elif kind == "error" and session["status"] in ("starting", "closing"):
+            # 만들기에 실패한 세션은 워커에 없으므로 바로 뺀다. 닫는 중에 온 오류도 워커에 이미 없다는 뜻
+            self.remove(session_id)
+        elif kind == "closed":
+            self.remove(session_id)
+
+    def remove(self, session_id):
+        session = self.sessions.pop(session_id)
+        self.workers[session["worker"]]["sessions"].discard(session_id)
+
+    def evict_idle(self, now=None):
+        now = time.time() if now is None else now
+        idle = [sid for sid, s in self.sessions.items()
+                if now - s["last_active"] > self.idle_timeout and s["status"] != "closing"]
+        for session_id in idle:
+            self.command(session_id, "close")
+            self.sessions[session_id]["status"] = "closing"
+        return idle
+
+    def describe(self):
+        return {"workers": [{"index": w["index"], "alive": w["process"].is_alive(), "sessions": len(w["sessions"])}
+                            for w in self.workers],
+                "sessions": {sid: {k: s[k] for k in ("worker", "status", "agv_count", "planner", "created",
+                                                     "last_active")}
+                             for sid, s in self.sessions.items()}}
@@ -1,25 +1,34 @@
 import eventlet
 eventlet.monkey_patch()
+from eventlet import tpool
 import multiprocessing
+import queue
 import sys
 import json
 import time
-import random
-import statistics
-import heapq
-from simpy.rt import RealtimeEnvironment
-from simpy import Environment
-from collections import defaultdict
 from flask import Flask, request, jsonify, Blueprint
 from flask_cors import CORS
 from flask_socketio import SocketIO, emit
 import logging
+import argparse
 import os
+from sim_engine import (
+    REPEAT_RUNS, MOVE_MODE, PLANNER, PLANNERS, PATH_SEARCHES, HEADLESS_FPS, CONGESTION_HEATMAP_INTERVAL,
+    create_simulation, compute_simulation_result, compute_single_run_result, headless_worker,
+    AdjustableRealtimeEnvironment, snapshot_simulation, restore_simulation, stop_environment, set_map,
+    congestion_heatmap,
+)
+from sim_map import load_map
+from sim_broadcast import Subscription, CLIENT_MAX_PENDING, CLIENT_MAX_FPS
+from sim_sessions import SESSION_WORKERS, SessionManager
+from sim_analysis import ANALYSIS_METHODS, FORK_COUNT, FORK_HORIZON, AnalysisHost, fleet_counts
+from sim_cache import ResultCache, scenario_key
 logger = logging.getLogger(__name__)
 
 global_speed_factor = 1.0
 SIM_RUNNING = False
 SIM_DURATION = 3000
+SIM = None
 SIM_ENV = None
 SIM_STATS = None
 SIM_AGVS = []
@@ -28,146 +37,68 @@ PREVIOUS_SPEED = 1.0
 UPDATE_INTERVAL = 0.1
 SIM_FINISHED = False
 SIM_APP_RUNNING = False
-current_time_paused = None
-delivered_count_paused = None
+SIM_SNAPSHOT = None      # 일시정지 시점의 전체 상태 (snapshot_simulation 바이너리)
 current_positions = []
-current_cargos = []
-current_paths = []
 is_paused = False
-RESERVED_CELLS = {}
-TARGET_RESERVATIONS = {}
-REPEAT_RUNS = 15
-WARMUP_PERIOD = 30
-CHECK_INTERVAL = 3000
-MOVE_RATE = 1.0
-STEP_SIZE = 0.01
-
-# 15x15 불규칙 맵
-MAP = [
-    [2, 2, 2, 2, 2, 2, 2, 2, 2, 2, 2, 2, 2, 2, 2],
-    [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0],
-    [0, 1, 1, 1, 0, 1, 0, 1, 0, 0, 0, 1, 1, 1, 0],
-    [0, 1, 1, 0, 0, 1, 0, 0, 0, 0, 0, 0, 0, 1, 0],
-    [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0],
-    [0, 1, 0, 1, 0, 0, 1, 1, 0, 1, 0, 1, 1, 1, 0],
-    [0, 0, 0, 1, 1, 0, 1, 1, 0, 0, 0, 1, 1, 1, 0],
-    [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0],
-    [0, 0, 0, 1, 0, 1, 0, 1, 1, 1, 0, 1, 1, 1, 0],
-    [0, 1, 0, 0, 0, 1, 0, 1, 1, 1, 0, 0, 0, 1, 0],
-    [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0],
-    [2, 2, 2, 2, 2, 2, 2, 2, 2, 2, 2, 2, 2, 2, 2],
-]
-ROWS = len(MAP)
-COLS = len(MAP[0])
-
-# 출구 구역: row0의 모든 셀
-exit_coords = [(0, c) for c in range(COLS) if MAP[0][c] == 2]
-
-# 적재(선반) 구역: 맵 내부의 "들어간" 영역 (예: (3,3), (5,4), (3,12), (9,12), (8,6))
-shelf_coords = [(3,3), (5,4), (3,12), (9,12), (8,6)]
-
-def is_in_corridor(cell):
-    row, col = cell
-    return (2 <= row <= 4) and (2 <= col <= 4)
-
-def is_cell_busy(cell, required_cargo):
-    for agv in SIM_AGVS:
-        if (int(round(agv.pos[0])), int(round(agv.pos[1]))) == cell:
-            if agv.cargo == required_cargo:
-                return True
-    return False
-
-def manhattan(a, b):
-    return abs(a[0]-b[0]) + abs(a[1]-b[1])
-
-def a_star_path(start, goal, current_time, cell_blocked, congestion_count, current_agv_id=None):
-    if start == goal:
-        return [start]
-    open_set = []
-    heapq.heappush(open_set, (manhattan(start, goal), 0, start))
-    came_from = {start: None}
-    cost_so_far = {start: 0}
-    while open_set:
-        priority, current_cost, current = heapq.heappop(open_set)
-        if current == goal:
-            path = []
-            while current is not None:
-                path.append(current)
-                current = came_from[current]
-            path.reverse()
-            return path
-        for dr, dc in [(-1,0), (1,0), (0,-1), (0,1)]:
-            neighbor = (current[0]+dr, current[1]+dc)
-            if not (0 <= neighbor[0] < ROWS and 0 <= neighbor[1] < COLS):
-                continue
-            if MAP[neighbor[0]][neighbor[1]] == 1:
-                continue
-            if neighbor in cell_blocked and cell_blocked[neighbor] > current_time:
-                congestion_count[neighbor] += 1
-                continue
-            if neighbor in RESERVED_CELLS and current_agv_id is not None and RESERVED_CELLS[neighbor] != current_agv_id:
-                continue
-            new_cost = cost_so_far[current] + 1 + 0.1 * congestion_count.get(neighbor, 0)
-            if neighbor not in cost_so_far or new_cost < cost_so_far[neighbor]:
-                cost_so_far[neighbor] = new_cost
-                priority = new_cost + manhattan(neighbor, goal)
-                heapq.heappush(open_set, (priority, new_cost, neighbor))
-                came_from[neighbor] = current
-    return None
-
-# 시작지점: row 11, 열은 [0, 3, 6, 9, 12] (5대 기준)
-def get_start_position(i):
-    start_row = 11
-    start_cols = [0, 3, 6, 9, 12]
-    col = start_cols[i % len(start_cols)]
-    return (start_row, col)
-
-# 목적지 선정 함수 – 후보군에서 이미 낮은 ID가 예약한 좌표는 제외
-def find_nearest_exit(pos, current_agv_id=None):
-    if pos in exit_coords:
-        return pos
-    candidates = []
-    for ex in exit_coords:
-        if is_cell_busy(ex, 1):
+HEADLESS = None          # speed "max" 실행 중이면 {"process", "control", "frame", "paused", "congestion"}
+SUBSCRIPTIONS = {}       # sid -> Subscription (연결 시 기존 JSON 'message' 방송으로 시작, 'subscribe'로 변경)
+ANALYSIS_HOST = None     # 서버 시작 시 미리 띄워 두는 분석 호스트 + 작업 대기열 (sim_analysis.AnalysisHost)
+RESULT_CACHE = None      # 시나리오 해시 -> 최종 분석 결과 (sim_cache.ResultCache). 열지 못하면 None (캐시 없이 동작)
+JOB_EVENTS = {           # 작업 종류 -> (진행 메시지 종류 -> 이벤트, 최종 이벤트)
+    "analysis": ({"progress": 'simulation_progress'}, 'simulation_final'),
+    "sweep": ({"progress": 'simulation_opt_replication', "count": 'simulation_opt_progress'}, 'simulation_opt'),
+    "fork": ({"progress": 'fork_progress'}, 'fork_final'),
+}
+
+################################
+# 클라이언트별 방송 (단일 시뮬레이션 서버 / 세션 호스트 공용)
+################################
+def parse_subscription(data):
+    # {'format': 'json'|'binary', 'fps', 'agv_ids': [...], 'viewport': [x0, y0, x1, y1],
+    #  'detail': 'summary'|'positions'|'full'}
+    fps = data.get('fps')
+    agv_ids = data.get('agv_ids')
+    viewport = data.get('viewport')
+    return Subscription(format=data.get('format', 'json'),
+                        fps=float(fps) if fps is not None else None,
+                        agv_ids=[int(i) for i in agv_ids] if agv_ids is not None else None,
+                        viewport=[float(v) for v in viewport] if viewport is not None else None,
+                        detail=data.get('detail', 'positions'))
+
+def frame_tick(frame, extra):
+    # 워커가 보낸 스냅샷 (snapshot_state 형식) -> 구독 대기열에 넣을 tick
+    return {"sim_time": frame['sim_time'], "delivered_count": frame['delivered_count'],
+            "agvs": [(a['agv_id'], a['location_x'], a['location_y'], a.get('flags', 0)) for a in frame['agvs']],
+            "extra": extra}
+
+def pending_packets(socketio, sid):
+    # 해당 클라이언트 engine.io 소켓에 아직 못 보낸 패킷 수 (테스트 클라이언트 등 알 수 없으면 0)
+    try:
+        eio_sid = socketio.server.manager.eio_sid_from_sid(sid, '/')
+        return socketio.server.eio.sockets[eio_sid].queue.qsize()
+    except (KeyError, AttributeError, TypeError):
+        return 0
+
+def client_sender(socketio, subscriptions, sid, sub):
+    # 클라이언트별 송신 루프. 구독이 바뀌거나 연결이 끊기면 종료
+    while subscriptions.get(sid) is sub:
+        eventlet.sleep(sub.interval(UPDATE_INTERVAL))
+        if pending_packets(socketio, sid) > CLIENT_MAX_PENDING:
+            sub.deferred += 1
             continue
-        if ex in TARGET_RESERVATIONS:
-            reserved_id = TARGET_RESERVATIONS[ex]
-            # 이미 낮은 id가 예약한 경우 후보에서 제외
-            if reserved_id < current_agv_id:
-                continue
-        candidates.append(ex)
-    if candidates:
-        chosen = min(candidates, key=lambda e: abs(pos[0]-e[0]) + abs(pos[1]-e[1]))
-        TARGET_RESERVATIONS[chosen] = current_agv_id
-        return chosen
-    else:
-        chosen = min(exit_coords, key=lambda e: abs(pos[0]-e[0]) + abs(pos[1]-e[1]))
-        # 재할당: 낮은 id가 있다면 갱신
-        TARGET_RESERVATIONS[chosen] = current_agv_id
-        return chosen
-
-def find_nearest_shelf(pos, current_agv_id=None):
-    if pos in shelf_coords:
-        return pos
-    candidates = []
-    for sh in shelf_coords:
-        if is_cell_busy(sh, 0):
+        tick = sub.take()
+        if tick is None:
             continue
-        if sh in TARGET_RESERVATIONS:
-            reserved_id = TARGET_RESERVATIONS[sh]
-            if reserved_id < current_agv_id:
-                continue
-        candidates.append(sh)
-    if candidates:
-        chosen = min(candidates, key=lambda s: abs(pos[0]-s[0]) + abs(pos[1]-s[1]))
-        TARGET_RESERVATIONS[chosen] = current_agv_id
-        return chosen
-    else:
-        chosen = min(shelf_coords, key=lambda s: abs(pos[0]-s[0]) + abs(pos[1]-s[1]))
-        TARGET_RESERVATIONS[chosen] = current_agv_id
-        return chosen
+        out = sub.payload(tick)
+        if out is not None and subscriptions.get(sid) is sub:
+            socketio.emit(out[0], out[1], to=sid)
+            sub.sent += 1
+
+def subscribe_client(socketio, subscriptions, sid, sub):
+    subscriptions[sid] = sub
+    socketio.start_background_task(client_sender, socketio, subscriptions, sid, sub)
 
-def create_app(port):
+def create_app(port, analysis_workers=None):
     app = Flask(__name__)
     sim_prefix = f"/sim{port - 2024}"
     sim_bp = Blueprint('sim', __name__, url_prefix=sim_prefix)
@@ -186,114 +117,58 @@ def create_app(port):
                         engineio_logger=True,
                         ping_timeout=5000,
                         ping_interval=2500)
-    bfs_path = a_star_path
-
-    class AGV:
-        def __init__(self, agv_id, start_pos):
-            self.id = agv_id
-            self.start_pos = (float(start_pos[0]), float(start_pos[1]))
-            self.pos = (float(start_pos[0]), float(start_pos[1]))
-            self.path = []
-            self.cargo = 0
-            self.pickup_time = None
-            self.arrival_time = 0
-            self.last_pos = self.pos
-            self.stuck_steps = 0
-
-    class Stats:
-        def __init__(self):
-            self.delivered_count = 0
-            self.delivered_record = defaultdict(int)
-            self.delivered_history = {}
-            self.agv_stats = defaultdict(lambda: {"count": 0, "times": [], "wait_times": [], "travel_times": [], "location_log": []})
-
-    def compute_simulation_result(stats, sim_duration, agv_count):
-        final_agv_stats = {}
-        for agv_id, data in stats.agv_stats.items():
-            count = data["count"]
-            times = data["times"]
-            avg_time = sum(times) / len(times) if times else 0
-            utilization = sum(times) / sim_duration if sim_duration > 0 else 0
-            final_agv_stats[agv_id] = {"count": count, "times": times, "avg_time": avg_time,
-                                       "wait_times": data["wait_times"], "travel_times": data["travel_times"],
-                                       "location_log": data["location_log"], "utilization": utilization}
-        res = {"end_time": sim_duration, "delivered_count": stats.delivered_count,
-               "delivered_history": stats.delivered_history, "delivered_record": dict(stats.delivered_record),
-               "agv_stats": final_agv_stats, "agv_count": agv_count}
-        delivered_counts = res["delivered_count"]
-        throughput = delivered_counts / sim_duration * 3600
-        delivered_per_agv = delivered_counts / agv_count
-        result = {"throughput_per_hour": throughput, "delivered_per_agv": delivered_per_agv,
-                  "avg_cycle": statistics.mean([d["avg_time"] for d in final_agv_stats.values()]) if final_agv_stats else 0,
-                  "avg_wait": statistics.mean([statistics.mean(d["wait_times"]) if d["wait_times"] else 0 for d in final_agv_stats.values()]),
-                  "avg_travel": statistics.mean([statistics.mean(d["travel_times"]) if d["travel_times"] else 0 for d in final_agv_stats.values()])}
-        res.update(result)
-        return res
-
-    def compute_single_run_result(stats, sim_duration, agv_count):
-        base = compute_simulation_result(stats, sim_duration, agv_count)
-        return {"end_time": base["end_time"], "delivered_count": base["delivered_count"],
-                "throughput_per_hour": base["throughput_per_hour"], "delivered_per_agv": base["delivered_per_agv"],
-                "avg_cycle": base["avg_cycle"], "avg_wait": base["avg_wait"],
-                "avg_travel": base["avg_travel"], "analysis_type": "single"}
-
-    def do_pick(agv, env, stats, cell_blocked):
-        now = env.now
-        cell_blocked[agv.pos] = now + 10
-        yield env.timeout(10)
-        agv.cargo = 1
-        if now >= WARMUP_PERIOD:
-            agv.pickup_time = now
-        stats.agv_stats[agv.id]["count"] += 1
-
-    def do_drop(agv, env, stats, cell_blocked):
-        start_drop = env.now
-        cell_blocked[agv.pos] = start_drop + 10
-        yield env.timeout(10)
-        drop_finish = env.now
-        if agv.pickup_time is not None:
-            duration = drop_finish - agv.pickup_time
-            stats.agv_stats[agv.id]["times"].append(duration)
-            agv.pickup_time = None
-        agv.cargo = 0
-        stats.delivered_count += 1
-
-    def extend_sim_duration_if_needed(current_time):
-        global SIM_DURATION
-        if current_time >= SIM_DURATION - 1:
-            SIM_DURATION = current_time + 3000
-            print(f"[extend_sim_duration_if_needed] SIM_DURATION extended to {SIM_DURATION}")
-
-    def restart_simulation_with_current_state():
-        global SIM_RUNNING, SIM_ENV, SIM_STATS, SIM_AGVS, SIM_DURATION, global_speed_factor
-        if not SIM_RUNNING:
+
+    def parse_planner(data):
+        planner = data.get('planner', PLANNER)
+        if planner not in PLANNERS:
+            raise ValueError(f"planner must be one of {PLANNERS}")
+        return planner
+
+    def parse_adaptive(data):
+        # target_ci (예: 0.05)가 있으면 신뢰구간 기반 적응형 분석. ci_metrics / max_runs는 선택
+        if data.get('target_ci') is None:
+            return None
+        adaptive = {'target': float(data['target_ci'])}
+        if adaptive['target'] <= 0:
+            raise ValueError("target_ci must be positive")
+        if data.get('ci_metrics'):
+            adaptive['metrics'] = tuple(data['ci_metrics'])
+        if data.get('max_runs'):
+            adaptive['max_runs'] = int(data['max_runs'])
+        return adaptive
+
+    def parse_method(data):
+        # "replication" (반복실험, 기본) | "batch_means" (긴 단일 실행 + MSER-5 워밍업 절단)
+        method = data.get('method', 'replication')
+        if method not in ANALYSIS_METHODS:
+            raise ValueError(f"method must be one of {ANALYSIS_METHODS}")
+        return method
+
+    def parse_fps(data):
+        # 화면 갱신 (스냅샷 전송) 주기. 기본 1 / UPDATE_INTERVAL. 검사만 하고 적용은 set_client_fps
+        if data.get('fps') is None:
+            return 1.0 / UPDATE_INTERVAL
+        fps = float(data['fps'])
+        if not 0 < fps <= CLIENT_MAX_FPS:
+            raise ValueError(f"fps must be in (0, {CLIENT_MAX_FPS}]")
+        return fps
+
+    def set_client_fps(data, fps):
+        # fps를 요청한 클라이언트의 구독에만 적용한다 (다른 클라이언트의 방송 주기는 그대로)
+        sub = SUBSCRIPTIONS.get(request.sid)
+        if data.get('fps') is None or sub is None or sub.fps == fps:
             return
-        current_time = SIM_ENV.now
-        extend_sim_duration_if_needed(current_time)
-        saved_positions = [agv.pos for agv in SIM_AGVS]
-        saved_cargos = [agv.cargo for agv in SIM_AGVS]
-        saved_paths = [agv.path.copy() for agv in SIM_AGVS]
-        delivered_count = SIM_STATS.delivered_count
-        SIM_RUNNING = False
-        env = RealtimeEnvironment(factor=global_speed_factor, initial_time=current_time)
-        stats = Stats()
-        stats.delivered_count = delivered_count
-        new_agvs = []
-        cell_blocked = {}
-        for i, (pos, cargo, path) in enumerate(zip(saved_positions, saved_cargos, saved_paths)):
-            agv = AGV(i, pos)
-            agv.cargo = cargo
-            agv.path = path
-            new_agvs.append(agv)
-            env.process(agv_process(agv, env, stats, SIM_DURATION, cell_blocked))
-        env.process(record_stats(env, SIM_DURATION, stats))
-        env.process(record_interval_stats(env, SIM_DURATION, stats))
-        if env.now >= SIM_DURATION - 1:
-            SIM_DURATION = env.now + 3000
-        SIM_ENV = env
-        SIM_STATS = stats
-        SIM_AGVS = new_agvs
-        socketio.start_background_task(run_continued_simulation, env, SIM_DURATION, len(new_agvs))
+        subscribe_client(socketio, SUBSCRIPTIONS, request.sid,
+                         Subscription(format=sub.format, fps=fps, agv_ids=sub.agv_ids, viewport=sub.viewport,
+                                      detail=sub.detail))
+
+    def apply_speed_factor():
+        # 실행 중인 실시간 환경의 배속만 바꾼다. 환경/AGV/통계/예약은 그대로이고 다음 이벤트부터 반영된다.
+        if HEADLESS is not None:
+            raise ValueError("max speed run cannot change speed; stop it first")
+        if not SIM_RUNNING or SIM_ENV is None:
+            return
+        SIM_ENV.set_factor(global_speed_factor)
 
     def run_continued_simulation(env, sim_duration, agv_count):
         global SIM_RUNNING, SIM_FINISHED
@@ -304,248 +179,227 @@ def create_app(port):
         except Exception as e:
             print(f"Simulation error: {e}")
         finally:
-            SIM_RUNNING = False
-            SIM_FINISHED = True
-            print("시뮬레이션 종료")
-            result = compute_simulation_result(SIM_STATS, sim_duration, agv_count)
-            socketio.emit('simulation_final', result)
-
-    def agv_process(agv, env, stats, sim_duration, cell_blocked):
-        while env.now < sim_duration:
-            # 동적 목적지 재할당: 만약 이미 정해진 경로의 최종 목적지(dest)가 TARGET_RESERVATIONS에 등록되어 있고, 
-            # 그 예약이 자신보다 낮은(우선순위 높은) AGV에 의한 것이라면 재할당
-            current_cell = (int(round(agv.pos[0])), int(round(agv.pos[1])))
-            if agv.path:
-                dest = agv.path[-1]
-                if dest in TARGET_RESERVATIONS:
-                    if TARGET_RESERVATIONS[dest] < agv.id:
-                        # 다른 AGV(우선순위 높음)가 해당 목적지를 예약한 상태이므로 재할당
-                        if agv.cargo == 0:
-                            new_target = find_nearest_shelf(current_cell, agv.id)
-                        else:
-                            new_target = find_nearest_exit(current_cell, agv.id)
-                        new_path = bfs_path(current_cell, new_target, env.now, cell_blocked, defaultdict(int), current_agv_id=agv.id)
-                        if new_path and len(new_path) > 1:
-                            agv.path = new_path
-                        else:
-                            agv.path = []
-                    else:
-                        TARGET_RESERVATIONS[dest] = agv.id
+            # 일시정지/복원으로 중간에 멈춘 환경이면 (이미 다른 환경으로 바뀌었을 수 있음) 아무것도 하지 않는다
+            if env is SIM_ENV and env.now >= sim_duration:
+                SIM_RUNNING = False
+                SIM_FINISHED = True
+                print("시뮬레이션 종료")
+                result = compute_simulation_result(SIM_STATS, sim_duration, agv_count)
+                socketio.emit('simulation_final', result)
 
-            if abs(agv.pos[0] - agv.last_pos[0]) < 0.001 and abs(agv.pos[1] - agv.last_pos[1]) < 0.001:
-                agv.stuck_steps += 1
-            else:
-                agv.stuck_steps = 0
-            agv.last_pos = agv.pos
-            if agv.stuck_steps > 50:
-                agv.path = []
-                current_cell = (int(round(agv.pos[0])), int(round(agv.pos[1])))
-                RESERVED_CELLS[current_cell] = agv.id
-            current_cell = (int(round(agv.pos[0])), int(round(agv.pos[1])))
-            # 하역: cargo==1이면 출구로 이동
-            if agv.cargo == 1 and current_cell in exit_coords:
-                available_exit = find_nearest_exit(current_cell, agv.id)
-                if available_exit != current_cell:
-                    new_path = bfs_path(current_cell, available_exit, env.now, cell_blocked, defaultdict(int), current_agv_id=agv.id)
-                    if new_path and len(new_path) > 1:
-                        agv.path = new_path
-                    yield env.timeout(0.1)
-                    continue
-            # 적재: cargo==0이고 현재 위치가 적재 구역
-            if agv.cargo == 0 and current_cell in shelf_coords:
-                busy = any(other.id != agv.id and (int(round(other.pos[0])), int(round(other.pos[1]))) == current_cell and other.cargo == 0 for other in SIM_AGVS)
-                if busy:
-                    new_target = find_nearest_shelf(current_cell, agv.id)
-                    if new_target != current_cell:
-                        new_path = bfs_path(current_cell, new_target, env.now, cell_blocked, defaultdict(int), current_agv_id=agv.id)
-                        if new_path and len(new_path) > 1:
-                            agv.path = new_path
-                        yield env.timeout(0.1)
-                        continue
-                yield env.process(do_pick(agv, env, stats, cell_blocked))
-                target = find_nearest_exit(current_cell, agv.id)
-                new_path = bfs_path(current_cell, target, env.now, cell_blocked, defaultdict(int), current_agv_id=agv.id)
-                if new_path and len(new_path) > 1:
-                    agv.path = new_path
-                yield env.timeout(random.uniform(0.5, 1.5))
-                continue
-            if not agv.path or len(agv.path) <= 1:
-                if agv.cargo == 0:
-                    target = find_nearest_shelf(current_cell, agv.id)
-                    path = bfs_path(current_cell, target, env.now, cell_blocked, defaultdict(int), current_agv_id=agv.id)
-                    agv.path = path if path is not None else []
-                else:
-                    target = find_nearest_exit(current_cell, agv.id)
-                    path = bfs_path(current_cell, target, env.now, cell_blocked, defaultdict(int), current_agv_id=agv.id)
-                    agv.path = path if path is not None else []
-            if len(agv.path) > 1:
-                next_cell = agv.path[1]
-                occupied_cells = {(int(round(other.pos[0])), int(round(other.pos[1]))) for other in SIM_AGVS if other.id != agv.id}
-                if next_cell in occupied_cells or (next_cell in RESERVED_CELLS and RESERVED_CELLS[next_cell] != agv.id):
-                    yield env.timeout(random.uniform(0.1, 0.3))
-                    continue
-                if next_cell not in RESERVED_CELLS:
-                    RESERVED_CELLS[next_cell] = agv.id
-                current_pos = agv.pos
-                dx = next_cell[0] - current_pos[0]
-                dy = next_cell[1] - current_pos[1]
-                distance = (dx**2 + dy**2)**0.5
-                num_steps = int(distance / STEP_SIZE)
-                for _ in range(num_steps):
-                    current_pos = (current_pos[0] + STEP_SIZE * dx / distance, current_pos[1] + STEP_SIZE * dy / distance)
-                    yield env.timeout(STEP_SIZE)
-                    agv.pos = current_pos
-                remaining = distance - num_steps * STEP_SIZE
-                if remaining > 0:
-                    current_pos = (current_pos[0] + remaining * dx / distance, current_pos[1] + remaining * dy / distance)
-                    yield env.timeout(remaining)
-                    agv.pos = current_pos
-                agv.pos = (float(next_cell[0]), float(next_cell[1]))
-                agv.arrival_time = env.now
-                if next_cell in RESERVED_CELLS and RESERVED_CELLS[next_cell] == agv.id:
-                    del RESERVED_CELLS[next_cell]
-                agv.path.pop(0)
-            else:
-                yield env.timeout(0.1)
-            current_int_cell = (int(round(agv.pos[0])), int(round(agv.pos[1])))
-            if agv.cargo == 0 and current_int_cell in shelf_coords:
-                busy = any(other.id != agv.id and (int(round(other.pos[0])), int(round(other.pos[1]))) == current_int_cell and other.cargo == 0 for other in SIM_AGVS)
-                if busy:
-                    new_target = find_nearest_shelf(current_int_cell, agv.id)
-                    if new_target != current_int_cell:
-                        new_path = bfs_path(current_int_cell, new_target, env.now, cell_blocked, defaultdict(int), current_agv_id=agv.id)
-                        if new_path and len(new_path) > 1:
-                            agv.path = new_path
-                        yield env.timeout(0.1)
-                        continue
-                yield env.process(do_pick(agv, env, stats, cell_blocked))
-                target = find_nearest_exit(current_int_cell, agv.id)
-                new_path = bfs_path(current_int_cell, target, env.now, cell_blocked, defaultdict(int), current_agv_id=agv.id)
-                if new_path and len(new_path) > 1:
-                    agv.path = new_path
-                yield env.timeout(random.uniform(0.5, 1.5))
-            elif agv.cargo == 1 and current_int_cell in exit_coords:
-                available_exit = find_nearest_exit(current_int_cell, agv.id)
-                if available_exit != current_int_cell:
-                    new_path = bfs_path(current_int_cell, available_exit, env.now, cell_blocked, defaultdict(int), current_agv_id=agv.id)
-                    if new_path and len(new_path) > 1:
-                        agv.path = new_path
-                    yield env.timeout(0.1)
-                    continue
-                yield env.process(do_drop(agv, env, stats, cell_blocked))
-                target = find_nearest_shelf(current_int_cell, agv.id)
-                new_path = bfs_path(current_int_cell, target, env.now, cell_blocked, defaultdict(int), current_agv_id=agv.id)
-                if new_path and len(new_path) > 1:
-                    agv.path = new_path
-                yield env.timeout(random.uniform(0.5, 1.5))
-
-    def record_stats(env, sim_duration, stats):
-        while env.now < sim_duration:
-            stats.delivered_record[int(env.now)] = stats.delivered_count
-            yield env.timeout(1)
-
-    def record_interval_stats(env, sim_duration, stats):
-        t = CHECK_INTERVAL
-        while t <= sim_duration:
-            yield env.timeout(CHECK_INTERVAL)
-            stats.delivered_history[t] = stats.delivered_count
-            t += CHECK_INTERVAL
-
-    def run_simulation_task(agv_count, sim_duration):
-        global SIM_RUNNING, SIM_ENV, SIM_STATS, SIM_AGVS, SIM_DURATION, SIM_FINISHED
+    def run_simulation_task(agv_count, sim_duration, planner=PLANNER):
+        global SIM_RUNNING, SIM, SIM_ENV, SIM_STATS, SIM_AGVS, SIM_DURATION, SIM_FINISHED
         SIM_RUNNING = True
         SIM_FINISHED = False
         if SIM_ENV is not None and SIM_ENV.now >= sim_duration - 1:
             sim_duration = SIM_ENV.now + 3000
-            global SIM_DURATION
             SIM_DURATION = sim_duration
-        env = RealtimeEnvironment(factor=1)
-        stats = Stats()
-        agvs = []
-        for i in range(agv_count):
-            pos = get_start_position(i)
-            agv = AGV(i, pos)
-            agvs.append(agv)
-            env.process(agv_process(agv, env, stats, sim_duration, {}))
-        env.process(record_stats(env, sim_duration, stats))
-        env.process(record_interval_stats(env, sim_duration, stats))
+        env = AdjustableRealtimeEnvironment(factor=1, strict=False)
+        sim = create_simulation(env, agv_count, sim_duration, move_mode=MOVE_MODE, planner=planner)
+        stats = sim.stats
+        SIM = sim
         SIM_ENV = env
         SIM_STATS = stats
-        SIM_AGVS = agvs
+        SIM_AGVS = sim.agvs
         env.run(until=sim_duration)
+        if env is not SIM_ENV or env.now < sim_duration:
+            return
         SIM_RUNNING = False
         SIM_FINISHED = True
         print("시뮬레이션 종료")
         result = compute_single_run_result(stats, sim_duration, agv_count)
         socketio.emit('simulation_final', result)
 
-    def run_one_sim_analysis(agv_count, sim_duration):
-        env = Environment()
-        stats = Stats()
-        agvs = []
-        for i in range(agv_count):
-            pos = get_start_position(i)
-            agv = AGV(i, pos)
-            agvs.append(agv)
-        for agv in agvs:
-            env.process(agv_process(agv, env, stats, sim_duration, {}))
-        env.process(record_stats(env, sim_duration, stats))
-        env.process(record_interval_stats(env, sim_duration, stats))
-        env.run(until=sim_duration)
-        result = compute_simulation_result(stats, sim_duration, agv_count)
-        return result
-
-    def run_multiple_sim_analysis(agv_count, sim_duration, repeat_runs=REPEAT_RUNS):
-        results = []
-        for i in range(repeat_runs):
-            res = run_one_sim_analysis(agv_count, sim_duration)
-            results.append(res)
-        avg_throughput = statistics.mean([r["throughput_per_hour"] for r in results]) if results else 0
-        std_throughput = statistics.stdev([r["throughput_per_hour"] for r in results]) if len(results) > 1 else 0
-        avg_delivered = statistics.mean([r["delivered_per_agv"] for r in results]) if results else 0
-        std_delivered = statistics.stdev([r["delivered_per_agv"] for r in results]) if len(results) > 1 else 0
-        avg_cycle = statistics.mean([r["avg_cycle"] for r in results]) if results else 0
-        avg_wait = statistics.mean([r["avg_wait"] for r in results]) if results else 0
-        avg_travel = statistics.mean([r["avg_travel"] for r in results]) if results else 0
-        util_list = []
-        for r in results:
-            if "agv_stats" in r and r["agv_stats"]:
-                vals = [data.get("utilization", 0) for data in r["agv_stats"].values()]
-                util_list.append(statistics.mean(vals))
-        avg_util = statistics.mean(util_list) if util_list else 0
-        avg_result = {"repeat_runs": repeat_runs, "agv_count": agv_count, "throughput_per_hour": avg_throughput,
-                      "std_throughput_per_hour": std_throughput, "delivered_per_agv": avg_delivered,
-                      "std_delivered_per_agv": std_delivered, "avg_cycle": avg_cycle, "avg_wait": avg_wait,
-                      "avg_travel": avg_travel, "avg_utilization": avg_util, "analysis_type": "deep"}
-        return avg_result
-
-    def analysis_worker(agv_count, sim_duration, repeat_runs, output_queue):
-        res = run_multiple_sim_analysis(agv_count, sim_duration, repeat_runs=repeat_runs)
-        output_queue.put(res)
-
-    def run_simulation_task_analysis(agv_count, sim_duration):
-        from multiprocessing import Process, Queue
-        q = Queue()
-        p = Process(target=analysis_worker, args=(agv_count, sim_duration, REPEAT_RUNS, q))
-        p.start()
-        result = None
-        while result is None:
-            if not q.empty():
-                result = q.get()
+    def deliver(sid, progress_events, final_event, kind, payload):
+        # 작업 메시지 하나를 클라이언트에 전달한다. 작업이 끝났으면 True
+        # progress_events: 종류 -> 이벤트 이름 (또는 payload를 받는 함수)
+        if kind in progress_events:
+            handler = progress_events[kind]
+            if callable(handler):
+                handler(payload)
             else:
-                eventlet.sleep(0.1)
+                socketio.emit(handler, payload, to=sid)
+            return False
+        if kind == "error":
+            logger.error(f"Analysis failed: {payload}")
+            socketio.emit('error', {'message': 'analysis failed'}, to=sid)
+        else:
+            socketio.emit(final_event, payload, to=sid)
+        return True
+
+    def relay_worker(p, q, sid, progress_events, final_event):
+        # 작업 프로세스 p가 큐 q로 보내는 메시지를 클라이언트에 전달한다.
+        # 큐 대기는 tpool(네이티브 스레드)에서 해서 eventlet 루프를 막지 않고 polling도 하지 않는다.
+        p.start()
+        while True:
+            try:
+                kind, payload = tpool.execute(q.get, True, 1.0)
+            except queue.Empty:
+                if not p.is_alive():
+                    kind, payload = "error", "analysis process exited unexpectedly"
+                else:
+                    continue
+            if deliver(sid, progress_events, final_event, kind, payload):
+                break
         p.join()
-        socketio.emit('simulation_final', result)
+
+    def emit_job_status(job, state, subscribers=None, **extra):
+        status = dict({'job_id': job['id'], 'kind': job['kind'], 'state': state}, **extra)
+        for sid in job['subscribers'] if subscribers is None else subscribers:
+            socketio.emit('job_status', status, to=sid)
+
+    def dispatch_next_job():
+        job = ANALYSIS_HOST.dispatch()
+        if job is not None:
+            emit_job_status(job, 'running')
+
+    def relay_analysis_host():
+        # 분석 호스트 출력 (job_id, 종류, payload)을 그 작업의 구독자 전원에게 보낸다 (합쳐진 요청 포함)
+        host = ANALYSIS_HOST
+        while True:
+            try:
+                job_id, kind, payload = tpool.execute(host.output.get, True, 1.0)
+            except queue.Empty:
+                if host.process is None or not host.process.is_alive():
+                    for job in list(host.jobs.values()):
+                        for sid in job['subscribers']:
+                            deliver(sid, {}, None, "error", "analysis host exited")
+                    return
+                continue
+            if job_id is None:
+                host.note(kind, payload)
+                print(f"분석 호스트 {kind}: {payload}")
+                continue
+            job = host.jobs.get(job_id)
+            if job is None:
+                continue
+            if kind == "cancelled":
+                host.finish(job_id, cancelled=True)
+                emit_job_status(job, 'cancelled', job['subscribers'] + job['cancelled_by'])
+                dispatch_next_job()
+                continue
+            progress_events, final_event = JOB_EVENTS[job['kind']]
+            if kind == "final":
+                store_result(job, payload)
+            if isinstance(payload, dict):
+                payload = dict(payload, job_id=job_id)
+            for sid in job['subscribers']:
+                deliver(sid, progress_events, final_event, kind, payload)
+            if kind not in progress_events:
+                host.finish(job_id)
+                dispatch_next_job()
+
+    def store_result(job, result):
+        if RESULT_CACHE is None or job.get('cache_key') is None:
+            return
+        try:
+            RESULT_CACHE.put(job['cache_key'], job['kind'], result)
+        except Exception as e:
+            logger.warning(f"Result cache store failed: {e}")
+
+    def cached_result(key):
+        if RESULT_CACHE is None:
+            return None
+        try:
+            return RESULT_CACHE.get(key)
+        except Exception as e:
+            logger.warning(f"Result cache lookup failed: {e}")
+            return None
+
+    def submit_analysis_job(kind, sid, priority=0, **kwargs):
+        # 같은 시나리오의 결과가 캐시에 있으면 바로 최종 이벤트를 보낸다 (job_id None, state 'cached').
+        # 없으면 작업 대기열에 넣는다. 같은 요청이 대기/실행 중이면 그 작업에 구독자로 붙는다
+        key = scenario_key(kind, kwargs) if RESULT_CACHE is not None else None
+        result = cached_result(key)
+        if result is not None:
+            socketio.emit('job_status', {'job_id': None, 'kind': kind, 'state': 'cached'}, to=sid)
+            deliver(sid, {}, JOB_EVENTS[kind][1], "final", dict(result, cached=True))
+            return None
+        job_id, coalesced = ANALYSIS_HOST.submit(kind, subscriber=sid, priority=priority, **kwargs)
+        job = ANALYSIS_HOST.jobs[job_id]
+        job['cache_key'] = key
+        emit_job_status(job, job['state'], [sid], coalesced=coalesced, position=ANALYSIS_HOST.position(job_id))
+        dispatch_next_job()
+        return job_id
+
+    def parse_priority(data):
+        # 작업 우선순위 (클수록 먼저, 기본 0)
+        return int(data.get('priority', 0))
+
+    def run_simulation_task_analysis(agv_count, sim_duration, planner=PLANNER, sid=None, adaptive=None,
+                                     method="replication", priority=0):
+        # 반복실험은 분석 호스트의 (미리 띄워 둔) 프로세스 풀에서 병렬로 돈다.
+        submit_analysis_job("analysis", sid, priority, agv_count=agv_count, sim_duration=sim_duration,
+                            repeat_runs=REPEAT_RUNS, planner=planner, adaptive=adaptive, method=method)
+
+    def run_fleet_sweep_task(counts, sim_duration, repeat_runs, planner=PLANNER, sid=None, knee_threshold=None,
+                             priority=0):
+        # 반복 1회마다 'simulation_opt_replication', 대수별 결과는 'simulation_opt_progress', 전체는 'simulation_opt'
+        submit_analysis_job("sweep", sid, priority, counts=counts, sim_duration=sim_duration,
+                            repeat_runs=repeat_runs, planner=planner, knee_threshold=knee_threshold)
+
+    def run_headless_task(agv_count, sim_duration, planner=PLANNER, fps=HEADLESS_FPS):
+        # speed "max": 실시간 환경 대신 별도 프로세스의 일반 Environment로 최대한 빨리 돌린다.
+        # 워커가 wall-clock fps로 보내는 스냅샷 중 최신 것을 update_loop_task가 UPDATE_INTERVAL마다 내보낸다.
+        global SIM_RUNNING, SIM_FINISHED, HEADLESS
+        q = multiprocessing.Queue()
+        control = multiprocessing.Queue()
+        p = multiprocessing.Process(target=headless_worker, args=(agv_count, sim_duration, q, control, planner, fps))
+        HEADLESS = {"process": p, "control": control, "frame": None, "paused": False, "congestion": None}
+        SIM_RUNNING = True
+        SIM_FINISHED = False
+
+        def on_frame(frame):
+            heatmap = frame.pop("congestion", None)
+            if heatmap is not None:
+                HEADLESS["congestion"] = heatmap
+            HEADLESS["frame"] = frame
+
+        def on_snapshot(blob):
+            waiter = HEADLESS.pop("snapshot_waiter", None)
+            if waiter is not None:
+                waiter.send(blob)
+
+        try:
+            relay_worker(p, q, None, {"frame": on_frame, "snapshot": on_snapshot}, 'simulation_final')
+        finally:
+            SIM_RUNNING = False
+            SIM_FINISHED = True
+            HEADLESS = None
+            print("시뮬레이션 종료")
 
     @socketio.on('connect')
     def handle_connect():
         print("클라이언트가 시뮬레이터에 연결되었습니다.")
+        subscribe_client(socketio, SUBSCRIPTIONS, request.sid, Subscription())
         emit('status', {'message': 'Simulator connected'})
 
     @socketio.on('disconnect')
     def handle_disconnect():
+        SUBSCRIPTIONS.pop(request.sid, None)
+        ANALYSIS_HOST.drop_subscriber(request.sid)
+        dispatch_next_job()
         print("클라이언트 연결이 끊어졌습니다.")
 
+    @socketio.on('subscribe')
+    def handle_subscribe(data=None):
+        # 방송 형식/주기/대상 변경 (parse_subscription 참고).
+        # binary는 'fleet_frame' 델타 프레임. 새 구독은 인코더가 새로 시작하므로 첫 프레임이 키프레임이다.
+        try:
+            sub = parse_subscription(data or {})
+        except (TypeError, ValueError) as e:
+            emit('error', {'message': f'invalid subscription: {e}'})
+            return
+        subscribe_client(socketio, SUBSCRIPTIONS, request.sid, sub)
+        emit('subscribed', sub.describe())
+
+    @socketio.on('unsubscribe')
+    def handle_unsubscribe(data=None):
+        # 기본 구독 (JSON, 전체, UPDATE_INTERVAL)으로 되돌린다
+        sub = Subscription()
+        subscribe_client(socketio, SUBSCRIPTIONS, request.sid, sub)
+        emit('subscribed', sub.describe())
+
     @socketio.on('ping')
     def handle_ping(data):
         emit('pong', {'timestamp': time.time()})
@@ -565,6 +419,8 @@ def create_app(port):
                         return
                     agv_count = int(data.get('agv_count', 3))
                     duration = int(data.get('duration', 3000))
+                    planner = parse_planner(data)
+                    fps = parse_fps(data)
                     speed_str = data.get('speed', "1")
                     if speed_str == "max":
                         global_speed_factor = 1.0
@@ -577,13 +433,20 @@ def create_app(port):
                         socketio.emit('message', {'error': 'Simulation is already running'})
                         return
                     SIM_PAUSED = False
-                    socketio.start_background_task(run_simulation_task, agv_count, duration)
+                    set_client_fps(data, fps)
+                    if speed_str == "max":
+                        socketio.start_background_task(run_headless_task, agv_count, duration, planner, fps)
+                    else:
+                        socketio.start_background_task(run_simulation_task, agv_count, duration, planner)
                 elif command == 'stop':
                     pause_simulation()
                     is_paused = True
                 elif command == 'analyze':
                     agv_count = int(data.get('agv_count', 3))
                     duration = int(data.get('duration', 3000))
+                    planner = parse_planner(data)
+                    adaptive = parse_adaptive(data)
+                    method = parse_method(data)
                     speed_str = data.get('speed', "1")
                     if speed_str == "max":
                         global_speed_factor = 1.0
@@ -596,7 +459,8 @@ def create_app(port):
                     if SIM_RUNNING:
                         socketio.emit('message', {'error': 'Simulation is already running'})
                         return
-                    socketio.start_background_task(run_simulation_task_analysis, agv_count, duration)
+                    socketio.start_background_task(run_simulation_task_analysis, agv_count, duration, planner, None,
+                                                   adaptive, method, parse_priority(data))
             if 'speed' in data:
                 try:
                     new_speed = float(data['speed'])
@@ -604,7 +468,7 @@ def create_app(port):
                         socketio.emit('message', {'error': 'speed must be positive'})
                         return
                     global_speed_factor = 1.0 / new_speed
-                    restart_simulation_with_current_state()
+                    apply_speed_factor()
                 except Exception as e:
                     socketio.emit('message', {'error': str(e)})
             if 'agv_count' in data:
@@ -627,6 +491,8 @@ def create_app(port):
         try:
             agv_count = int(data.get('agv_count', 3))
             duration = int(data.get('duration', 3000))
+            planner = parse_planner(data)
+            fps = parse_fps(data)
             speed_str = data.get('initial_speed', "1")
             if speed_str == "max":
                 global_speed_factor = 1.0
@@ -639,7 +505,11 @@ def create_app(port):
                 emit('error', {'message': 'Simulation is already running'})
                 return
             SIM_PAUSED = False
-            socketio.start_background_task(run_simulation_task, agv_count, duration)
+            set_client_fps(data, fps)
+            if speed_str == "max":
+                socketio.start_background_task(run_headless_task, agv_count, duration, planner, fps)
+            else:
+                socketio.start_background_task(run_simulation_task, agv_count, duration, planner)
             emit('simulation_status', {'status': 'running'})
         except Exception as e:
             emit('error', {'message': str(e)})
@@ -650,6 +520,9 @@ def create_app(port):
         try:
             agv_count = int(data.get('agv_count', 3))
             duration = int(data.get('duration', 3000))
+            planner = parse_planner(data)
+            adaptive = parse_adaptive(data)
+            method = parse_method(data)
             initial_speed_str = data.get('initial_speed', "1")
             output_mode = data.get('output', "final")
             if initial_speed_str == "max":
@@ -659,8 +532,25 @@ def create_app(port):
                 if global_speed_factor <= 0:
                     emit('error', {'message': 'speed must be positive or "max"'})
                     return
-            result = run_multiple_sim_analysis(agv_count, duration, repeat_runs=REPEAT_RUNS)
-            emit('simulation_final', result)
+            socketio.start_background_task(run_simulation_task_analysis, agv_count, duration, planner, request.sid,
+                                           adaptive, method, parse_priority(data))
+        except Exception as e:
+            emit('error', {'message': str(e)})
+
+    @socketio.on('simulate_opt')
+    def handle_simulate_opt(data):
+        # AGV 대수 스윕: min_agv..max_agv (step) 대수별 repeat_runs회, 포화점 뒤 대수는 조기 종료
+        try:
+            counts = fleet_counts(int(data.get('min_agv', 3)), int(data.get('max_agv', 6)), int(data.get('step', 1)))
+            duration = int(data.get('duration', 3000))
+            repeat_runs = int(data.get('repeat_runs', REPEAT_RUNS))
+            planner = parse_planner(data)
+            knee_threshold = data.get('knee_threshold')
+            if knee_threshold is not None:
+                knee_threshold = float(knee_threshold)
+            socketio.start_background_task(run_fleet_sweep_task, counts, duration, repeat_runs, planner,
+                                           request.sid, knee_threshold, parse_priority(data))
+            emit('simulation_status', {'status': 'sweep_started', 'counts': counts})
         except Exception as e:
             emit('error', {'message': str(e)})
 
@@ -673,52 +563,133 @@ def create_app(port):
                 emit('error', {'message': 'speed must be positive'})
                 return
             global_speed_factor = new_speed
-            restart_simulation_with_current_state()
+            apply_speed_factor()
             emit('status', {'message': f'Speed updated to {new_speed}'})
             print(f"[update_speed] Global speed factor updated to: {new_speed}")
         except Exception as e:
             emit('error', {'message': str(e)})
 
+    @socketio.on('cancel_job')
+    def handle_cancel_job(data):
+        # 이 클라이언트만 작업에서 빠진다. 다른 구독자(합쳐진 같은 요청)가 없으면 계산을 실제로 멈춘다
+        try:
+            job_id = int(data['job_id'])
+            job = ANALYSIS_HOST.jobs.get(job_id)
+            result = ANALYSIS_HOST.cancel(job_id, request.sid)
+            if result is None:
+                emit('error', {'message': f'unknown job {job_id}'})
+                return
+            state = {'dequeued': 'cancelled', 'killing': 'cancelling', 'detached': 'detached'}[result]
+            emit_job_status(job, state, [request.sid])
+            dispatch_next_job()
+        except Exception as e:
+            emit('error', {'message': str(e)})
+
     @app.route('/health')
     def health_check():
-        return jsonify({"status": "ok"})
+        return jsonify({"status": "ok", "analysis": ANALYSIS_HOST.describe(),
+                        "cache": RESULT_CACHE.describe() if RESULT_CACHE is not None else None,
+                        "clients": {sid: sub.describe() for sid, sub in SUBSCRIPTIONS.items()}})
 
     def pause_simulation():
-        global SIM_RUNNING, SIM_ENV, SIM_STATS, SIM_AGVS, SIM_DURATION, delivered_count_paused, current_time_paused, current_positions, current_cargos, current_paths
+        # 전체 상태를 스냅샷으로 저장하고 실행 중인 환경을 멈춘다
+        global SIM_RUNNING, SIM_SNAPSHOT
+        if HEADLESS is not None:
+            HEADLESS["control"].put("pause")
+            HEADLESS["paused"] = True
+            return
         if not SIM_RUNNING:
             return
-        current_time_paused = SIM_ENV.now
+        SIM_SNAPSHOT = snapshot_simulation(SIM)
+        stop_environment(SIM_ENV)
         current_positions.clear()
-        current_cargos.clear()
-        current_paths.clear()
         for agv in SIM_AGVS:
             current_positions.append(agv.pos)
-            current_cargos.append(agv.cargo)
-            current_paths.append(agv.path.copy() if agv.path else [])
-        delivered_count_paused = SIM_STATS.delivered_count
         SIM_RUNNING = False
 
     def resume_simulation():
-        global SIM_RUNNING, SIM_ENV, SIM_STATS, SIM_AGVS, SIM_DURATION, delivered_count_paused, current_time_paused
-        env = RealtimeEnvironment(factor=global_speed_factor, initial_time=current_time_paused)
-        stats = Stats()
-        stats.delivered_count = delivered_count_paused
-        new_agvs = []
-        cell_blocked = {}
-        for i, (pos, cargo, path) in enumerate(zip(current_positions, current_cargos, current_paths)):
-            agv = AGV(i, pos)
-            agv.cargo = cargo
-            agv.path = path
-            new_agvs.append(agv)
-            env.process(agv_process(agv, env, stats, SIM_DURATION, cell_blocked))
-        env.process(record_stats(env, SIM_DURATION, stats))
-        env.process(record_interval_stats(env, SIM_DURATION, stats))
-        if env.now >= SIM_DURATION - 1:
-            SIM_DURATION = env.now + 3000
-        SIM_ENV = env
-        SIM_STATS = stats
-        SIM_AGVS = new_agvs
-        socketio.start_background_task(run_continued_simulation, env, SIM_DURATION, len(new_agvs))
+        if HEADLESS is not None:
+            HEADLESS["control"].put("resume")
+            HEADLESS["paused"] = False
+            return
+        if SIM_SNAPSHOT is None:
+            return
+        start_from_snapshot(SIM_SNAPSHOT)
+
+    def start_from_snapshot(blob):
+        # 스냅샷에서 실시간 환경으로 이어서 실행 (통계/예약/난수 상태 유지)
+        global SIM, SIM_ENV, SIM_STATS, SIM_AGVS, SIM_DURATION
+        if SIM_RUNNING and SIM_ENV is not None:
+            stop_environment(SIM_ENV)
+        sim = restore_simulation(blob, lambda initial_time: AdjustableRealtimeEnvironment(
+            initial_time=initial_time, factor=global_speed_factor, strict=False), start=False)
+        if sim.env.now >= sim.sim_duration - 1:
+            sim.sim_duration = sim.env.now + 3000
+        SIM_DURATION = sim.sim_duration
+        sim.start()
+        SIM = sim
+        SIM_ENV = sim.env
+        SIM_STATS = sim.stats
+        SIM_AGVS = sim.agvs
+        socketio.start_background_task(run_continued_simulation, sim.env, SIM_DURATION, len(sim.agvs))
+
+    def live_snapshot():
+        # 현재 라이브 실행의 스냅샷. 최고속 실행이면 워커에 요청해서 받는다
+        if HEADLESS is not None:
+            waiter = eventlet.event.Event()
+            HEADLESS["snapshot_waiter"] = waiter
+            HEADLESS["control"].put("snapshot")
+            return waiter.wait(timeout=5)
+        if SIM_RUNNING and SIM is not None:
+            return snapshot_simulation(SIM)
+        return SIM_SNAPSHOT
+
+    def run_fork_task(blob, forks, horizon, sid=None, priority=0):
+        submit_analysis_job("fork", sid, priority, blob=blob, forks=forks, horizon=horizon)
+
+    @socketio.on('snapshot')
+    def handle_snapshot(data=None):
+        try:
+            t0 = time.perf_counter()
+            blob = live_snapshot()
+            if blob is None:
+                emit('error', {'message': 'no simulation to snapshot'})
+                return
+            emit('snapshot', {'blob': blob, 'size': len(blob), 'ms': (time.perf_counter() - t0) * 1000})
+        except Exception as e:
+            emit('error', {'message': str(e)})
+
+    @socketio.on('restore')
+    def handle_restore(data):
+        global SIM_RUNNING
+        try:
+            if HEADLESS is not None:
+                emit('error', {'message': 'stop the max speed run before restoring'})
+                return
+            t0 = time.perf_counter()
+            start_from_snapshot(data['blob'])
+            SIM_RUNNING = True
+            emit('simulation_status', {'status': 'running', 'restored_ms': (time.perf_counter() - t0) * 1000})
+        except Exception as e:
+            emit('error', {'message': str(e)})
+
+    @socketio.on('fork')
+    def handle_fork(data):
+        # 현재 상태에서 forks개의 미래를 헤드리스로 horizon초씩 돌려 예측 ('fork_progress' -> 'fork_final')
+        try:
+            blob = data.get('blob') or live_snapshot()
+            if blob is None:
+                emit('error', {'message': 'no simulation to fork'})
+                return
+            forks = int(data.get('forks', FORK_COUNT))
+            horizon = float(data.get('horizon', FORK_HORIZON))
+            if forks <= 0 or horizon <= 0:
+                emit('error', {'message': 'forks and horizon must be positive'})
+                return
+            socketio.start_background_task(run_fork_task, blob, forks, horizon, request.sid, parse_priority(data))
+            emit('simulation_status', {'status': 'fork_started', 'forks': forks, 'horizon': horizon})
+        except Exception as e:
+            emit('error', {'message': str(e)})
 
     @socketio.on('pause_simulation')
     def handle_pause():
@@ -738,42 +709,281 @@ def create_app(port):
         except Exception as e:
             emit('error', {'message': str(e)})
 
+    def current_tick():
+        # 이번 tick의 함대 상태 (모든 구독이 공유). 보낼 것이 없으면 None
+        if HEADLESS is not None:
+            # 최고속 실행: 워커의 최신 스냅샷. speed = 달성한 sim초/wall초
+            frame = HEADLESS["frame"]
+            if frame is None:
+                return None
+            return frame_tick(frame, {'sim_time': frame['sim_time'], 'delivered_count': frame['delivered_count'],
+                                      'speed': 0.0 if HEADLESS["paused"] else round(frame['speed'], 1)})
+        current_time = round(SIM_ENV.now, 2) if SIM_ENV else 0
+        delivered_count = SIM_STATS.delivered_count if SIM_STATS else 0
+        if not SIM_RUNNING:
+            if not current_positions:
+                return None
+            agvs = [(i, pos[0], pos[1], 0) for i, pos in enumerate(current_positions)]
+        else:
+            agvs = [(agv.id, agv.pos[0], agv.pos[1], agv.state_flags) for agv in SIM_AGVS]
+        return {"sim_time": current_time, "delivered_count": delivered_count, "agvs": agvs, "extra": {}}
+
     def update_loop_task():
+        # tick마다 상태를 한 번 만들어 각 클라이언트 대기열에 넣는다. 실제 전송은 client_sender가 한다.
         while True:
-            if not SIM_RUNNING:
-                if current_positions:
-                    state = [{'agv_id': i, 'location_x': pos[0], 'location_y': pos[1]} for i, pos in enumerate(current_positions)]
-                    socketio.emit('message', {'agv_count': len(current_positions), 'agvs': state})
-                eventlet.sleep(UPDATE_INTERVAL)
-                continue
-            current_time = round(SIM_ENV.now, 2) if SIM_ENV else 0
-            delivered_count = SIM_STATS.delivered_count if SIM_STATS else 0
-            state = []
-            for agv in SIM_AGVS:
-                state.append({'agv_id': agv.id, 'location_x': agv.pos[0], 'location_y': agv.pos[1]})
-            socketio.emit('message', {'agv_count': len(SIM_AGVS), 'agvs': state})
+            tick = current_tick()
+            if tick is not None:
+                for sub in list(SUBSCRIPTIONS.values()):
+                    sub.offer(tick)
             eventlet.sleep(UPDATE_INTERVAL)
 
+    def current_heatmap():
+        # 지금 실행의 혼잡 히트맵 (sim_engine.congestion_heatmap 형식) / 없으면 None
+        if HEADLESS is not None:
+            return HEADLESS["congestion"]
+        if SIM_RUNNING and SIM is not None:
+            return congestion_heatmap(SIM)
+        return None
+
+    def congestion_loop_task():
+        # 혼잡 히트맵은 위치보다 훨씬 느리게 변하므로 CONGESTION_HEATMAP_INTERVAL마다, sim 시각이 바뀌었을 때만 보낸다
+        last_time = None
+        while True:
+            eventlet.sleep(CONGESTION_HEATMAP_INTERVAL)
+            heatmap = current_heatmap()
+            if heatmap is None or heatmap["sim_time"] == last_time:
+                continue
+            last_time = heatmap["sim_time"]
+            for sid in list(SUBSCRIPTIONS):
+                socketio.emit('congestion_heatmap', heatmap, to=sid)
+
+    global ANALYSIS_HOST, RESULT_CACHE
+    ANALYSIS_HOST = AnalysisHost(analysis_workers).start()
+    try:
+        RESULT_CACHE = ResultCache().open()
+    except Exception as e:
+        logger.warning(f"Result cache disabled: {e}")
+    socketio.start_background_task(relay_analysis_host)
     socketio.start_background_task(update_loop_task)
+    socketio.start_background_task(congestion_loop_task)
     return app, socketio
 
-def run_server(port):
+################################
+# 멀티 세션 호스트 (포트 하나, 세션 id로 라우팅)
+################################
+def create_session_app(port, workers=SESSION_WORKERS):
+    # 세션마다 독립된 시뮬레이션 (AGV/예약/통계/난수 상태)이 워커 프로세스 풀에서 돈다.
+    # 클라이언트는 'session_create' / 'session_join'으로 세션 하나를 구독하고 'session_command'로 제어한다.
+    # 구독자도 명령도 없이 SESSION_IDLE_TIMEOUT이 지난 세션은 닫힌다.
+    app = Flask(__name__)
+    socketio = SocketIO(app, cors_allowed_origins=[os.environ.get('FRONTEND_URL')],
+                        path='/sim',
+                        async_mode='eventlet',
+                        ping_timeout=5000,
+                        ping_interval=2500)
+    manager = SessionManager(workers).start()
+    subscriptions = {}       # sid -> Subscription
+    client_sessions = {}     # sid -> session_id
+    snapshot_requests = {}   # session_id -> [sid]
+
+    def subscribers(session_id):
+        return [sid for sid, attached in client_sessions.items() if attached == session_id]
+
+    def attach(sid, session_id, data):
+        sub = parse_subscription(data)
+        client_sessions[sid] = session_id
+        subscribe_client(socketio, subscriptions, sid, sub)
+        frame = manager.sessions[session_id]["frame"]
+        if frame is not None:
+            sub.offer(session_tick(frame))
+        return sub
+
+    def detach(sid):
+        client_sessions.pop(sid, None)
+        subscriptions.pop(sid, None)
+
+    def session_tick(frame):
+        return frame_tick(frame, {'session_id': frame['session_id'], 'sim_time': frame['sim_time'],
+                                  'delivered_count': frame['delivered_count'], 'speed': frame['speed']})
+
+    def relay_session_worker(worker):
+        # 워커 출력 -> 세션 상태 반영 + 해당 세션 구독자에게 전달
+        while True:
+            try:
+                kind, session_id, payload = tpool.execute(worker["output"].get, True, 1.0)
+            except queue.Empty:
+                if not worker["process"].is_alive():
+                    logger.error(f"session worker {worker['index']} exited")
+                    return
+                continue
+            heatmap = payload.pop("congestion", None) if kind in ("created", "frame") else None
+            manager.handle(kind, session_id, payload)
+            if heatmap is not None:
+                for sid in subscribers(session_id):
+                    socketio.emit('congestion_heatmap', dict(heatmap, session_id=session_id), to=sid)
+            if kind in ("created", "frame"):
+                tick = session_tick(payload)
+                for sid in subscribers(session_id):
+                    sub = subscriptions.get(sid)
+                    if sub is not None:
+                        sub.offer(tick)
+            elif kind == "final":
+                for sid in subscribers(session_id):
+                    socketio.emit('simulation_final', payload, to=sid)
+            elif kind == "snapshot":
+                for sid in snapshot_requests.pop(session_id, []):
+                    socketio.emit('snapshot', {'session_id': session_id, 'blob': payload, 'size': len(payload)}, to=sid)
+            elif kind == "error":
+                for sid in set(subscribers(session_id) + snapshot_requests.pop(session_id, [])):
+                    socketio.emit('error', {'session_id': session_id, 'message': payload}, to=sid)
+            elif kind == "closed":
+                for sid in subscribers(session_id):
+                    socketio.emit('session_closed', {'session_id': session_id}, to=sid)
+                    detach(sid)
+
+    def evict_task():
+        # 구독자가 붙어 있는 세션은 활동 중으로 본다
+        while True:
+            eventlet.sleep(min(10.0, manager.idle_timeout / 2))
+            for session_id in set(client_sessions.values()):
+                manager.touch(session_id)
+            evicted = manager.evict_idle()
+            if evicted:
+                print(f"유휴 세션 종료: {evicted}")
+
+    def parse_session_params(data):
+        speed = data.get('speed', 1)
+        params = {'duration': int(data['duration']) if data.get('duration') is not None else None,
+                  'planner': data.get('planner', PLANNER),
+                  'speed': None if speed == "max" else float(speed),
+                  'fps': float(data.get('fps', HEADLESS_FPS)),
+                  'seed': int(data['seed']) if data.get('seed') is not None else None}
+        if params['speed'] is not None and params['speed'] <= 0:
+            raise ValueError('speed must be positive or "max"')
+        if params['fps'] <= 0:
+            raise ValueError("fps must be positive")
+        return params
+
+    @socketio.on('connect')
+    def handle_connect():
+        emit('status', {'message': 'Session host connected'})
+
+    @socketio.on('disconnect')
+    def handle_disconnect():
+        detach(request.sid)
+
+    @socketio.on('session_create')
+    def handle_session_create(data=None):
+        # {'agv_count', 'duration', 'planner', 'speed': 배율 | "max", 'fps', 'seed'} + 구독 옵션
+        data = data or {}
+        try:
+            params = parse_session_params(data)
+            params['agv_count'] = int(data.get('agv_count', 3))
+            if params['agv_count'] <= 0:
+                raise ValueError("AGV count must be positive")
+            session_id = manager.create(params)
+            attach(request.sid, session_id, data)
+            emit('session_created', {'session_id': session_id})
+        except Exception as e:
+            emit('error', {'message': str(e)})
+
+    @socketio.on('session_restore')
+    def handle_session_restore(data):
+        # 스냅샷 (어느 세션/단일 서버의 'snapshot'이든)에서 새 세션을 시작한다
+        try:
+            params = parse_session_params(data)
+            params['blob'] = data['blob']
+            session_id = manager.create(params)
+            attach(request.sid, session_id, data)
+            emit('session_created', {'session_id': session_id})
+        except Exception as e:
+            emit('error', {'message': str(e)})
+
+    @socketio.on('session_join')
+    def handle_session_join(data):
+        # 다른 클라이언트가 만든 세션 구독 (구독 옵션은 'subscribe'와 같다)
+        try:
+            session_id = data['session_id']
+            if session_id not in manager.sessions:
+                raise KeyError(f"unknown session {session_id}")
+            sub = attach(request.sid, session_id, data)
+            manager.touch(session_id)
+            emit('subscribed', dict(sub.describe(), session_id=session_id))
+        except Exception as e:
+            emit('error', {'message': str(e)})
+
+    @socketio.on('session_leave')
+    def handle_session_leave(data=None):
+        detach(request.sid)
+        emit('subscribed', {'session_id': None})
+
+    @socketio.on('session_command')
+    def handle_session_command(data):
+        # {'session_id', 'command': 'pause' | 'resume' | 'speed' | 'snapshot' | 'close', 'speed'}
+        try:
+            session_id = data.get('session_id') or client_sessions.get(request.sid)
+            command = data['command']
+            payload = None
+            if command == 'speed':
+                speed = data.get('speed')
+                payload = None if speed == "max" else float(speed)
+                if payload is not None and payload <= 0:
+                    raise ValueError('speed must be positive or "max"')
+            if command == 'snapshot':
+                snapshot_requests.setdefault(session_id, []).append(request.sid)
+            manager.command(session_id, command, payload)
+        except Exception as e:
+            emit('error', {'message': str(e)})
+
+    @app.route('/health')
+    def health_check():
+        return jsonify({"status": "ok", "sessions": len(manager.sessions), "clients": len(subscriptions)})
+
+    @app.route('/sessions')
+    def list_sessions():
+        return jsonify(manager.describe())
+
+    for worker in manager.workers:
+        socketio.start_background_task(relay_session_worker, worker)
+    socketio.start_background_task(evict_task)
+    return app, socketio, manager
+
+def run_session_host(port, workers=SESSION_WORKERS):
     try:
         multiprocessing.set_start_method('spawn')
     except RuntimeError:
         pass
-    app, socketio = create_app(port)
+    app, socketio, manager = create_session_app(port, workers)
+    print(f"Starting session host on port {port} (path /sim, {workers} workers)")
+    try:
+        socketio.run(app, host='0.0.0.0', port=port, debug=False)
+    finally:
+        manager.shutdown()
+
+def run_server(port, analysis_workers=None):
+    try:
+        multiprocessing.set_start_method('spawn')
+    except RuntimeError:
+        pass
+    app, socketio = create_app(port, analysis_workers)
     # 포트 번호에 따라 URL 접두사가 결정됩니다.
     sim_prefix = f"/sim{port - 2024}"
     print(f"Starting server on port {port} with URL prefix: {sim_prefix}")
-    socketio.run(app, host='0.0.0.0', port=port, debug=False)
+    try:
+        socketio.run(app, host='0.0.0.0', port=port, debug=False)
+    finally:
+        ANALYSIS_HOST.shutdown()
+        if RESULT_CACHE is not None:
+            RESULT_CACHE.close()
 
 def start_multi_server():
     ports = [2025, 2026, 2027, 2028]
+    # 포트마다 분석 호스트가 풀을 미리 띄우므로 코어를 포트 수로 나눠 준다 (합계가 코어 수를 넘지 않게)
+    analysis_workers = max(1, (os.cpu_count() or 1) // len(ports))
     processes = []
     try:
         for port in ports:
-            process = multiprocessing.Process(target=run_server, args=(port,))
+            process = multiprocessing.Process(target=run_server, args=(port, analysis_workers))
             process.start()
             processes.append(process)
             print(f"Started server process on port {port}")
@@ -789,5 +999,27 @@ def start_multi_server():
         sys.exit(0)
 
 if __name__ == '__main__':
-    multiprocessing.set_start_method('spawn')
-    start_multi_server()
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", action="store_true",
+                        help="포트 하나에서 여러 세션을 워커 풀로 돌리는 세션 호스트로 실행")
+    parser.add_argument("--port", type=int, default=2025)
+    parser.add_argument("--workers", type=int, default=SESSION_WORKERS)
+    parser.add_argument("--map", help="창고 맵 파일 (JSON / CSV / 이미지). 없으면 기본 맵")
+    parser.add_argument("--search", choices=PATH_SEARCHES, help="경로 탐색 (큰 맵은 hpa). 없으면 SIM_PATH_SEARCH / flat. "
+                        "jps/dstar는 동점 경로를 flat과 다르게 골라서 같은 시드라도 결과가 다르다")
+    parser.add_argument("--congestion", action="store_true", help="공유 혼잡장 켜기 (기본은 탐색마다 빈 혼잡 카운트)")
+    args = parser.parse_args()
+    if args.map:
+        # spawn으로 뜨는 서버/분석/세션 프로세스는 SIM_MAP 환경변수로 같은 맵을 읽는다 (내용 해시 캐시로 파싱은 한 번)
+        os.environ["SIM_MAP"] = os.path.abspath(args.map)
+        set_map(load_map(args.map))
+    if args.search:
+        # 시뮬레이션은 전부 spawn된 프로세스에서 돌아서 환경변수로 넘긴다
+        os.environ["SIM_PATH_SEARCH"] = args.search
+    if args.congestion:
+        os.environ["SIM_CONGESTION"] = "1"
+    if args.sessions:
+        run_session_host(args.port, args.workers)
+    else:
+        multiprocessing.set_start_method('spawn')
+        start_multi_server()